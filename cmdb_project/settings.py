@@ -174,3 +174,66 @@ LOGGING = {
 
 # URL a la que se redirigirá al usuario DESPUÉS de un inicio de sesión exitoso.
 LOGIN_REDIRECT_URL = 'gestion:dashboard'
+
+# Rango de años (hacia atrás y hacia adelante desde el año actual) que cubre
+# el índice precalculado del calendario laboral usado en el cálculo de SLA.
+SLA_CALENDARIO_ANIOS_ATRAS = 5
+SLA_CALENDARIO_ANIOS_ADELANTE = 1
+
+# Cálculo de SLA en paralelo: número de procesos (None = núcleos disponibles),
+# mínimo de incidencias para usar el pool y tamaño de cada bloque enviado.
+# Solo abren un pool los comandos calcular_sla y procesar_trabajos_sla (uno
+# por ejecución o trabajo); las vistas y los hilos calculan en su proceso.
+SLA_WORKERS = None
+SLA_PARALELO_MINIMO = 500
+SLA_PARALELO_BLOQUE = 250
+
+# Trabajos de SLA en segundo plano: incidencias por bloque (cada bloque se
+# guarda en su propia transacción) y si se lanzan en un hilo local al crearlos
+# (False = los procesa `manage.py procesar_trabajos_sla`). Vale también para
+# los recálculos de vencimientos que encolan las señales.
+SLA_TRABAJO_BLOQUE = 1000
+SLA_TRABAJOS_EN_HILO = True
+# Segundos sin avance tras los que un trabajo en proceso se da por abandonado
+# (p. ej. murió el hilo o el worker) y vuelve a quedar pendiente.
+SLA_TRABAJO_EXPIRACION = 1800
+# Incidencias por página al consultar los resultados de un trabajo terminado.
+SLA_RESULTADOS_PAGINA = 500
+
+# Recálculo de SLA por bloques: incidencias leídas y calculadas por bloque y
+# tamaño de cada bulk_update al guardar los resultados.
+SLA_CALCULO_BLOQUE = 2000
+SLA_GUARDADO_LOTE = 500
+
+# Caché compartido entre los procesos de la aplicación. Lo usa el contexto de
+# SLA (gestores, reglas y calendario), que se invalida con señales al editar
+# esos modelos y así todos los workers ven el cambio sin reiniciar.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+# Segundos que dura el contexto de SLA en caché si no hubo invalidación.
+SLA_CONTEXTO_TIMEOUT = 3600
+
+# Guardar el detalle por segmento (IncidenciaSegmento) al recalcular el SLA.
+SLA_GUARDAR_SEGMENTOS = True
+
+# Incidencias en riesgo de SLA: ventana (horas) y cantidad que muestran el endpoint y el dashboard.
+SLA_RIESGO_HORAS = 4
+SLA_RIESGO_LIMITE = 50
+
+# Carga masiva de incidencias: filas del archivo procesadas por bloque (una
+# consulta de tickets existentes por bloque) y tamaño de cada bulk_create.
+CARGA_MASIVA_LOTE = 2000
+CARGA_MASIVA_LOTE_INSERCION = 500
+
+# Cargas masivas en segundo plano: carpeta local donde se guardan los archivos
+# subidos y los CSV de filas con error, y si se procesan en un hilo local al
+# subirlos (False = los procesa `manage.py procesar_cargas_masivas`).
+CARGA_MASIVA_DIR = BASE_DIR / 'cargas'
+CARGA_MASIVA_EN_HILO = True
+# Segundos sin avance tras los que una carga en proceso se da por abandonada
+# y queda con error (no se reintenta: sus filas ya guardadas se conservan).
+CARGA_MASIVA_EXPIRACION = 1800
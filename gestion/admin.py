@@ -15,6 +15,9 @@ from .models import (
     ReglaSLA,
     HorarioLaboral,
     DiaFeriado,
+    CalendarioLaboral,
+    VentanaCalendario,
+    FeriadoCalendario,
 )
 
 # Usamos el decorador @admin.register para todos los modelos para mantener la consistencia.
@@ -65,6 +68,28 @@ class ReglaSLAAdmin(admin.ModelAdmin):
     tiempo_sla_en_minutos.short_description = "Tiempo SLA (Minutos)"
 
 
+class VentanaCalendarioInline(admin.TabularInline):
+    model = VentanaCalendario
+    extra = 0
+    max_num = 7
+
+
+class FeriadoCalendarioInline(admin.TabularInline):
+    model = FeriadoCalendario
+    extra = 0
+
+
+@admin.register(CalendarioLaboral)
+class CalendarioLaboralAdmin(admin.ModelAdmin):
+    """
+    Calendarios laborales alternativos: ventanas semanales y feriados propios.
+    Se asignan desde el Bloque o el Grupo Resolutor.
+    """
+    list_display = ('nombre', 'descripcion', 'usa_feriados_generales')
+    search_fields = ('nombre',)
+    inlines = [VentanaCalendarioInline, FeriadoCalendarioInline]
+
+
 @admin.register(Aplicacion)
 class AplicacionAdmin(admin.ModelAdmin):
     # No se toca esta clase, ya que Aplicacion todavía tiene el campo criticidad
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GestionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gestion'
+
+    def ready(self):
+        # Registra los receptores de señales (invalidación de cachés de SLA).
+        from . import signals  # noqa: F401
@@ -0,0 +1,62 @@
+# gestion/management/comandos.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from gestion.services.trabajos import trabajos_pendientes
+
+# Piezas comunes de los comandos de SLA y de trabajos en segundo plano. Este
+# módulo no está en commands/, así que Django no lo expone como comando.
+
+
+def agregar_opcion_workers(parser):
+    parser.add_argument('--workers', type=int,
+                        help="Procesos para el cálculo (por defecto settings.SLA_WORKERS).")
+
+
+def escribir_conteos(stdout, conteos, sangria=''):
+    """Una línea por resultado de cumple_sla con su cantidad de incidencias."""
+    for estado, cantidad in conteos.items():
+        stdout.write(f"{sangria}{estado:<40} : {cantidad}")
+
+
+class ComandoTrabajos(BaseCommand):
+    """
+    Base de los comandos que procesan una cola de trabajos (ver
+    services/trabajos.py). En cada pasada recupera los abandonados y procesa
+    los pendientes del más antiguo al más reciente; con --continuo repite la
+    pasada cada --intervalo segundos. Las subclases definen 'modelo',
+    'nuevos' y los métodos recuperar, procesar y describir.
+    """
+    modelo = None
+    # Texto de la ayuda de --continuo: "Sigue esperando {nuevos} ...".
+    nuevos = "nuevos trabajos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true',
+                            help=f"Sigue esperando {self.nuevos} en lugar de terminar.")
+        parser.add_argument('--intervalo', type=float, default=5,
+                            help="Segundos entre consultas en modo continuo (por defecto 5).")
+
+    def recuperar(self):
+        """Trata los trabajos abandonados y escribe una línea por cada uno."""
+        raise NotImplementedError
+
+    def procesar(self, trabajo_id, options):
+        """Procesa un trabajo pendiente; False si ya lo tomó otro worker."""
+        raise NotImplementedError
+
+    def describir(self, trabajo):
+        """Escribe el resultado de un trabajo recién procesado."""
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        while True:
+            self.recuperar()
+            for trabajo_id in trabajos_pendientes(self.modelo):
+                if self.procesar(trabajo_id, options):
+                    self.describir(self.modelo.objects.get(pk=trabajo_id))
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,84 @@
+# gestion/management/commands/benchmark_bitacora.py
+
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from gestion.services.motor_sla import normalizar_texto, parsear_bitacora
+
+_USUARIOS = ['Juan Pérez', 'María López', 'Soporte N1', 'Gestor Uno', 'Cliente Externo']
+_MENSAJES = ['Se revisa el caso con el área usuaria.', 'Pendiente de respuesta del cliente.',
+             'Se escala a segundo nivel,\nse adjuntan evidencias.', 'Cierre confirmado ¶ sin observaciones.']
+
+
+def parsear_bitacora_regex(bitacora_texto):
+    """Parser anterior (regex perezoso + strptime), como referencia de salida y tiempo."""
+    if not bitacora_texto:
+        return []
+    bitacora_texto_limpia = bitacora_texto.replace('¶', '\n')
+    entries = []
+    regex = re.compile(
+        r'(\d{2}[-/]\d{2}[-/]\d{4} \d{1,2}:\d{2}:\d{2})\s*,\s*([^,]+?)\s*,\s*(.*?)(?=\s*[\r\n]+\s*\d{2}[-/]\d{2}[-/]\d{4}|\Z)', re.DOTALL)
+    for match in regex.finditer(bitacora_texto_limpia):
+        date_str, user_raw, message = match.groups()
+        try:
+            dt_obj_naive = datetime.strptime(
+                date_str.replace('/', '-').strip(), "%d-%m-%Y %H:%M:%S")
+            entries.append({"fecha_hora": timezone.make_aware(dt_obj_naive), "usuario": normalizar_texto(
+                user_raw), "mensaje": message.strip()})
+        except ValueError:
+            pass
+    entries.sort(key=lambda x: x["fecha_hora"])
+    return entries
+
+
+def generar_bitacora(rnd, tamano_bytes):
+    lineas, fecha, largo = [], datetime(2025, 1, 2, 8, 0, 0), 0
+    while largo < tamano_bytes:
+        fecha += timedelta(seconds=rnd.randint(30, 6 * 3600))
+        linea = f"{fecha:%d-%m-%Y %H:%M:%S} , {rnd.choice(_USUARIOS)} , {rnd.choice(_MENSAJES)}"
+        lineas.append(linea)
+        largo += len(linea.encode('utf-8')) + 1
+    return '\n'.join(lineas)
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark del parser de bitácoras (actual vs regex anterior) sobre bitácoras sintéticas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kb', type=int, default=100, help="Tamaño de cada bitácora en KB (por defecto 100).")
+        parser.add_argument('--bitacoras', type=int, default=20, help="Cantidad de bitácoras (por defecto 20).")
+        parser.add_argument('--repeticiones', type=int, default=3, help="Repeticiones; se informa la mejor.")
+        parser.add_argument('--semilla', type=int, default=1)
+
+    def _medir(self, parser, bitacoras, repeticiones):
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            for texto in bitacoras:
+                parser(texto)
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return mejor
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['semilla'])
+        bitacoras = [generar_bitacora(rnd, options['kb'] * 1024)
+                     for _ in range(options['bitacoras'])]
+        total_mb = sum(len(b.encode('utf-8')) for b in bitacoras) / (1024 * 1024)
+
+        for texto in bitacoras:
+            if parsear_bitacora(texto) != parsear_bitacora_regex(texto):
+                self.stderr.write(self.style.ERROR("La salida difiere del parser anterior."))
+                return
+
+        anterior = self._medir(parsear_bitacora_regex, bitacoras, options['repeticiones'])
+        actual = self._medir(parsear_bitacora, bitacoras, options['repeticiones'])
+        self.stdout.write(f"{len(bitacoras)} bitácoras de {options['kb']} KB ({total_mb:.1f} MB), salida idéntica.")
+        self.stdout.write(f"{'Parser anterior (regex + strptime)':<40} : {anterior:.3f} s ({total_mb / anterior:.1f} MB/s)")
+        self.stdout.write(f"{'Parser actual (scanner + enteros)':<40} : {actual:.3f} s ({total_mb / actual:.1f} MB/s)")
+        self.stdout.write(self.style.SUCCESS(f"Mejora: {anterior / actual:.1f}x"))
@@ -0,0 +1,275 @@
+# gestion/management/commands/benchmark_sla.py
+
+import json
+import platform
+import random
+import time
+from datetime import date, datetime, time as hora, timedelta
+from importlib import import_module
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from gestion.management.commands.benchmark_bitacora import parsear_bitacora_regex
+from gestion.services.cache_bitacora import parsear_compacto
+from gestion.services.calendario_sla import WorkingCalendar
+from gestion.services.motor_sla import (calcular_sla_desde_bitacora, construir_resultado_sla, es_severidad_24_7,
+                                        is_working_time, normalizar_texto, parsear_bitacora)
+from gestion.services.sla_lote import evaluar_lote, tarea_sla
+
+# --- Escenario sintético ---
+
+_GESTORES = ['Gestor Uno', 'Soporte N1', 'María López']
+_OTROS = ['Cliente Externo', 'Mesa de Ayuda']
+_MENSAJES = ['Se revisa el caso con el área usuaria.', 'Se escala a segundo nivel,\nse adjuntan evidencias.',
+             'Se aplica workaround ¶ sin observaciones.', 'Cierre confirmado.']
+_MENSAJE_PENDIENTE = 'Pendiente de respuesta del cliente.'
+
+_HORARIOS = {0: (hora(8, 30), hora(18, 0)), 1: (hora(8, 30), hora(18, 0)), 2: (hora(8, 30), hora(18, 0)),
+             3: (hora(8, 30), hora(18, 0)), 4: (hora(8, 30), hora(17, 59, 59)), 5: (hora(9, 0), hora(13, 0)),
+             6: (None, None)}
+_FERIADOS = {date(2025, 1, 1), date(2025, 4, 18), date(2025, 4, 19), date(2025, 5, 1), date(2025, 5, 21),
+             date(2025, 6, 20), date(2025, 7, 16), date(2025, 8, 15), date(2025, 9, 18), date(2025, 9, 19),
+             date(2025, 10, 31), date(2025, 12, 8), date(2025, 12, 25)}
+# Cambios de hora de America/Santiago en 2025 (a las 00:00 locales).
+_CAMBIOS_HORA = [datetime(2025, 4, 6), datetime(2025, 9, 7)]
+
+_SEVERIDADES = [SimpleNamespace(id=1, desc_severidad='Crítica'), SimpleNamespace(id=2, desc_severidad='Alta'),
+                SimpleNamespace(id=3, desc_severidad='Baja')]
+_APLICACIONES = [SimpleNamespace(criticidad=SimpleNamespace(id=1), criticidad_id=1),
+                 SimpleNamespace(criticidad=SimpleNamespace(id=2), criticidad_id=2)]
+_REGLAS = {(1, 1): timedelta(hours=4), (1, 2): timedelta(hours=8), (2, 1): timedelta(hours=8),
+           (2, 2): timedelta(hours=24), (3, 1): timedelta(hours=24)}  # (3, 2) sin regla a propósito.
+
+PERFILES = ['laboral', 'pendiente_largo', 'fin_de_semana', 'feriado', 'cambio_hora', 'critica_24_7']
+
+
+def _inicio_perfil(rnd, perfil):
+    if perfil == 'fin_de_semana':
+        viernes = date(2025, 1, 3) + timedelta(weeks=rnd.randint(0, 50))
+        return datetime.combine(viernes, hora(rnd.randint(14, 19), rnd.randint(0, 59), rnd.randint(0, 59)))
+    if perfil == 'feriado':
+        vispera = rnd.choice(sorted(_FERIADOS)) - timedelta(days=1)
+        return datetime.combine(vispera, hora(rnd.randint(7, 18), rnd.randint(0, 59), rnd.randint(0, 59)))
+    if perfil == 'cambio_hora':
+        return rnd.choice(_CAMBIOS_HORA) - timedelta(seconds=rnd.randint(0, 36 * 3600))
+    return datetime(2025, 1, 2) + timedelta(days=rnd.randint(0, 340), seconds=rnd.randint(6 * 3600, 20 * 3600))
+
+
+def _paso_perfil(rnd, perfil):
+    if perfil == 'fin_de_semana':
+        return timedelta(seconds=rnd.randint(6 * 3600, 40 * 3600))
+    if perfil == 'feriado':
+        return timedelta(seconds=rnd.randint(3600, 20 * 3600))
+    if perfil == 'cambio_hora':
+        return timedelta(seconds=rnd.randint(600, 6 * 3600))
+    return timedelta(seconds=rnd.randint(60, 4 * 3600))
+
+
+def generar_incidencia(rnd, numero, perfil):
+    """
+    Incidencia sintética (sin base de datos) con una bitácora del perfil
+    indicado: días laborales, pausas 'pendiente' seguidas de varios días sin
+    gestión, fines de semana, feriados, cambios de hora o severidad 24/7.
+    """
+    fecha = _inicio_perfil(rnd, perfil)
+    lineas = []
+    for i in range(rnd.randint(4, 12)):
+        if i:
+            fecha += _paso_perfil(rnd, perfil)
+        usuario = rnd.choice(_GESTORES if rnd.random() < 0.7 else _OTROS)
+        mensaje = rnd.choice(_MENSAJES)
+        if perfil == 'pendiente_largo' and rnd.random() < 0.4:
+            mensaje = _MENSAJE_PENDIENTE
+            lineas.append(f"{fecha:%d-%m-%Y %H:%M:%S} , {usuario} , {mensaje}")
+            fecha += timedelta(days=rnd.randint(2, 10), seconds=rnd.randint(0, 86399))
+            continue
+        lineas.append(f"{fecha:%d-%m-%Y %H:%M:%S} , {usuario} , {mensaje}")
+
+    severidad = _SEVERIDADES[0] if perfil == 'critica_24_7' else rnd.choice(_SEVERIDADES[1:])
+    return SimpleNamespace(id=numero, incidencia=f"BENCH{numero:06d}", perfil=perfil, bitacora='\n'.join(lineas),
+                           severidad=severidad, severidad_id=severidad.id, aplicacion=rnd.choice(_APLICACIONES))
+
+
+# --- Motor de referencia (recorrido segundo a segundo original) ---
+
+def calcular_tiempo_efectivo_por_segundo(start_dt, end_dt, horario_laboral, dias_feriados, es_critica_24_7=False):
+    """Implementación original de calcular_tiempo_efectivo: revisa cada segundo del intervalo."""
+    if start_dt >= end_dt:
+        return timedelta(0)
+    if es_critica_24_7:
+        return end_dt - start_dt
+
+    tiempo_laboral_total = timedelta(0)
+    puntero_tiempo = start_dt
+    while puntero_tiempo < end_dt:
+        if is_working_time(puntero_tiempo, horario_laboral, dias_feriados):
+            tiempo_laboral_total += timedelta(seconds=1)
+        puntero_tiempo += timedelta(seconds=1)
+    return tiempo_laboral_total
+
+
+def sla_referencia(incidencia, gestores_norm, reglas_sla, calendario):
+    """calcular_sla_desde_bitacora original: parser regex anterior y recorrido segundo a segundo."""
+    entradas = parsear_bitacora_regex(incidencia.bitacora)
+    es_critica_24_7 = es_severidad_24_7(incidencia)
+    tiempo_gestion_total = timedelta(0)
+    for actual, siguiente in zip(entradas, entradas[1:]):
+        if siguiente['usuario'] in gestores_norm and 'pendiente' not in normalizar_texto(actual['mensaje']):
+            tiempo_gestion_total += calcular_tiempo_efectivo_por_segundo(
+                actual['fecha_hora'], siguiente['fecha_hora'], calendario.horarios, calendario.feriados, es_critica_24_7)
+    return construir_resultado_sla(
+        incidencia.incidencia, (incidencia.severidad.id, incidencia.aplicacion.criticidad.id),
+        [e['usuario'] for e in entradas], tiempo_gestion_total, es_critica_24_7, gestores_norm, reglas_sla)
+
+
+# --- Motores candidatos: (incidencias, gestores_norm, reglas_sla, calendario) -> [resultado] ---
+
+def _candidato_motor(incidencias, gestores_norm, reglas_sla, calendario):
+    return [calcular_sla_desde_bitacora(inc, gestores_norm, calendario.horarios, calendario.feriados, reglas_sla, calendario)
+            for inc in incidencias]
+
+
+def _candidato_motor_por_dias(incidencias, gestores_norm, reglas_sla, calendario):
+    return [calcular_sla_desde_bitacora(inc, gestores_norm, calendario.horarios, calendario.feriados, reglas_sla)
+            for inc in incidencias]
+
+
+def _candidato_lote(incidencias, gestores_norm, reglas_sla, calendario):
+    tareas = [tarea_sla(inc, parsear_compacto(inc.bitacora, inc.id)) for inc in incidencias]
+    return evaluar_lote(tareas, gestores_norm, reglas_sla, calendario)
+
+
+CANDIDATOS = {
+    'motor': _candidato_motor,
+    'motor_por_dias': _candidato_motor_por_dias,
+    'lote': _candidato_lote,
+}
+
+
+def cargar_candidato(nombre):
+    """Un candidato registrado o una ruta 'modulo:funcion' con la misma firma."""
+    if nombre in CANDIDATOS:
+        return CANDIDATOS[nombre]
+    modulo, _, funcion = nombre.partition(':')
+    try:
+        return getattr(import_module(modulo), funcion)
+    except (ImportError, AttributeError, ValueError):
+        raise CommandError(f"Candidato desconocido: '{nombre}'. Use {', '.join(CANDIDATOS)} o 'modulo:funcion'.")
+
+
+class Command(BaseCommand):
+    help = ("Benchmark y verificación de equivalencia del motor de SLA: compara motores candidatos contra el "
+            "recorrido segundo a segundo original sobre bitácoras sintéticas y guarda los resultados en JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidato', action='append',
+                            help=f"Motor a evaluar ({', '.join(CANDIDATOS)} o 'modulo:funcion'); repetible. "
+                                 "Por defecto: motor y lote.")
+        parser.add_argument('--incidencias', type=int, default=10,
+                            help="Incidencias por perfil para la comparación con la referencia (por defecto 10).")
+        parser.add_argument('--incidencias-velocidad', type=int, default=500,
+                            help="Incidencias por perfil para medir la velocidad de los candidatos (por defecto 500).")
+        parser.add_argument('--repeticiones', type=int, default=3, help="Repeticiones por candidato; se informa la mejor.")
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--zona', default='America/Santiago',
+                            help="Zona horaria de las bitácoras (por defecto America/Santiago, con cambio de hora).")
+        parser.add_argument('--sin-referencia', action='store_true',
+                            help="Solo mide velocidad; omite el recorrido segundo a segundo y la comparación.")
+        parser.add_argument('--salida', default='benchmark_sla.json', help="Archivo JSON de resultados.")
+
+    def _medir(self, motor, incidencias, contexto, repeticiones):
+        mejor, resultados = None, None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            resultados = motor(incidencias, *contexto)
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return mejor, resultados
+
+    def _generar(self, rnd, por_perfil, desde=0):
+        perfiles = [p for p in PERFILES for _ in range(por_perfil)]
+        return [generar_incidencia(rnd, desde + i, perfil) for i, perfil in enumerate(perfiles)]
+
+    def _contar_segmentos(self, incidencias, parser=parsear_bitacora):
+        return sum(max(0, len(parser(inc.bitacora)) - 1) for inc in incidencias)
+
+    def _metricas(self, segundos, incidencias, segmentos):
+        return {'segundos': round(segundos, 6),
+                'us_por_segmento': round(segundos * 1e6 / segmentos, 3) if segmentos else None,
+                'incidencias_por_segundo': round(len(incidencias) / segundos, 1) if segundos else None}
+
+    def handle(self, *args, **options):
+        nombres = options['candidato'] or ['motor', 'lote']
+        candidatos = {nombre: cargar_candidato(nombre) for nombre in nombres}
+
+        rnd = random.Random(options['semilla'])
+        incidencias = self._generar(rnd, options['incidencias'])
+        incidencias_velocidad = self._generar(rnd, options['incidencias_velocidad'], desde=len(incidencias))
+        calendario = WorkingCalendar(_HORARIOS, _FERIADOS, date(2024, 1, 1), date(2026, 12, 31))
+        contexto = (frozenset(normalizar_texto(g) for g in _GESTORES), dict(_REGLAS), calendario)
+
+        informe = {
+            'fecha': timezone.now().isoformat(), 'python': platform.python_version(),
+            'parametros': {k: options[k] for k in ('incidencias', 'incidencias_velocidad', 'repeticiones',
+                                                    'semilla', 'zona')},
+            'perfiles': list(PERFILES), 'referencia': None, 'candidatos': {},
+        }
+
+        with timezone.override(options['zona']):
+            segmentos = self._contar_segmentos(incidencias)
+            segmentos_velocidad = self._contar_segmentos(incidencias_velocidad)
+            informe['comparacion'] = {'incidencias': len(incidencias), 'segmentos': segmentos}
+            informe['velocidad'] = {'incidencias': len(incidencias_velocidad), 'segmentos': segmentos_velocidad}
+            self.stdout.write(f"Comparación: {len(incidencias)} incidencias ({segmentos} segmentos); velocidad: "
+                              f"{len(incidencias_velocidad)} incidencias ({segmentos_velocidad} segmentos); "
+                              f"zona {options['zona']}.")
+
+            esperados = None
+            if not options['sin_referencia']:
+                inicio = time.perf_counter()
+                esperados = [sla_referencia(inc, *contexto) for inc in incidencias]
+                # Los segmentos de la referencia se cuentan con su propio parser.
+                informe['referencia'] = self._metricas(time.perf_counter() - inicio, incidencias,
+                                                       self._contar_segmentos(incidencias, parsear_bitacora_regex))
+                self._escribir_linea('Referencia (segundo a segundo)', informe['referencia'])
+
+            for nombre, motor in candidatos.items():
+                segundos, _ = self._medir(motor, incidencias_velocidad, contexto, options['repeticiones'])
+                metricas = self._metricas(segundos, incidencias_velocidad, segmentos_velocidad)
+                if esperados is not None:
+                    resultados = motor(incidencias, *contexto)
+                    diferencias = [
+                        {'incidencia': inc.incidencia, 'perfil': inc.perfil,
+                         'esperado': esperado['tiempo_gestion_calculado'].total_seconds(),
+                         'obtenido': obtenido['tiempo_gestion_calculado'].total_seconds(),
+                         'cumple_esperado': esperado['cumple_sla'], 'cumple_obtenido': obtenido['cumple_sla']}
+                        for inc, esperado, obtenido in zip(incidencias, esperados, resultados)
+                        if esperado['tiempo_gestion_calculado'] != obtenido['tiempo_gestion_calculado']
+                        or esperado['cumple_sla'] != obtenido['cumple_sla']]
+                    metricas['diferencias'] = len(diferencias)
+                    metricas['ejemplos'] = diferencias[:10]
+                    referencia_us, candidato_us = informe['referencia']['us_por_segmento'], metricas['us_por_segmento']
+                    # Sin segmentos (o sin tiempo medible) no hay aceleración que informar.
+                    metricas['aceleracion'] = (round(referencia_us / candidato_us, 1)
+                                               if referencia_us and candidato_us else None)
+                informe['candidatos'][nombre] = metricas
+                self._escribir_linea(f"Candidato '{nombre}'", metricas)
+
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, ensure_ascii=False, indent=2)
+        self.stdout.write(f"Resultados guardados en {options['salida']}.")
+
+        distintos = [nombre for nombre, m in informe['candidatos'].items() if m.get('diferencias')]
+        if distintos:
+            raise CommandError(f"Resultados distintos a la referencia en: {', '.join(distintos)}.")
+        if esperados is not None:
+            self.stdout.write(self.style.SUCCESS("Todos los candidatos coinciden exactamente con la referencia."))
+
+    def _escribir_linea(self, titulo, metricas):
+        extra = ''
+        if 'diferencias' in metricas:
+            extra = f", {metricas['diferencias']} diferencias"
+        self.stdout.write(f"{titulo:<35} : {metricas['segundos']:.3f} s, {metricas['us_por_segmento']} µs/segmento, "
+                          f"{metricas['incidencias_por_segundo']} incidencias/s{extra}")
@@ -0,0 +1,120 @@
+# gestion/management/commands/calcular_sla.py
+
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from gestion.management.comandos import agregar_opcion_workers, escribir_conteos
+from gestion.models import Incidencia
+from gestion.services.guardado_sla import aplicar_resultados_sla, guardar_resultados_sla, iterar_por_id
+from gestion.services.trabajos_sla import calcular_por_bloques
+
+
+def _fecha(valor):
+    try:
+        return timezone.make_aware(datetime.strptime(valor, '%Y-%m-%d'), timezone.get_default_timezone())
+    except ValueError:
+        raise CommandError(f"Fecha inválida '{valor}', se espera AAAA-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = ("Recalcula y guarda el SLA de las incidencias en bloques, fuera de los workers web. "
+            "Si se interrumpe, la siguiente ejecución con los mismos filtros continúa desde el último bloque guardado.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="Fecha de resolución desde (AAAA-MM-DD, inclusive).")
+        parser.add_argument('--until', help="Fecha de resolución hasta (AAAA-MM-DD, inclusive).")
+        parser.add_argument('--bloque', help="Solo incidencias de este bloque (descripción).")
+        parser.add_argument('--aplicacion', help="Solo incidencias de esta aplicación (código).")
+        parser.add_argument('--only-stale', action='store_true',
+                            help="Solo incidencias marcadas con el SLA por recalcular.")
+        agregar_opcion_workers(parser)
+        parser.add_argument('--chunk-size', type=int, default=getattr(settings, 'SLA_CALCULO_BLOQUE', 2000),
+                            help="Incidencias por bloque leído, calculado y guardado.")
+        parser.add_argument('--checkpoint', default=os.path.join(settings.BASE_DIR, 'calcular_sla.checkpoint.json'),
+                            help="Archivo donde se guarda el avance para poder reanudar.")
+        parser.add_argument('--restart', action='store_true',
+                            help="Ignora el checkpoint existente y empieza desde el principio.")
+
+    def _filtrar(self, options):
+        incidencias_qs = Incidencia.objects.select_related(
+            'aplicacion__criticidad', 'severidad')
+        if options['since']:
+            incidencias_qs = incidencias_qs.filter(
+                fecha_ultima_resolucion__gte=_fecha(options['since']))
+        if options['until']:
+            incidencias_qs = incidencias_qs.filter(
+                fecha_ultima_resolucion__lt=_fecha(options['until']) + timedelta(days=1))
+        if options['bloque']:
+            incidencias_qs = incidencias_qs.filter(
+                bloque__desc_bloque=options['bloque'])
+        if options['aplicacion']:
+            incidencias_qs = incidencias_qs.filter(
+                aplicacion__cod_aplicacion=options['aplicacion'])
+        if options['only_stale']:
+            incidencias_qs = incidencias_qs.filter(sla_obsoleto=True)
+        return incidencias_qs
+
+    def _leer_checkpoint(self, ruta, firma):
+        try:
+            with open(ruta, encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return 0, 0
+        if checkpoint.get('firma') != firma:
+            self.stdout.write(self.style.WARNING(
+                "El checkpoint existente es de otros filtros; se ignora."))
+            return 0, 0
+        return checkpoint['ultimo_id'], checkpoint['procesadas']
+
+    def _escribir_checkpoint(self, ruta, firma, ultimo_id, procesadas):
+        temporal = f"{ruta}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({'firma': firma, 'ultimo_id': ultimo_id, 'procesadas': procesadas}, f)
+        os.replace(temporal, ruta)
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size debe ser mayor que 0.")
+
+        incidencias_qs = self._filtrar(options)
+        filtros = {k: options[k] for k in ('since', 'until', 'bloque', 'aplicacion', 'only_stale')}
+        firma = hashlib.sha256(json.dumps(filtros, sort_keys=True).encode('utf-8')).hexdigest()
+
+        ruta_checkpoint = options['checkpoint']
+        ultimo_id, procesadas = (0, 0) if options['restart'] else self._leer_checkpoint(ruta_checkpoint, firma)
+        if ultimo_id:
+            self.stdout.write(
+                f"Reanudando desde la incidencia id {ultimo_id} ({procesadas} ya procesadas).")
+
+        # Con --only-stale las ya guardadas dejan de estar obsoletas: no se cuentan de nuevo.
+        pendientes = incidencias_qs.filter(pk__gt=ultimo_id).count()
+        self.stdout.write(f"Incidencias a procesar: {pendientes}")
+
+        stats = Counter()
+        procesadas_ahora = 0
+        inicio = time.monotonic()
+        bloques = iterar_por_id(incidencias_qs, options['chunk_size'], desde_id=ultimo_id)
+        for bloque, resultados, version in calcular_por_bloques(bloques, options['workers']):
+            stats.update(aplicar_resultados_sla(bloque, resultados, version))
+            guardar_resultados_sla(bloque, resultados)
+
+            procesadas_ahora += len(bloque)
+            self._escribir_checkpoint(ruta_checkpoint, firma, bloque[-1].pk, procesadas + procesadas_ahora)
+            self.stdout.write(f"  {procesadas_ahora}/{pendientes} incidencias")
+
+        duracion = time.monotonic() - inicio
+        if os.path.exists(ruta_checkpoint):
+            os.remove(ruta_checkpoint)
+
+        escribir_conteos(self.stdout, stats)
+        velocidad = procesadas_ahora / duracion if duracion > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Se procesaron {procesadas_ahora} incidencias en {duracion:.1f} s ({velocidad:.1f} incidencias/s)."))
@@ -0,0 +1,24 @@
+# gestion/management/commands/procesar_cargas_masivas.py
+
+from gestion.management.comandos import ComandoTrabajos
+from gestion.models import TrabajoCarga
+from gestion.services.cargas_masivas import procesar_trabajo_carga, recuperar_cargas_abandonadas
+
+
+class Command(ComandoTrabajos):
+    help = "Procesa las cargas masivas pendientes."
+    modelo = TrabajoCarga
+    nuevos = "nuevas cargas"
+
+    def recuperar(self):
+        for trabajo_id in recuperar_cargas_abandonadas():
+            self.stdout.write(f"Carga {trabajo_id}: abandonada, queda con error")
+
+    def procesar(self, trabajo_id, options):
+        return procesar_trabajo_carga(trabajo_id)
+
+    def describir(self, trabajo):
+        self.stdout.write(
+            f"Carga {trabajo.pk} ({trabajo.get_tipo_display()}): {trabajo.get_estado_display()} "
+            f"({trabajo.procesadas} filas, {trabajo.creadas} creadas, {trabajo.actualizadas} actualizadas, "
+            f"{trabajo.omitidas} omitidas, {trabajo.fallidas} con errores)")
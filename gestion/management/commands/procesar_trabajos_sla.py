@@ -0,0 +1,26 @@
+# gestion/management/commands/procesar_trabajos_sla.py
+
+from gestion.management.comandos import ComandoTrabajos, agregar_opcion_workers, escribir_conteos
+from gestion.models import TrabajoSLA
+from gestion.services.trabajos_sla import procesar_trabajo, recuperar_trabajos_abandonados
+
+
+class Command(ComandoTrabajos):
+    help = "Procesa los trabajos de cálculo de SLA pendientes."
+    modelo = TrabajoSLA
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        agregar_opcion_workers(parser)
+
+    def recuperar(self):
+        for trabajo_id in recuperar_trabajos_abandonados():
+            self.stdout.write(f"Trabajo {trabajo_id}: abandonado, vuelve a pendientes")
+
+    def procesar(self, trabajo_id, options):
+        return procesar_trabajo(trabajo_id, options['workers'])
+
+    def describir(self, trabajo):
+        self.stdout.write(
+            f"Trabajo {trabajo.pk}: {trabajo.get_estado_display()} ({trabajo.procesadas}/{trabajo.total})")
+        escribir_conteos(self.stdout, trabajo.conteos, sangria='  ')
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-17 01:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0011_incidencia_cumple_sla_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BitacoraParseada',
+            fields=[
+                ('incidencia', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='bitacora_parseada', serialize=False, to='gestion.incidencia')),
+                ('hash_bitacora', models.CharField(max_length=64)),
+                ('entradas', models.JSONField(default=list)),
+            ],
+            options={
+                'verbose_name': 'Bitácora Parseada',
+                'verbose_name_plural': 'Bitácoras Parseadas',
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0012_bitacoraparseada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionSLA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Versión de SLA',
+                'verbose_name_plural': 'Versiones de SLA',
+            },
+        ),
+        migrations.AddField(
+            model_name='bitacoraparseada',
+            name='primera_fecha',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bitacoraparseada',
+            name='ultima_fecha',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='incidencia',
+            name='sla_firma_entrada',
+            field=models.CharField(blank=True, default='', help_text='Hash de bitácora, severidad y criticidad usados en el último cálculo de SLA.', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='incidencia',
+            name='sla_obsoleto',
+            field=models.BooleanField(db_index=True, default=True, verbose_name='SLA por recalcular'),
+        ),
+        migrations.AddField(
+            model_name='incidencia',
+            name='sla_version',
+            field=models.PositiveIntegerField(default=0, help_text='Versión de reglas/calendario/gestores vigente en el último cálculo de SLA.'),
+        ),
+    ]
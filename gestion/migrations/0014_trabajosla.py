@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0013_incidencia_sla_incremental'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoSLA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completado', 'Completado'), ('error', 'Error')], db_index=True, default='pendiente', max_length=20)),
+                ('incidencia_ids', models.JSONField(default=list)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('procesadas', models.PositiveIntegerField(default=0)),
+                ('conteos', models.JSONField(default=dict)),
+                ('mensaje', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Trabajo de SLA',
+                'verbose_name_plural': 'Trabajos de SLA',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
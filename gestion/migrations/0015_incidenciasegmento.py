@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0014_trabajosla'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidenciaSegmento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orden', models.PositiveIntegerField()),
+                ('inicio', models.DateTimeField()),
+                ('fin', models.DateTimeField()),
+                ('usuario_origen', models.CharField(max_length=150)),
+                ('usuario_destino', models.CharField(max_length=150)),
+                ('contado', models.BooleanField()),
+                ('motivo', models.CharField(choices=[('cuenta', 'Se cuenta'), ('no_gestor', 'Responde un no gestor'), ('pausado', 'Reloj pausado (Pendiente)')], max_length=20)),
+                ('segundos_efectivos', models.PositiveIntegerField()),
+                ('incidencia', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segmentos', to='gestion.incidencia')),
+            ],
+            options={
+                'verbose_name': 'Segmento de Incidencia',
+                'verbose_name_plural': 'Segmentos de Incidencia',
+                'ordering': ['incidencia', 'orden'],
+                'indexes': [models.Index(fields=['usuario_destino', 'inicio'], name='gestion_inc_usuario_a91a8d_idx'), models.Index(fields=['motivo', 'inicio'], name='gestion_inc_motivo_51296e_idx')],
+            },
+        ),
+    ]
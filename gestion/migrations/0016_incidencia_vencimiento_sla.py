@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0015_incidenciasegmento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incidencia',
+            name='vencimiento_sla',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Vencimiento proyectado del SLA'),
+        ),
+    ]
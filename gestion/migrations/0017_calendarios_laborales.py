@@ -0,0 +1,69 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0016_incidencia_vencimiento_sla'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarioLaboral',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, unique=True)),
+                ('descripcion', models.CharField(blank=True, max_length=255)),
+                ('usa_feriados_generales', models.BooleanField(default=True, help_text='Suma los DiaFeriado generales a los feriados propios del calendario.')),
+            ],
+            options={
+                'verbose_name': 'Calendario Laboral',
+                'verbose_name_plural': 'Calendarios Laborales',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.AddField(
+            model_name='bloque',
+            name='calendario',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bloques', to='gestion.calendariolaboral'),
+        ),
+        migrations.AddField(
+            model_name='gruporesolutor',
+            name='calendario',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='grupos_resolutores', to='gestion.calendariolaboral'),
+        ),
+        migrations.CreateModel(
+            name='FeriadoCalendario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('descripcion', models.CharField(blank=True, max_length=255)),
+                ('calendario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feriados', to='gestion.calendariolaboral')),
+            ],
+            options={
+                'verbose_name': 'Feriado de Calendario',
+                'verbose_name_plural': 'Feriados de Calendario',
+                'ordering': ['calendario', 'fecha'],
+                'unique_together': {('calendario', 'fecha')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VentanaCalendario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia_semana', models.IntegerField(choices=[(0, 'LUNES'), (1, 'MARTES'), (2, 'MIÉRCOLES'), (3, 'JUEVES'), (4, 'VIERNES'), (5, 'SÁBADO'), (6, 'DOMINGO')])),
+                ('hora_inicio', models.TimeField()),
+                ('hora_fin', models.TimeField()),
+                ('calendario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventanas', to='gestion.calendariolaboral')),
+            ],
+            options={
+                'verbose_name': 'Ventana de Calendario',
+                'verbose_name_plural': 'Ventanas de Calendario',
+                'ordering': ['calendario', 'dia_semana'],
+                'unique_together': {('calendario', 'dia_semana')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0017_calendarios_laborales'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoCarga',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('aplicaciones', 'Aplicaciones'), ('codigos_cierre', 'Códigos de cierre'), ('incidencias', 'Incidencias')], max_length=20)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completado', 'Completado'), ('error', 'Error')], db_index=True, default='pendiente', max_length=20)),
+                ('nombre_archivo', models.CharField(max_length=255)),
+                ('ruta_archivo', models.CharField(max_length=500)),
+                ('ruta_errores', models.CharField(blank=True, max_length=500)),
+                ('procesadas', models.PositiveIntegerField(default=0)),
+                ('creadas', models.PositiveIntegerField(default=0)),
+                ('actualizadas', models.PositiveIntegerField(default=0)),
+                ('omitidas', models.PositiveIntegerField(default=0)),
+                ('fallidas', models.PositiveIntegerField(default=0)),
+                ('detalle', models.JSONField(default=dict)),
+                ('mensaje', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trabajos_carga', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trabajo de carga masiva',
+                'verbose_name_plural': 'Trabajos de carga masiva',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
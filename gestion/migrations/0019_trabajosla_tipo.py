@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0018_trabajocarga'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajosla',
+            name='filtros',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='trabajosla',
+            name='tipo',
+            field=models.CharField(choices=[('calculo', 'Cálculo de SLA'), ('vencimientos', 'Vencimientos de SLA')], default='calculo', max_length=20),
+        ),
+    ]
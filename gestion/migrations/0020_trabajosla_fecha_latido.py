@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0019_trabajosla_tipo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajosla',
+            name='fecha_latido',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0020_trabajosla_fecha_latido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajocarga',
+            name='fecha_latido',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+def completar_usuarios(apps, schema_editor):
+    """Llena BitacoraParseada.usuarios a partir de las entradas ya guardadas."""
+    BitacoraParseada = apps.get_model('gestion', 'BitacoraParseada')
+    # Por bloques de id, sin cursor abierto mientras se actualiza la tabla.
+    ultimo_id = 0
+    while True:
+        bloque = list(BitacoraParseada.objects.filter(incidencia_id__gt=ultimo_id)
+                      .order_by('incidencia_id').only('incidencia_id', 'entradas')[:500])
+        if not bloque:
+            return
+        for cacheada in bloque:
+            usuarios = sorted({entrada[1] for entrada in cacheada.entradas})
+            cacheada.usuarios = "\n" + "\n".join(usuarios) + "\n" if usuarios else ""
+        BitacoraParseada.objects.bulk_update(bloque, ['usuarios'])
+        ultimo_id = bloque[-1].incidencia_id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0021_trabajocarga_fecha_latido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bitacoraparseada',
+            name='usuarios',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(completar_usuarios, migrations.RunPython.noop),
+    ]
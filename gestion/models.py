@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 
 # Modelos de tablas catálogo (simples)
@@ -5,6 +6,9 @@ from django.db import models
 
 class Bloque(models.Model):
     desc_bloque = models.CharField(max_length=255, unique=True)
+    # Calendario laboral para el SLA de sus incidencias (vacío = HorarioLaboral general).
+    calendario = models.ForeignKey(
+        'CalendarioLaboral', on_delete=models.SET_NULL, null=True, blank=True, related_name='bloques')
 
     def __str__(self):
         return self.desc_bloque
@@ -33,6 +37,9 @@ class Severidad(models.Model):
 
 class GrupoResolutor(models.Model):
     desc_grupo_resol = models.CharField(max_length=255, unique=True)
+    # Tiene prioridad sobre el calendario del bloque de la incidencia.
+    calendario = models.ForeignKey(
+        'CalendarioLaboral', on_delete=models.SET_NULL, null=True, blank=True, related_name='grupos_resolutores')
 
     def __str__(self):
         return self.desc_grupo_resol
@@ -175,6 +182,30 @@ class Incidencia(models.Model):
         help_text="Tiempo de gestión laboral calculado para el SLA.",
         verbose_name="Tiempo de Gestión (SLA)"
     )
+    # Datos de entrada con los que se obtuvo el SLA guardado (recálculo incremental).
+    sla_firma_entrada = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text="Hash de bitácora, severidad y criticidad usados en el último cálculo de SLA."
+    )
+    sla_version = models.PositiveIntegerField(
+        default=0,
+        help_text="Versión de reglas/calendario/gestores vigente en el último cálculo de SLA."
+    )
+    sla_obsoleto = models.BooleanField(
+        default=True,
+        db_index=True,
+        verbose_name="SLA por recalcular"
+    )
+    # Instante proyectado en que se agota el SLA de una incidencia abierta
+    # (consultas de incidencias en riesgo sin recalcular bitácoras).
+    vencimiento_sla = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="Vencimiento proyectado del SLA"
+    )
 
     def __str__(self):
         return self.incidencia
@@ -248,3 +279,227 @@ class DiaFeriado(models.Model):
         ordering = ['fecha']
         verbose_name = "Día Feriado"
         verbose_name_plural = "Días Feriados"
+
+
+class CalendarioLaboral(models.Model):
+    """
+    Calendario laboral alternativo al general (HorarioLaboral + DiaFeriado),
+    asignable a un Bloque o a un GrupoResolutor.
+    """
+    nombre = models.CharField(max_length=100, unique=True)
+    descripcion = models.CharField(max_length=255, blank=True)
+    usa_feriados_generales = models.BooleanField(
+        default=True, help_text="Suma los DiaFeriado generales a los feriados propios del calendario.")
+
+    def __str__(self):
+        return self.nombre
+
+    class Meta:
+        ordering = ['nombre']
+        verbose_name = "Calendario Laboral"
+        verbose_name_plural = "Calendarios Laborales"
+
+
+class VentanaCalendario(models.Model):
+    """Horario de un día de la semana en un CalendarioLaboral; los días sin ventana no son laborales."""
+    calendario = models.ForeignKey(
+        CalendarioLaboral, on_delete=models.CASCADE, related_name='ventanas')
+    dia_semana = models.IntegerField(choices=HorarioLaboral.DIA_CHOICES)
+    hora_inicio = models.TimeField()
+    hora_fin = models.TimeField()
+
+    def __str__(self):
+        return f"{self.calendario} - {self.get_dia_semana_display()}: {self.hora_inicio.strftime('%H:%M')} - {self.hora_fin.strftime('%H:%M')}"
+
+    class Meta:
+        ordering = ['calendario', 'dia_semana']
+        unique_together = ('calendario', 'dia_semana')
+        verbose_name = "Ventana de Calendario"
+        verbose_name_plural = "Ventanas de Calendario"
+
+
+class FeriadoCalendario(models.Model):
+    calendario = models.ForeignKey(
+        CalendarioLaboral, on_delete=models.CASCADE, related_name='feriados')
+    fecha = models.DateField()
+    descripcion = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return f"{self.calendario} - {self.fecha.strftime('%Y-%m-%d')}"
+
+    class Meta:
+        ordering = ['calendario', 'fecha']
+        unique_together = ('calendario', 'fecha')
+        verbose_name = "Feriado de Calendario"
+        verbose_name_plural = "Feriados de Calendario"
+
+
+class BitacoraParseada(models.Model):
+    """
+    Caché persistente de la bitácora ya parseada de una incidencia.
+    Se reutiliza mientras el hash coincida con el texto actual de la bitácora.
+    """
+    incidencia = models.OneToOneField(
+        Incidencia, on_delete=models.CASCADE, primary_key=True, related_name='bitacora_parseada')
+    hash_bitacora = models.CharField(max_length=64)
+    # Lista de [segundos locales desde 1970-01-01, usuario normalizado, pausa (0/1)].
+    entradas = models.JSONField(default=list)
+    # Usuarios normalizados de las entradas, cada uno entre saltos de línea ("\nana\nluis\n"),
+    # para buscar las bitácoras de un gestor con un contains sobre texto plano.
+    usuarios = models.TextField(blank=True, default='')
+    # Fechas de la primera y última entrada, para saber a qué feriados es sensible.
+    primera_fecha = models.DateField(null=True, blank=True)
+    ultima_fecha = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Bitácora parseada de {self.incidencia_id}"
+
+    class Meta:
+        verbose_name = "Bitácora Parseada"
+        verbose_name_plural = "Bitácoras Parseadas"
+
+
+class IncidenciaSegmento(models.Model):
+    """
+    Segmento de bitácora (entre dos entradas consecutivas) con su resultado
+    en el último cálculo de SLA, para analizar tiempos por gestor o estado
+    directamente en SQL.
+    """
+    class Motivo(models.TextChoices):
+        CUENTA = 'cuenta', 'Se cuenta'
+        NO_GESTOR = 'no_gestor', 'Responde un no gestor'
+        PAUSADO = 'pausado', 'Reloj pausado (Pendiente)'
+
+    incidencia = models.ForeignKey(
+        Incidencia, on_delete=models.CASCADE, related_name='segmentos')
+    orden = models.PositiveIntegerField()
+    inicio = models.DateTimeField()
+    fin = models.DateTimeField()
+    usuario_origen = models.CharField(max_length=150)
+    usuario_destino = models.CharField(max_length=150)
+    contado = models.BooleanField()
+    motivo = models.CharField(max_length=20, choices=Motivo.choices)
+    # Tiempo laboral del segmento (o corrido si es 24/7), se cuente o no.
+    segundos_efectivos = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.incidencia_id} #{self.orden}: {self.usuario_origen} -> {self.usuario_destino}"
+
+    class Meta:
+        ordering = ['incidencia', 'orden']
+        verbose_name = "Segmento de Incidencia"
+        verbose_name_plural = "Segmentos de Incidencia"
+        indexes = [
+            models.Index(fields=['usuario_destino', 'inicio']),
+            models.Index(fields=['motivo', 'inicio']),
+        ]
+
+
+class VersionSLA(models.Model):
+    """
+    Versión global de los datos de referencia del SLA (reglas, calendario y
+    gestores). Se incrementa cada vez que alguno de ellos cambia.
+    """
+    version = models.PositiveIntegerField(default=0)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Versión SLA {self.version}"
+
+    class Meta:
+        verbose_name = "Versión de SLA"
+        verbose_name_plural = "Versiones de SLA"
+
+
+class TrabajoSLA(models.Model):
+    """
+    Cálculo de SLA encolado para ejecutarse fuera de la petición HTTP.
+    Un worker local lo procesa por bloques y va registrando el avance.
+    Los de tipo vencimientos recalculan solo el vencimiento proyectado de
+    las incidencias abiertas que cumplan alguno de sus 'filtros'.
+    """
+    class Tipo(models.TextChoices):
+        CALCULO = 'calculo', 'Cálculo de SLA'
+        VENCIMIENTOS = 'vencimientos', 'Vencimientos de SLA'
+
+    class Estado(models.TextChoices):
+        PENDIENTE = 'pendiente', 'Pendiente'
+        EN_PROCESO = 'en_proceso', 'En proceso'
+        COMPLETADO = 'completado', 'Completado'
+        ERROR = 'error', 'Error'
+
+    tipo = models.CharField(
+        max_length=20, choices=Tipo.choices, default=Tipo.CALCULO)
+    estado = models.CharField(
+        max_length=20, choices=Estado.choices, default=Estado.PENDIENTE, db_index=True)
+    incidencia_ids = models.JSONField(default=list)
+    # Trabajo de vencimientos: lista de filtros (kwargs de filter()) a revisar uno por uno.
+    # [{}] revisa todas las abiertas; [] no revisa ninguna.
+    filtros = models.JSONField(default=list)
+    total = models.PositiveIntegerField(default=0)
+    procesadas = models.PositiveIntegerField(default=0)
+    # Cantidad de incidencias por resultado de cumple_sla.
+    conteos = models.JSONField(default=dict)
+    mensaje = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    # Último avance registrado por el worker; sin latido reciente el trabajo se da por abandonado.
+    fecha_latido = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Trabajo SLA {self.pk} ({self.get_estado_display()})"
+
+    class Meta:
+        ordering = ['-fecha_creacion']
+        verbose_name = "Trabajo de SLA"
+        verbose_name_plural = "Trabajos de SLA"
+
+
+class TrabajoCarga(models.Model):
+    """
+    Carga masiva (aplicaciones, códigos de cierre o incidencias) encolada para
+    ejecutarse fuera de la petición HTTP. El archivo subido se guarda en disco
+    y un worker local lo procesa por bloques, registrando el avance.
+    """
+    class Tipo(models.TextChoices):
+        APLICACIONES = 'aplicaciones', 'Aplicaciones'
+        CODIGOS_CIERRE = 'codigos_cierre', 'Códigos de cierre'
+        INCIDENCIAS = 'incidencias', 'Incidencias'
+
+    class Estado(models.TextChoices):
+        PENDIENTE = 'pendiente', 'Pendiente'
+        EN_PROCESO = 'en_proceso', 'En proceso'
+        COMPLETADO = 'completado', 'Completado'
+        ERROR = 'error', 'Error'
+
+    tipo = models.CharField(max_length=20, choices=Tipo.choices)
+    estado = models.CharField(
+        max_length=20, choices=Estado.choices, default=Estado.PENDIENTE, db_index=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='trabajos_carga')
+    nombre_archivo = models.CharField(max_length=255)
+    # Rutas en settings.CARGA_MASIVA_DIR del archivo subido y del CSV de filas con error.
+    ruta_archivo = models.CharField(max_length=500)
+    ruta_errores = models.CharField(max_length=500, blank=True)
+    procesadas = models.PositiveIntegerField(default=0)
+    creadas = models.PositiveIntegerField(default=0)
+    actualizadas = models.PositiveIntegerField(default=0)
+    omitidas = models.PositiveIntegerField(default=0)
+    fallidas = models.PositiveIntegerField(default=0)
+    # Filas omitidas por motivo (p. ej. ya existentes).
+    detalle = models.JSONField(default=dict)
+    mensaje = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    # Último bloque guardado por el worker; sin latido reciente la carga se da por abandonada.
+    fecha_latido = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Carga de {self.get_tipo_display().lower()} {self.pk} ({self.get_estado_display()})"
+
+    class Meta:
+        ordering = ['-fecha_creacion']
+        verbose_name = "Trabajo de carga masiva"
+        verbose_name_plural = "Trabajos de carga masiva"
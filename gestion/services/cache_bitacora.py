@@ -0,0 +1,95 @@
+# gestion/services/cache_bitacora.py
+
+import hashlib
+from datetime import datetime, timedelta
+
+from .motor_sla import normalizar_texto, parsear_bitacora
+
+_EPOCA = datetime(1970, 1, 1)
+
+
+def hash_bitacora(texto):
+    """Hash del contenido de la bitácora con el que se valida la caché."""
+    return hashlib.sha256((texto or "").encode('utf-8')).hexdigest()
+
+
+def compactar_entradas(entries):
+    """
+    Reduce las entradas de parsear_bitacora a [segundos locales, usuario, pausa].
+
+    Los segundos se cuentan desde 1970-01-01 en hora local (reloj de pared),
+    que es lo que usa el cálculo de tiempo efectivo.
+    """
+    return [[segundos_locales(e["fecha_hora"]), e["usuario"],
+             int('pendiente' in normalizar_texto(e["mensaje"]))]
+            for e in entries]
+
+
+def instante_local(segundos):
+    """Convierte los segundos locales de una entrada compacta a datetime (naive)."""
+    return _EPOCA + timedelta(seconds=segundos)
+
+
+def segundos_locales(instante):
+    """Inversa de instante_local: segundos desde 1970-01-01 del reloj local de 'instante'."""
+    return (instante.replace(tzinfo=None) - _EPOCA) // timedelta(seconds=1)
+
+
+def parsear_compacto(bitacora_texto, incidencia_id="N/A"):
+    return compactar_entradas(parsear_bitacora(bitacora_texto, incidencia_id))
+
+
+def rango_fechas(entradas):
+    """(primera fecha, última fecha) cubiertas por las entradas compactas."""
+    if not entradas:
+        return None, None
+    return instante_local(entradas[0][0]).date(), instante_local(entradas[-1][0]).date()
+
+
+def usuarios_entradas(entradas):
+    """
+    Usuarios de las entradas compactas en el formato de BitacoraParseada.usuarios:
+    cada uno entre saltos de línea, sin repetir ("" si no hay entradas).
+    """
+    usuarios = sorted({e[1] for e in entradas})
+    return "\n" + "\n".join(usuarios) + "\n" if usuarios else ""
+
+
+def obtener_entradas(incidencias):
+    """
+    Devuelve {incidencia_id: entradas compactas} reutilizando BitacoraParseada
+    cuando el hash coincide con la bitácora actual. Solo se reparsean (y se
+    guardan) las bitácoras nuevas o modificadas.
+    """
+    from ..models import BitacoraParseada
+
+    hashes = {inc.id: hash_bitacora(inc.bitacora) for inc in incidencias}
+    cacheadas = {b.incidencia_id: b for b in BitacoraParseada.objects.filter(
+        incidencia_id__in=list(hashes))}
+
+    entradas, nuevas, modificadas = {}, [], []
+    for inc in incidencias:
+        cacheada = cacheadas.get(inc.id)
+        if cacheada is not None and cacheada.hash_bitacora == hashes[inc.id]:
+            entradas[inc.id] = cacheada.entradas
+            continue
+        compactas = parsear_compacto(inc.bitacora, inc.id)
+        entradas[inc.id] = compactas
+        primera_fecha, ultima_fecha = rango_fechas(compactas)
+        if cacheada is None:
+            nuevas.append(BitacoraParseada(
+                incidencia_id=inc.id, hash_bitacora=hashes[inc.id], entradas=compactas,
+                usuarios=usuarios_entradas(compactas), primera_fecha=primera_fecha, ultima_fecha=ultima_fecha))
+        else:
+            cacheada.hash_bitacora, cacheada.entradas = hashes[inc.id], compactas
+            cacheada.usuarios = usuarios_entradas(compactas)
+            cacheada.primera_fecha, cacheada.ultima_fecha = primera_fecha, ultima_fecha
+            modificadas.append(cacheada)
+
+    if nuevas:
+        BitacoraParseada.objects.bulk_create(
+            nuevas, batch_size=500, ignore_conflicts=True)
+    if modificadas:
+        BitacoraParseada.objects.bulk_update(
+            modificadas, ['hash_bitacora', 'entradas', 'usuarios', 'primera_fecha', 'ultima_fecha'], batch_size=500)
+    return entradas
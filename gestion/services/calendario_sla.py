@@ -0,0 +1,219 @@
+# gestion/services/calendario_sla.py
+
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+
+_UN_DIA = timedelta(days=1)
+_UN_MICROSEGUNDO = timedelta(microseconds=1)
+
+
+def _segundos_techo(td):
+    """Redondea un timedelta hacia arriba a segundos enteros."""
+    return -((-(td // _UN_MICROSEGUNDO)) // 1_000_000)
+
+
+def _segundos_piso(td):
+    """Redondea un timedelta hacia abajo a segundos enteros."""
+    return (td // _UN_MICROSEGUNDO) // 1_000_000
+
+
+def _a_reloj_local(start_dt, end_dt):
+    """
+    Devuelve ambas fechas como "naive" en la zona de start_dt.
+
+    El cálculo histórico sumaba timedelta a un datetime "aware", lo que en
+    Python es aritmética de reloj de pared en la zona de start_dt.
+    """
+    if start_dt.tzinfo is not end_dt.tzinfo and start_dt.tzinfo is not None and end_dt.tzinfo is not None:
+        end_dt = end_dt.astimezone(start_dt.tzinfo)
+    return start_dt.replace(tzinfo=None), end_dt.replace(tzinfo=None)
+
+
+def contar_segundos_laborales(start_dt, end_dt, horario_laboral, dias_feriados):
+    """
+    Cuenta los segundos laborales entre dos fechas recortando cada día
+    calendario a su ventana de HorarioLaboral, en lugar de recorrer el
+    intervalo segundo a segundo.
+
+    Reproduce exactamente el recorrido original: se cuentan los "ticks"
+    start_dt + k segundos (k >= 0) que son anteriores a end_dt y cuya hora
+    cae en [hora_inicio, hora_fin], ambos extremos incluidos.
+    """
+    inicio, fin = _a_reloj_local(start_dt, end_dt)
+
+    total_ticks = _segundos_techo(fin - inicio)
+    if total_ticks <= 0:
+        return 0
+
+    ultimo_tick = inicio + timedelta(seconds=total_ticks - 1)
+    segundos = 0
+    dia = inicio.date()
+    while dia <= ultimo_tick.date():
+        horario_dia = horario_laboral.get(dia.weekday())
+        if dia not in dias_feriados and horario_dia and horario_dia[0] and horario_dia[1]:
+            hora_inicio, hora_fin = horario_dia
+            primer_k = max(0, _segundos_techo(
+                datetime.combine(dia, hora_inicio) - inicio))
+            ultimo_k = min(total_ticks - 1, _segundos_piso(
+                datetime.combine(dia, hora_fin) - inicio))
+            if ultimo_k >= primer_k:
+                segundos += ultimo_k - primer_k + 1
+        dia += _UN_DIA
+    return segundos
+
+
+class WorkingCalendar:
+    """
+    Índice precalculado del calendario laboral (HorarioLaboral + DiaFeriado).
+
+    Para cada día del rango guarda el segundo del día en que abre la ventana
+    laboral y los segundos laborales acumulados hasta ese día. Así, los
+    segundos laborales entre dos instantes son una resta de dos acumulados,
+    sin recorrer los días intermedios. Fuera del rango cubierto (o con
+    instantes con microsegundos) se recurre a contar_segundos_laborales.
+    """
+
+    def __init__(self, horarios, feriados, desde, hasta):
+        self.horarios = dict(horarios)
+        self.feriados = frozenset(feriados)
+        self.desde = desde
+        self.hasta = hasta
+
+        # Ventana de cada día de la semana: (segundo de apertura, segundos laborales).
+        ventanas = {}
+        for dia_semana in range(7):
+            horario_dia = self.horarios.get(dia_semana)
+            if not horario_dia or not horario_dia[0] or not horario_dia[1]:
+                ventanas[dia_semana] = (0, 0)
+                continue
+            hora_inicio, hora_fin = horario_dia
+            apertura = _segundos_techo(datetime.combine(
+                date.min, hora_inicio) - datetime.min)
+            cierre = _segundos_piso(datetime.combine(
+                date.min, hora_fin) - datetime.min)
+            ventanas[dia_semana] = (apertura, max(0, cierre - apertura + 1))
+
+        self._base = desde.toordinal()
+        total_dias = hasta.toordinal() - self._base + 1
+        self._apertura = array('l', [0]) * total_dias
+        self._acumulado = array('q', [0]) * (total_dias + 1)
+        acumulado = 0
+        dia = desde
+        for i in range(total_dias):
+            apertura, largo = ventanas[dia.weekday()]
+            if dia in self.feriados:
+                largo = 0
+            self._apertura[i] = apertura
+            acumulado += largo
+            self._acumulado[i + 1] = acumulado
+            dia += _UN_DIA
+
+    def _segundos_previos(self, instante):
+        """Segundos laborales del rango anteriores a 'instante' (naive, sin microsegundos)."""
+        i = instante.toordinal() - self._base
+        segundo_dia = instante.hour * 3600 + instante.minute * 60 + instante.second
+        largo = self._acumulado[i + 1] - self._acumulado[i]
+        dentro = segundo_dia - self._apertura[i]
+        return self._acumulado[i] + (0 if dentro <= 0 else min(dentro, largo))
+
+    def indice(self):
+        """Devuelve (ordinal del primer día, aperturas, acumulados) para evaluaciones vectorizadas."""
+        return self._base, self._apertura, self._acumulado
+
+    def cubre(self, instante):
+        return self.desde <= instante.date() <= self.hasta
+
+    def segundos_laborales(self, start_dt, end_dt):
+        """Segundos laborales entre dos instantes, con la misma semántica que calcular_tiempo_efectivo."""
+        if start_dt >= end_dt:
+            return 0
+        inicio, fin = _a_reloj_local(start_dt, end_dt)
+        if (inicio.microsecond or fin.microsecond or not self.cubre(inicio)
+                or fin.date() > self.hasta):
+            return contar_segundos_laborales(start_dt, end_dt, self.horarios, self.feriados)
+        if fin <= inicio:
+            return 0
+        return self._segundos_previos(fin) - self._segundos_previos(inicio)
+
+    def sumar_segundos_laborales(self, inicio, segundos):
+        """
+        Primer instante (naive, reloj local) en que se acumulan 'segundos'
+        laborales contados desde 'inicio' (naive, sin microsegundos). Es la
+        operación inversa de segundos_laborales.
+        """
+        if segundos <= 0:
+            return inicio
+        if self.cubre(inicio):
+            objetivo = self._segundos_previos(inicio) + segundos
+            if objetivo <= self._acumulado[-1]:
+                dia = bisect_left(self._acumulado, objetivo) - 1
+                segundo_dia = self._apertura[dia] + objetivo - self._acumulado[dia]
+                return datetime.combine(date.fromordinal(self._base + dia), datetime.min.time()) + timedelta(seconds=segundo_dia)
+        return self._sumar_por_dias(inicio, segundos)
+
+    def _sumar_por_dias(self, inicio, segundos, max_dias=3660):
+        """Versión día a día de sumar_segundos_laborales para fechas fuera del índice."""
+        restante = segundos
+        dia = inicio.date()
+        for _ in range(max_dias):
+            horario_dia = self.horarios.get(dia.weekday())
+            if dia not in self.feriados and horario_dia and horario_dia[0] and horario_dia[1]:
+                medianoche = datetime.combine(dia, datetime.min.time())
+                apertura = medianoche + timedelta(seconds=_segundos_techo(
+                    datetime.combine(dia, horario_dia[0]) - medianoche))
+                cierre = medianoche + timedelta(seconds=_segundos_piso(
+                    datetime.combine(dia, horario_dia[1]) - medianoche) + 1)
+                desde = max(apertura, inicio)
+                disponible = _segundos_piso(cierre - desde) if cierre > desde else 0
+                if restante <= disponible:
+                    return desde + timedelta(seconds=restante)
+                restante -= disponible
+            dia += _UN_DIA
+        return None
+
+
+def _rango_configurado():
+    hoy = date.today()
+    anios_atras = getattr(settings, 'SLA_CALENDARIO_ANIOS_ATRAS', 5)
+    anios_adelante = getattr(settings, 'SLA_CALENDARIO_ANIOS_ADELANTE', 1)
+    return date(hoy.year - anios_atras, 1, 1), date(hoy.year + anios_adelante, 12, 31)
+
+
+def construir_calendario(desde=None, hasta=None):
+    """Construye un WorkingCalendar desde las tablas HorarioLaboral y DiaFeriado."""
+    from ..models import DiaFeriado, HorarioLaboral
+
+    rango_desde, rango_hasta = _rango_configurado()
+    horarios = {h.dia_semana: (h.hora_inicio, h.hora_fin)
+                for h in HorarioLaboral.objects.all()}
+    feriados = set(DiaFeriado.objects.values_list('fecha', flat=True))
+    return WorkingCalendar(horarios, feriados, desde or rango_desde, hasta or rango_hasta)
+
+
+def construir_calendarios(general):
+    """
+    Compila cada CalendarioLaboral en un WorkingCalendar con el mismo rango
+    que el calendario 'general'. Devuelve {id de CalendarioLaboral: WorkingCalendar}.
+    """
+    from ..models import CalendarioLaboral
+
+    calendarios = {}
+    for calendario in CalendarioLaboral.objects.prefetch_related('ventanas', 'feriados'):
+        horarios = {v.dia_semana: (v.hora_inicio, v.hora_fin)
+                    for v in calendario.ventanas.all()}
+        feriados = {f.fecha for f in calendario.feriados.all()}
+        if calendario.usa_feriados_generales:
+            feriados |= general.feriados
+        calendarios[calendario.id] = WorkingCalendar(
+            horarios, feriados, general.desde, general.hasta)
+    return calendarios
+
+
+def obtener_calendario():
+    """Devuelve el WorkingCalendar del contexto de SLA vigente (ver contexto_sla)."""
+    from .contexto_sla import obtener_contexto_sla
+
+    return obtener_contexto_sla().calendario
@@ -0,0 +1,662 @@
+# gestion/services/cargas_masivas.py
+
+import csv
+import logging
+import uuid
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from unidecode import unidecode
+
+from .lectura_carga import bloques_tabla, codificacion_csv, filas_csv
+from .trabajos import lanzar_en_hilos, recuperar_abandonados, tomar_trabajo
+from .vencimiento_sla import actualizar_vencimientos
+
+logger = logging.getLogger(__name__)
+
+
+class CargaRechazada(Exception):
+    """El archivo no se puede procesar; 'errores' son las filas que lo explican."""
+
+    def __init__(self, mensaje, errores=()):
+        super().__init__(mensaje)
+        self.errores = list(errores)
+
+
+def _directorio():
+    directorio = Path(getattr(settings, 'CARGA_MASIVA_DIR', settings.BASE_DIR / 'cargas'))
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+
+def _lote():
+    return getattr(settings, 'CARGA_MASIVA_LOTE', 2000)
+
+
+def crear_trabajo_carga(tipo, archivo, usuario=None):
+    """
+    Guarda en disco (settings.CARGA_MASIVA_DIR) el archivo subido, por partes,
+    y registra el TrabajoCarga que lo procesará.
+    """
+    from ..models import TrabajoCarga
+
+    ruta = _directorio() / f"{uuid.uuid4().hex}{Path(archivo.name).suffix.lower()}"
+    with open(ruta, 'wb') as destino:
+        for parte in archivo.chunks():
+            destino.write(parte)
+    return TrabajoCarga.objects.create(
+        tipo=tipo, usuario=usuario if usuario and usuario.is_authenticated else None,
+        nombre_archivo=archivo.name, ruta_archivo=str(ruta))
+
+
+# --- Aplicaciones y códigos de cierre (CSV con ';') ---
+
+def _validar_duplicados(archivo, codificacion, columnas, mensaje):
+    """Primera pasada: rechaza el archivo si repite la clave compuesta 'columnas'."""
+    seen_keys = set()
+    duplicates_found = []
+    for line_number, row in enumerate(filas_csv(archivo, codificacion), start=2):
+        id_val = (row.get(columnas[0]) or '').strip()
+        cod_val = (row.get(columnas[1]) or '').strip()
+        if not id_val or not cod_val:
+            continue  # No se puede validar una clave incompleta
+
+        composite_key = (id_val, cod_val)
+        if composite_key in seen_keys:
+            duplicates_found.append({
+                'line': line_number,
+                'row_data': ';'.join((row.get(c) or '') for c in columnas),
+                'error': f"Combinación de '{columnas[0]}' y '{columnas[1]}' duplicada."
+            })
+        else:
+            seen_keys.add(composite_key)
+    if duplicates_found:
+        raise CargaRechazada(mensaje, duplicates_found)
+
+
+def _cargar_filas_csv(archivo, columnas_clave, mensaje_duplicados, guardar_fila):
+    """
+    Valida duplicados y luego aplica 'guardar_fila(row)' (devuelve True si
+    creó el registro) a cada fila, por bloques de settings.CARGA_MASIVA_LOTE.
+    Entrega (conteos, filas fallidas) por bloque.
+    """
+    codificacion = codificacion_csv(archivo)
+    _validar_duplicados(archivo, codificacion, columnas_clave, mensaje_duplicados)
+
+    filas = enumerate(filas_csv(archivo, codificacion), start=2)
+    while True:
+        bloque = list(islice(filas, _lote()))
+        if not bloque:
+            return
+        conteos, failed_rows = Counter(procesadas=len(bloque)), []
+        for line_number, row in bloque:
+            if not any((field or '').strip() for field in row.values()):
+                conteos['omitidas'] += 1
+                conteos['vacias'] += 1
+                continue
+            try:
+                # Cada fila en su propio savepoint: un error no anula el bloque.
+                with transaction.atomic():
+                    creada = guardar_fila(row)
+                conteos['creadas' if creada else 'actualizadas'] += 1
+            except Exception as e:
+                failed_rows.append({
+                    'line': line_number,
+                    'row_data': ';'.join(v if isinstance(v, str) else '' for v in row.values()),
+                    'error': str(e)
+                })
+        yield conteos, failed_rows
+
+
+_CRITICIDAD_MAP = {
+    'alta': 'critica', 'critica': 'critica', 'crítica': 'critica', 'media': 'no critica',
+    'no critica': 'no critica', 'baja': 'sin criticidad', 'sin criticidad': 'sin criticidad',
+    'no crítica': 'no critica',
+}
+_ESTADO_MAP = {
+    'dev': 'Construccion', 'construccion': 'Construccion', 'en construcción': 'Construccion', 'prod': 'Produccion',
+    'produccion': 'Produccion', 'en producción': 'Produccion', 'en revisión': 'Pendiente', 'desuso': 'Deshuso',
+    'pendiente': 'Pendiente', 'resuelto': 'Resuelto', 'cerrado': 'Cerrado',
+}
+_BLOQUE_MAP = {
+    'b1': 'BLOQUE 1', 'bloque 1': 'BLOQUE 1', 'b2': 'BLOQUE 2', 'bloque 2': 'BLOQUE 2',
+    'b3': 'BLOQUE 3', 'bloque 3': 'BLOQUE 3', 'b4': 'BLOQUE 4', 'bloque 4': 'BLOQUE 4',
+    'ninguno': 'Sin bloque', 'sin bloque': 'Sin bloque',
+}
+
+
+def _guardar_aplicacion(row):
+    from ..models import Aplicacion, Bloque, Criticidad, Estado
+
+    id_aplicacion_str = row.get('id_aplicacion', '').strip()
+    if not id_aplicacion_str:
+        raise ValueError(
+            "La columna 'id_aplicacion' es obligatoria.")
+    id_aplicacion_pk = int(id_aplicacion_str)
+
+    cod_aplicacion = row.get('id_modulo', '').strip()
+    nombre_aplicacion = row.get('nombre_app', '').strip()
+    if not cod_aplicacion or not nombre_aplicacion:
+        raise ValueError(
+            "Las columnas 'id_modulo' y 'nombre_app' son obligatorias.")
+
+    criticidad_str = _CRITICIDAD_MAP.get(
+        row.get('criticidad', '').strip().lower(), row.get('criticidad', '').strip())
+    estado_str = _ESTADO_MAP.get(
+        row.get('estado', '').strip().lower(), row.get('estado', '').strip())
+    bloque_str = _BLOQUE_MAP.get(
+        row.get('bloque', '').strip().lower(), row.get('bloque', '').strip())
+
+    bloque_obj = Bloque.objects.get(
+        desc_bloque__iexact=bloque_str) if bloque_str else None
+    criticidad_obj = Criticidad.objects.get(
+        desc_criticidad__iexact=criticidad_str) if criticidad_str else None
+    estado_obj = Estado.objects.get(
+        desc_estado__iexact=estado_str) if estado_str else None
+
+    _, created = Aplicacion.objects.update_or_create(
+        id=id_aplicacion_pk,
+        defaults={
+            'cod_aplicacion': cod_aplicacion,
+            'nombre_aplicacion': nombre_aplicacion,
+            'bloque': bloque_obj,
+            'criticidad': criticidad_obj,
+            'estado': estado_obj,
+            'desc_aplicacion': row.get('descripcion', '').strip()
+        }
+    )
+    return created
+
+
+def _guardar_codigo_cierre(row):
+    from ..models import Aplicacion, CodigoCierre
+
+    id_cod_cierre_str = row.get('idCodCierre', '').strip()
+    if not id_cod_cierre_str:
+        raise ValueError(
+            "La columna 'idCodCierre' es obligatoria.")
+    id_cod_cierre_pk = int(id_cod_cierre_str)
+
+    cod_cierre = row.get('cod_cierre', '').strip()
+    id_aplicacion = row.get('id_aplicacion', '').strip()
+    if not all([cod_cierre, id_aplicacion]):
+        raise ValueError(
+            "Las columnas 'cod_cierre' y 'id_aplicacion' son obligatorias.")
+
+    aplicacion_obj = Aplicacion.objects.get(pk=id_aplicacion)
+
+    _, created = CodigoCierre.objects.update_or_create(
+        id=id_cod_cierre_pk,
+        defaults={
+            'cod_cierre': cod_cierre,
+            'aplicacion': aplicacion_obj,
+            'desc_cod_cierre': row.get('descripcion_cierre', '').strip(),
+            'causa_cierre': row.get('causa_cierre', '').strip()
+        }
+    )
+    return created
+
+
+def _cargar_aplicaciones(archivo):
+    return _cargar_filas_csv(
+        archivo, ('id_aplicacion', 'id_modulo'),
+        "El archivo contiene combinaciones de 'id_aplicacion' y 'id_modulo' duplicadas y no pudo ser procesado.",
+        _guardar_aplicacion)
+
+
+def _cargar_codigos_cierre(archivo):
+    return _cargar_filas_csv(
+        archivo, ('idCodCierre', 'cod_cierre'),
+        "El archivo contiene combinaciones de 'idCodCierre' y 'cod_cierre' duplicadas y no pudo ser procesado.",
+        _guardar_codigo_cierre)
+
+
+# --- Incidencias (CSV o XLSX) ---
+
+def normalize_text(text):
+    """Convierte texto a minúsculas y quita acentos."""
+    if text is None:
+        return ""
+    return unidecode(str(text)).lower().strip()
+
+
+# Marca de un código de cierre que, sin distinguir mayúsculas, coincide con más de un registro.
+_CODIGO_AMBIGUO = object()
+
+
+def _indice_codigos_cierre():
+    """
+    Índices de códigos de cierre para la carga masiva, con una sola consulta.
+    Devuelve ({(aplicacion_id, código): CodigoCierre}, {código: CodigoCierre}),
+    con el código en minúsculas (la comparación de cod_cierre__iexact) y
+    _CODIGO_AMBIGUO donde varios registros comparten la misma clave.
+    """
+    from ..models import CodigoCierre
+
+    por_aplicacion, por_codigo = {}, {}
+    for codigo in CodigoCierre.objects.select_related('aplicacion'):
+        clave = codigo.cod_cierre.lower()
+        for indice, llave in ((por_aplicacion, (codigo.aplicacion_id, clave)), (por_codigo, clave)):
+            indice[llave] = _CODIGO_AMBIGUO if llave in indice else codigo
+    return por_aplicacion, por_codigo
+
+
+# Columnas del archivo que usa la carga masiva de incidencias.
+_COLUMNAS_CARGA_INCIDENCIA = (
+    'incidencia', 'descripcion_incidencia', 'fecha_apertura', 'fecha_ultima_resolucion',
+    'causa', 'bitacora', 'tec_analisis', 'correccion', 'solucion_final', 'observaciones',
+    'demanadas', 'aplicacion_id', 'bloque_id', 'cluster_id', 'codigo_cierre_id',
+    'estado_id', 'severidad_id', 'workaround', 'usuario_asignado_id',
+)
+# Columna de texto del archivo -> campo de Incidencia.
+_CAMPOS_TEXTO_INCIDENCIA = {
+    'descripcion_incidencia': 'descripcion_incidencia', 'causa': 'causa', 'bitacora': 'bitacora',
+    'tec_analisis': 'tec_analisis', 'correccion': 'correccion', 'solucion_final': 'solucion_final',
+    'observaciones': 'observaciones', 'demanadas': 'demandas',
+}
+_FORMATO_FECHA_CARGA = '%d-%m-%Y %H:%M:%S'
+
+
+def _como_objetos(serie):
+    """Columna de objetos con None (y no NaN) donde falta el valor."""
+    return serie.astype(object).where(serie.notna(), None)
+
+
+def _normalizar_columna(serie):
+    """normalize_text sobre una columna, calculado una sola vez por valor distinto."""
+    unicos = serie.unique()
+    return serie.map(dict(zip(unicos, map(normalize_text, unicos))))
+
+
+def _mapear(serie, catalogo):
+    """Series.map contra un catálogo, con None donde no hay coincidencia."""
+    return _como_objetos(serie.map(catalogo))
+
+
+def _leer_fechas(serie, zona):
+    """
+    Convierte una columna con fechas DD-MM-AAAA HH:MM:SS en datetimes "aware"
+    de 'zona' (None si la celda está vacía). Devuelve (fechas, máscara de las
+    celdas con una fecha inválida).
+    """
+    fechas = pd.to_datetime(serie, format=_FORMATO_FECHA_CARGA, errors='coerce')
+    invalidas = (serie != '') & fechas.isna()
+    # Horas repetidas al atrasar el reloj: primera ocurrencia, como timezone.make_aware.
+    locales = fechas.dt.tz_localize(
+        zona, ambiguous=np.ones(len(fechas), dtype=bool), nonexistent='NaT')
+    resultado = _como_objetos(pd.Series(locales.dt.to_pydatetime(), index=serie.index, dtype=object))
+    # Horas inexistentes (al adelantar el reloj): se resuelven una a una con make_aware.
+    for posicion in fechas.index[fechas.notna() & locales.isna()]:
+        resultado[posicion] = timezone.make_aware(fechas[posicion].to_pydatetime(), zona)
+    return resultado, invalidas
+
+
+def _preparar_incidencias(df, catalogos, zona):
+    """
+    Etapa columnar de la carga masiva: limpia y normaliza columnas completas,
+    resuelve los catálogos con Series.map, lee las fechas con pd.to_datetime
+    y marca con máscaras las filas que se omiten o tienen errores.
+
+    Devuelve (DataFrame con los campos de Incidencia de las filas a crear,
+    indexado por la posición de la fila en 'df'; [(posición, error)];
+    {motivo: filas omitidas}).
+    """
+    df = df.reset_index(drop=True).apply(lambda columna: columna.str.strip())
+    vacio = pd.Series(None, index=df.index, dtype=object)
+
+    incidencia = df['incidencia']
+    valida = (incidencia != '') & incidencia.str.upper().str.startswith('INC')
+
+    # Aplicación y código de cierre, con las mismas reglas que la carga fila a fila.
+    app_val, cc_val = df['aplicacion_id'], df['codigo_cierre_id']
+    cc_clave = cc_val.str.lower()
+    app_norm = _normalizar_columna(app_val)
+    aplicacion = _mapear(app_norm, catalogos['aplicacion'])
+    aplicacion_id = _mapear(app_norm, {k: a.id for k, a in catalogos['aplicacion'].items()})
+    cc_par = _mapear(pd.Series(list(zip(aplicacion_id, cc_clave)), index=df.index),
+                     catalogos['codigo_cierre'])
+    cc_codigo = _mapear(cc_clave, catalogos['codigo_cierre_por_codigo'])
+    par_valido = cc_par.notna() & (cc_par != _CODIGO_AMBIGUO)
+    codigo_valido = cc_codigo.notna() & (cc_codigo != _CODIGO_AMBIGUO)
+
+    ambos = (app_val != '') & (cc_val != '')
+    solo_app = (app_val != '') & (cc_val == '')
+    # Un código que corresponde a varias aplicaciones no se asigna.
+    solo_cc = (app_val == '') & (cc_val != '') & codigo_valido
+    codigo_cierre = vacio.mask(ambos & par_valido, cc_par).mask(solo_cc, cc_codigo)
+    aplicacion = vacio.mask(ambos & par_valido, aplicacion).mask(solo_app, aplicacion).mask(
+        solo_cc, cc_codigo.where(solo_cc).map(lambda c: c.aplicacion, na_action='ignore'))
+
+    error_cc = valida & ambos & (cc_par == _CODIGO_AMBIGUO)
+    bloque_val = _normalizar_columna(df['bloque_id'])
+    indra_d = valida & ~error_cc & (bloque_val == 'indra_d')
+    fecha_apertura, apertura_invalida = _leer_fechas(df['fecha_apertura'], zona)
+    fecha_resolucion, resolucion_invalida = _leer_fechas(df['fecha_ultima_resolucion'], zona)
+    candidata = valida & ~error_cc & ~indra_d
+    error_apertura = candidata & apertura_invalida
+    error_resolucion = candidata & ~apertura_invalida & resolucion_invalida
+
+    errores = [(posicion, f"El código de cierre '{cc_val[posicion]}' coincide con más de un código de la aplicación '{app_val[posicion]}'.")
+               for posicion in df.index[error_cc]]
+    for mascara, columna in ((error_apertura, 'fecha_apertura'), (error_resolucion, 'fecha_ultima_resolucion')):
+        errores += [(posicion, f"La fecha '{df.at[posicion, columna]}' de {columna} no tiene el formato DD-MM-AAAA HH:MM:SS.")
+                    for posicion in df.index[mascara]]
+    errores.sort()
+
+    campos = pd.DataFrame({
+        'incidencia': incidencia,
+        **{campo: df[columna] for columna, campo in _CAMPOS_TEXTO_INCIDENCIA.items()},
+        'fecha_apertura': fecha_apertura,
+        'fecha_ultima_resolucion': fecha_resolucion,
+        'workaround': np.where(df['workaround'].str.lower().str.contains('con wa', regex=False), 'Sí', 'No'),
+        'aplicacion': _como_objetos(aplicacion),
+        'estado': _mapear(_normalizar_columna(df['estado_id']), catalogos['estado']),
+        'severidad': _mapear(_normalizar_columna(df['severidad_id']), catalogos['severidad']),
+        'grupo_resolutor': _mapear(bloque_val, catalogos['grupo_resolutor']),
+        'cluster': _mapear(_normalizar_columna(df['cluster_id']), catalogos['cluster']),
+        'bloque': _mapear(bloque_val, catalogos['bloque']),
+        'codigo_cierre': _como_objetos(codigo_cierre),
+        'usuario_asignado': _mapear(_normalizar_columna(df['usuario_asignado_id']), catalogos['usuario_asignado']),
+    })
+    omitidas = {'sin_ticket': int((~valida).sum()), 'indra_d': int(indra_d.sum())}
+    return campos[candidata & ~error_apertura & ~error_resolucion], errores, omitidas
+
+
+def _fila_fallida(line_number, valores, error):
+    """Entrada del reporte de errores de la carga masiva de incidencias."""
+    return {'line': line_number, 'row_data': ', '.join(map(str, valores)), 'error': str(error)}
+
+
+def _crear_incidencias(nuevas, lote_insercion):
+    """
+    Inserta las incidencias de 'nuevas' [(línea, fila, Incidencia)] con
+    bulk_create. Si el lote falla se reintenta fila a fila, para que solo las
+    filas con error queden en el reporte. Devuelve (creadas, filas fallidas).
+    """
+    from ..models import Incidencia
+
+    if not nuevas:
+        return [], []
+    try:
+        with transaction.atomic():
+            return Incidencia.objects.bulk_create([obj for _, _, obj in nuevas], batch_size=lote_insercion), []
+    except Exception as e:
+        logger.warning(f"Falló la inserción en lote de {len(nuevas)} incidencias, se reintenta fila a fila: {e}")
+
+    creadas, failed_rows = [], []
+    for line_number, valores, obj in nuevas:
+        obj.pk = None
+        try:
+            with transaction.atomic():
+                creadas.extend(Incidencia.objects.bulk_create([obj]))
+        except Exception as e:
+            logger.error(
+                f"Error procesando fila {line_number} (Incidencia: {obj.incidencia}): {e}", exc_info=True)
+            failed_rows.append(_fila_fallida(line_number, valores, e))
+    return creadas, failed_rows
+
+
+def _catalogos_incidencia():
+    """Cachés de búsqueda de la carga de incidencias, construidas una vez por archivo."""
+    from ..models import (Aplicacion, Bloque, Cluster, Estado, GrupoResolutor, Impacto, Interfaz,
+                          Severidad, Usuario)
+
+    aplicacion_cache = {normalize_text(
+        a.cod_aplicacion): a for a in Aplicacion.objects.all()}
+    estado_cache = {normalize_text(
+        e.desc_estado): e for e in Estado.objects.all()}
+    severidad_cache = {normalize_text(
+        s.desc_severidad): s for s in Severidad.objects.all()}
+    cluster_cache = {normalize_text(
+        c.desc_cluster): c for c in Cluster.objects.all()}
+    bloque_cache = {normalize_text(
+        b.desc_bloque): b for b in Bloque.objects.all()}
+    usuario_cache = {normalize_text(
+        u.usuario): u for u in Usuario.objects.all()}
+    grupo_resolutor_cache = {normalize_text(
+        g.desc_grupo_resol): g for g in GrupoResolutor.objects.all()}
+    codigo_cierre_cache, codigo_cierre_por_codigo_cache = _indice_codigos_cierre()
+    try:
+        default_impacto = Impacto.objects.get(desc_impacto__iexact='interno')
+        default_interfaz = Interfaz.objects.get(desc_interfaz__iexact='WEB')
+    except ObjectDoesNotExist as e:
+        raise CargaRechazada(f"Error de Configuración: No se encontró un valor por defecto. Error: {e}")
+
+    return {
+        'aplicacion': aplicacion_cache,
+        'estado': estado_cache,
+        'severidad': severidad_cache,
+        'cluster': cluster_cache,
+        'usuario_asignado': usuario_cache,
+        'codigo_cierre': codigo_cierre_cache,
+        'codigo_cierre_por_codigo': codigo_cierre_por_codigo_cache,
+        # Valor de bloque_id del archivo -> Bloque y grupo resolutor asignados.
+        'bloque': {
+            'indra_b3': bloque_cache.get(normalize_text('bloque 3')),
+            'indra': bloque_cache.get(normalize_text('bloque 4')),
+            'indra_a': bloque_cache.get(normalize_text('bloque 4')),
+        },
+        'grupo_resolutor': {
+            'indra_b3': grupo_resolutor_cache.get(normalize_text('SWF_INDRA_3B')),
+            'indra': grupo_resolutor_cache.get(normalize_text('SWF_INDRA_G3')),
+            'indra_a': grupo_resolutor_cache.get(normalize_text('SWF_INDRA_G3')),
+        },
+        'impacto': default_impacto,
+        'interfaz': default_interfaz,
+    }
+
+
+def _cargar_incidencias(archivo):
+    """
+    Crea las incidencias que no existen (las existentes no se actualizan).
+    Por bloque: etapa columnar (_preparar_incidencias), una consulta IN para
+    los tickets existentes y un bulk_create para las nuevas.
+    """
+    from ..models import Incidencia
+
+    catalogos = _catalogos_incidencia()
+    lote_insercion = getattr(settings, 'CARGA_MASIVA_LOTE_INSERCION', 500)
+    zona = timezone.get_current_timezone()
+    # Tickets ya presentes en la base o creados antes en este archivo.
+    incidencias_conocidas = set()
+    inicio = 0
+
+    for bloque_df in bloques_tabla(archivo, _lote()):
+        faltantes = [c for c in _COLUMNAS_CARGA_INCIDENCIA if c not in bloque_df.columns]
+        if faltantes:
+            raise CargaRechazada(f"Al archivo le faltan las columnas: {', '.join(faltantes)}.")
+
+        valores = bloque_df.to_numpy()
+        campos, errores, omitidas = _preparar_incidencias(bloque_df, catalogos, zona)
+        conteos = Counter(procesadas=len(bloque_df), **omitidas)
+        failed_rows = [_fila_fallida(inicio + posicion + 2, valores[posicion], error)
+                       for posicion, error in errores]
+
+        candidatas = [
+            (inicio + posicion + 2, valores[posicion],
+             Incidencia(impacto=catalogos['impacto'], interfaz=catalogos['interfaz'], **fila))
+            for posicion, fila in zip(campos.index, campos.to_dict('records'))
+        ]
+        incidencias_conocidas.update(Incidencia.objects.filter(
+            incidencia__in={obj.incidencia for _, _, obj in candidatas}
+        ).values_list('incidencia', flat=True))
+        pendientes = [c for c in candidatas if c[2].incidencia not in incidencias_conocidas]
+        conteos['existentes'] += len(candidatas) - len(pendientes)
+        creadas_ids = []
+        while pendientes:
+            # Un ticket repetido en el archivo se crea con su primera fila
+            # válida; las siguientes se informan como ya existentes.
+            nuevas, repetidas, claves = [], [], set()
+            for candidata in pendientes:
+                (repetidas if candidata[2].incidencia in claves else nuevas).append(candidata)
+                claves.add(candidata[2].incidencia)
+
+            creadas, errores_insercion = _crear_incidencias(nuevas, lote_insercion)
+            conteos['creadas'] += len(creadas)
+            failed_rows.extend(errores_insercion)
+            creadas_ids.extend(obj.pk for obj in creadas if obj.pk)
+            incidencias_conocidas.update(obj.incidencia for obj in creadas)
+
+            pendientes = [c for c in repetidas if c[2].incidencia not in incidencias_conocidas]
+            conteos['existentes'] += len(repetidas) - len(pendientes)
+
+        if creadas_ids:
+            # bulk_create no emite post_save: se proyecta aquí el vencimiento de las nuevas.
+            filtro = {'pk__range': (min(creadas_ids), max(creadas_ids))}
+            transaction.on_commit(lambda filtro=filtro: actualizar_vencimientos(filtro))
+        conteos['omitidas'] = conteos['sin_ticket'] + conteos['indra_d'] + conteos['existentes']
+        failed_rows.sort(key=lambda item: item['line'])
+        inicio += len(bloque_df)
+        yield conteos, failed_rows
+
+
+# --- Ejecución de los trabajos ---
+
+_CARGADORES = {
+    'aplicaciones': _cargar_aplicaciones,
+    'codigos_cierre': _cargar_codigos_cierre,
+    'incidencias': _cargar_incidencias,
+}
+_CONTADORES = ('procesadas', 'creadas', 'actualizadas', 'omitidas', 'fallidas')
+# Motivos de omisión que se acumulan en TrabajoCarga.detalle.
+_MOTIVOS_OMISION = ('vacias', 'sin_ticket', 'indra_d', 'existentes')
+
+
+class _ReporteErrores:
+    """CSV de filas con error de un trabajo; el archivo se crea con la primera fila."""
+
+    def __init__(self, trabajo):
+        self.trabajo = trabajo
+        self.archivo = None
+        self.writer = None
+
+    def escribir(self, failed_rows):
+        from ..models import TrabajoCarga
+
+        if not failed_rows:
+            return
+        if self.writer is None:
+            ruta = _directorio() / f"errores_carga_{self.trabajo.pk}.csv"
+            self.archivo = open(ruta, 'w', encoding='utf-8-sig', newline='')
+            self.writer = csv.writer(self.archivo, delimiter=';')
+            self.writer.writerow(['Línea', 'Datos de la Fila', 'Error Detectado'])
+            TrabajoCarga.objects.filter(pk=self.trabajo.pk).update(ruta_errores=str(ruta))
+        self.writer.writerows([item['line'], item['row_data'], item['error']] for item in failed_rows)
+        self.archivo.flush()
+
+    def cerrar(self):
+        if self.archivo:
+            self.archivo.close()
+
+
+def _guardar_avance(trabajo_id, conteos):
+    from ..models import TrabajoCarga
+
+    trabajo = TrabajoCarga.objects.select_for_update().get(pk=trabajo_id)
+    for campo in _CONTADORES:
+        setattr(trabajo, campo, F(campo) + conteos[campo])
+    trabajo.detalle = dict(Counter(trabajo.detalle) + Counter(
+        {motivo: conteos[motivo] for motivo in _MOTIVOS_OMISION}))
+    trabajo.fecha_latido = timezone.now()
+    trabajo.save(update_fields=[*_CONTADORES, 'detalle', 'fecha_latido'])
+
+
+def procesar_trabajo_carga(trabajo_id):
+    """
+    Ejecuta un TrabajoCarga pendiente por bloques de settings.CARGA_MASIVA_LOTE
+    filas. Cada bloque y el avance del trabajo se guardan en una misma
+    transacción; las filas con error se escriben en un CSV descargable.
+    Al terminar se borra el archivo subido. Devuelve False si el trabajo ya
+    lo tomó otro worker.
+    """
+    from ..models import TrabajoCarga
+
+    if not tomar_trabajo(TrabajoCarga, trabajo_id):
+        return False
+
+    trabajo = TrabajoCarga.objects.get(pk=trabajo_id)
+    reporte = _ReporteErrores(trabajo)
+    try:
+        with open(trabajo.ruta_archivo, 'rb') as archivo:
+            bloques = _CARGADORES[trabajo.tipo](archivo)
+            while True:
+                # El bloque se procesa dentro de next(): sus filas y el avance
+                # del trabajo se confirman juntos.
+                with transaction.atomic():
+                    avance = next(bloques, None)
+                    if avance is None:
+                        break
+                    conteos, failed_rows = avance
+                    conteos['fallidas'] = len(failed_rows)
+                    _guardar_avance(trabajo_id, conteos)
+                reporte.escribir(failed_rows)
+
+        TrabajoCarga.objects.filter(pk=trabajo_id).update(
+            estado=TrabajoCarga.Estado.COMPLETADO, fecha_fin=timezone.now())
+    except CargaRechazada as e:
+        logger.error(f"Carga masiva {trabajo_id} rechazada: {e}")
+        reporte.escribir(e.errores)
+        TrabajoCarga.objects.filter(pk=trabajo_id).update(
+            estado=TrabajoCarga.Estado.ERROR, mensaje=str(e), fecha_fin=timezone.now())
+    except Exception as e:
+        logger.error(f"Error en la carga masiva {trabajo_id}: {e}", exc_info=True)
+        TrabajoCarga.objects.filter(pk=trabajo_id).update(
+            estado=TrabajoCarga.Estado.ERROR, mensaje=f'Ocurrió un error al leer o procesar el archivo: {e}',
+            fecha_fin=timezone.now())
+    finally:
+        reporte.cerrar()
+        Path(trabajo.ruta_archivo).unlink(missing_ok=True)
+
+    trabajo.refresh_from_db()
+    logger.info(f"""
+--------------------------------------------------
+RESUMEN DE CARGA MASIVA DE {trabajo.get_tipo_display().upper()}
+Usuario: {trabajo.usuario}
+Archivo: {trabajo.nombre_archivo}
+Estado: {trabajo.get_estado_display()}
+--------------------------------------------------
+Filas procesadas: {trabajo.procesadas}
+Creadas: {trabajo.creadas}
+Actualizadas: {trabajo.actualizadas}
+Omitidas: {trabajo.omitidas} {trabajo.detalle}
+Con errores: {trabajo.fallidas}
+--------------------------------------------------""")
+    return True
+
+
+def recuperar_cargas_abandonadas():
+    """
+    Marca con error las cargas en proceso que no registran avance desde hace
+    settings.CARGA_MASIVA_EXPIRACION segundos (ver
+    trabajos.recuperar_abandonados) y borra su archivo subido. No se
+    reintentan: las filas ya guardadas contarían como existentes y el
+    resumen no coincidiría con el archivo. Devuelve los ids recuperados.
+    """
+    from ..models import TrabajoCarga
+
+    recuperadas = recuperar_abandonados(
+        TrabajoCarga, getattr(settings, 'CARGA_MASIVA_EXPIRACION', 1800), estado=TrabajoCarga.Estado.ERROR,
+        mensaje='La carga se interrumpió antes de terminar; los bloques ya guardados se conservan.',
+        fecha_fin=timezone.now())
+    for ruta in TrabajoCarga.objects.filter(pk__in=recuperadas).values_list('ruta_archivo', flat=True):
+        Path(ruta).unlink(missing_ok=True)
+    return recuperadas
+
+
+def lanzar_trabajo_carga(trabajo):
+    """
+    Inicia la carga en un hilo local si settings.CARGA_MASIVA_EN_HILO lo
+    permite; antes marca con error las cargas que quedaron abandonadas.
+    """
+    if not getattr(settings, 'CARGA_MASIVA_EN_HILO', True):
+        return
+    recuperar_cargas_abandonadas()
+    lanzar_en_hilos(procesar_trabajo_carga, [trabajo.pk], 'carga-masiva')
@@ -0,0 +1,119 @@
+# gestion/services/contexto_sla.py
+
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .calendario_sla import construir_calendario, construir_calendarios
+from .motor_sla import normalizar_texto
+
+_CLAVE_VERSION = 'sla:contexto:version'
+# El número de formato cambia cuando cambian los atributos de ContextoSLA.
+_CLAVE_CONTEXTO = 'sla:contexto:2:{}'
+
+
+class ContextoSLA:
+    """
+    Datos de referencia del cálculo de SLA ya normalizados: gestores,
+    reglas y calendarios laborales. 'calendario' es el general
+    (HorarioLaboral + DiaFeriado); 'calendarios' tiene además cada
+    CalendarioLaboral ya compilado, por id (la clave None es el general).
+    """
+
+    def __init__(self, version, gestores_norm, reglas_sla, calendario, calendarios=None,
+                 calendario_por_grupo=None, calendario_por_bloque=None):
+        self.version = version
+        self.gestores_norm = frozenset(gestores_norm)
+        self.reglas_sla = dict(reglas_sla)
+        self.calendario = calendario
+        self.calendarios = {**(calendarios or {}), None: calendario}
+        self.calendario_por_grupo = dict(calendario_por_grupo or {})
+        self.calendario_por_bloque = dict(calendario_por_bloque or {})
+
+    def calendario_id(self, incidencia):
+        """Id del calendario de la incidencia: el de su grupo resolutor o, si no, el de su bloque (None = general)."""
+        calendario_id = self.calendario_por_grupo.get(incidencia.grupo_resolutor_id)
+        if calendario_id is None:
+            calendario_id = self.calendario_por_bloque.get(incidencia.bloque_id)
+        return calendario_id
+
+    def calendario_de(self, incidencia):
+        return self.calendarios.get(self.calendario_id(incidencia), self.calendario)
+
+    @property
+    def horarios(self):
+        return self.calendario.horarios
+
+    @property
+    def feriados(self):
+        return self.calendario.feriados
+
+
+def construir_contexto_sla(version=None):
+    """
+    Arma un ContextoSLA leyendo Usuario, ReglaSLA, HorarioLaboral, DiaFeriado
+    y los CalendarioLaboral asignados a bloques y grupos resolutores.
+    """
+    from ..models import Bloque, GrupoResolutor, ReglaSLA, Usuario
+
+    gestores_norm = set(normalizar_texto(u)
+                        for u in Usuario.objects.values_list('usuario', flat=True))
+    reglas_sla = {(r.severidad_id, r.criticidad_aplicacion_id): r.tiempo_sla
+                  for r in ReglaSLA.objects.all()}
+    calendario = construir_calendario()
+    return ContextoSLA(
+        version, gestores_norm, reglas_sla, calendario, construir_calendarios(calendario),
+        GrupoResolutor.objects.filter(calendario__isnull=False).values_list('id', 'calendario_id'),
+        Bloque.objects.filter(calendario__isnull=False).values_list('id', 'calendario_id'))
+
+
+# Copia del proceso: evita leer y deserializar el contexto mientras la versión no cambie.
+_contexto_local = None
+_lock = threading.Lock()
+
+
+def _duracion():
+    # Red de seguridad ante cambios hechos fuera del ORM (sin señales).
+    return getattr(settings, 'SLA_CONTEXTO_TIMEOUT', 3600)
+
+
+def _version_vigente():
+    version = cache.get(_CLAVE_VERSION)
+    if version is None:
+        cache.add(_CLAVE_VERSION, uuid.uuid4().hex, _duracion())
+        version = cache.get(_CLAVE_VERSION)
+    return version
+
+
+def obtener_contexto_sla():
+    """
+    Devuelve el ContextoSLA vigente. La versión vive en el caché de Django,
+    así que todos los procesos que comparten el caché ven la invalidación;
+    el contexto se reconstruye una sola vez por versión.
+    """
+    global _contexto_local
+    version = _version_vigente()
+    contexto = _contexto_local
+    if contexto is not None and contexto.version == version:
+        return contexto
+
+    with _lock:
+        if _contexto_local is not None and _contexto_local.version == version:
+            return _contexto_local
+        clave = _CLAVE_CONTEXTO.format(version)
+        contexto = cache.get(clave)
+        if contexto is None:
+            contexto = construir_contexto_sla(version)
+            cache.set(clave, contexto, _duracion())
+        _contexto_local = contexto
+    return contexto
+
+
+def invalidar_contexto_sla():
+    """Publica una versión nueva; cada proceso reconstruye el contexto en su próximo uso."""
+    version_anterior = cache.get(_CLAVE_VERSION)
+    cache.set(_CLAVE_VERSION, uuid.uuid4().hex, _duracion())
+    if version_anterior is not None:
+        cache.delete(_CLAVE_CONTEXTO.format(version_anterior))
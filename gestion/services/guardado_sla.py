@@ -0,0 +1,111 @@
+# gestion/services/guardado_sla.py
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache_bitacora import instante_local
+from .motor_sla import MOTIVO_CUENTA
+from .sla_incremental import CAMPOS_ENTRADA_CALCULO, confirmar_calculo, registrar_entrada_calculo
+
+CAMPOS_RESULTADO_SLA = ['tiempo_sla_calculado', 'cumple_sla', 'vencimiento_sla', *CAMPOS_ENTRADA_CALCULO]
+
+
+def iterar_por_id(queryset, tamano=None, desde_id=0):
+    """
+    Entrega bloques de hasta 'tamano' objetos en orden de id, con una consulta
+    por bloque (id > último id visto). No deja un cursor abierto, así que es
+    seguro guardar cambios en la misma tabla entre bloques (también la caché
+    de BitacoraParseada que escribe obtener_entradas).
+    """
+    tamano = tamano or getattr(settings, 'SLA_CALCULO_BLOQUE', 2000)
+    ultimo_id = desde_id
+    while True:
+        bloque = list(queryset.filter(pk__gt=ultimo_id).order_by('pk')[:tamano])
+        if not bloque:
+            return
+        yield bloque
+        ultimo_id = bloque[-1].pk
+
+
+def iterar_en_orden(queryset, tamano=None):
+    """
+    Como iterar_por_id, pero respeta el orden del queryset (el ordering del
+    modelo si no se indica otro): lee primero solo los ids en ese orden y
+    luego carga cada bloque con su propia consulta, sin cursor abierto.
+    """
+    tamano = tamano or getattr(settings, 'SLA_CALCULO_BLOQUE', 2000)
+    ids = list(queryset.values_list('pk', flat=True))
+    for inicio in range(0, len(ids), tamano):
+        ids_bloque = ids[inicio:inicio + tamano]
+        por_id = queryset.in_bulk(ids_bloque)
+        # Una incidencia borrada entre ambas lecturas simplemente se omite.
+        yield [por_id[pk] for pk in ids_bloque if pk in por_id]
+
+
+def vencimiento_aware(incidencia, vencimiento):
+    """Vencimiento proyectado como datetime "aware"; solo aplica a incidencias abiertas."""
+    if vencimiento is None or incidencia.fecha_ultima_resolucion is not None:
+        return None
+    return timezone.make_aware(instante_local(vencimiento), timezone.get_current_timezone())
+
+
+def aplicar_resultados_sla(incidencias, resultados, version):
+    """Copia los resultados a las incidencias (sin guardar) y devuelve el conteo por cumple_sla."""
+    conteos = Counter()
+    for inc, resultado in zip(incidencias, resultados):
+        inc.tiempo_sla_calculado = resultado.get("tiempo_gestion_calculado")
+        inc.cumple_sla = resultado.get("cumple_sla", "Error")
+        inc.vencimiento_sla = vencimiento_aware(inc, resultado.get("vencimiento_sla"))
+        registrar_entrada_calculo(inc, version)
+        conteos[inc.cumple_sla] += 1
+    return conteos
+
+
+def guardar_segmentos():
+    """Si el cálculo debe pedir y guardar los segmentos (settings.SLA_GUARDAR_SEGMENTOS)."""
+    return getattr(settings, 'SLA_GUARDAR_SEGMENTOS', True)
+
+
+def construir_segmentos(incidencias, resultados):
+    """IncidenciaSegmento (sin guardar) a partir de los "segmentos" de evaluar_lote."""
+    from ..models import IncidenciaSegmento
+
+    zona = timezone.get_current_timezone()
+    segmentos = []
+    for inc, resultado in zip(incidencias, resultados):
+        for orden, (inicio, fin, origen, destino, motivo, segundos) in enumerate(resultado.get("segmentos", ())):
+            segmentos.append(IncidenciaSegmento(
+                incidencia_id=inc.id, orden=orden,
+                inicio=timezone.make_aware(instante_local(inicio), zona),
+                fin=timezone.make_aware(instante_local(fin), zona),
+                usuario_origen=origen[:150], usuario_destino=destino[:150],
+                contado=motivo == MOTIVO_CUENTA, motivo=motivo, segundos_efectivos=max(0, segundos)))
+    return segmentos
+
+
+def guardar_resultados_sla(incidencias, resultados=None, tamano_lote=None):
+    """
+    Guarda los campos de SLA de las incidencias con bulk_update en lotes de
+    settings.SLA_GUARDADO_LOTE, dentro de una única transacción corta. La
+    marca de obsoleto se quita aparte, con confirmar_calculo. Si se entregan
+    los resultados y traen segmentos, reemplaza también los
+    IncidenciaSegmento de esas incidencias.
+    """
+    from ..models import Incidencia, IncidenciaSegmento
+
+    tamano_lote = tamano_lote or getattr(settings, 'SLA_GUARDADO_LOTE', 500)
+    segmentos = None
+    if resultados is not None and guardar_segmentos():
+        segmentos = construir_segmentos(incidencias, resultados)
+    with transaction.atomic():
+        Incidencia.objects.bulk_update(
+            incidencias, CAMPOS_RESULTADO_SLA, batch_size=tamano_lote)
+        confirmar_calculo(incidencias, tamano_lote)
+        if segmentos is not None:
+            IncidenciaSegmento.objects.filter(
+                incidencia_id__in=[inc.id for inc in incidencias]).delete()
+            IncidenciaSegmento.objects.bulk_create(
+                segmentos, batch_size=tamano_lote)
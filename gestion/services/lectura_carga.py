@@ -0,0 +1,102 @@
+# gestion/services/lectura_carga.py
+
+import codecs
+import csv
+import io
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# Bytes leídos por vez al comprobar la codificación de un CSV.
+_BLOQUE_LECTURA = 1024 * 1024
+
+
+def _binario(archivo):
+    """Archivo binario subyacente de un UploadedFile (o el mismo archivo si no lo tiene)."""
+    return getattr(archivo, 'file', archivo)
+
+
+def codificacion_csv(archivo, codificaciones=('utf-8', 'latin-1')):
+    """
+    Primera codificación de 'codificaciones' que decodifica el archivo completo.
+    Lo recorre por bloques con un decodificador incremental, sin cargarlo en memoria.
+    """
+    binario = _binario(archivo)
+    for codificacion in codificaciones[:-1]:
+        decodificador = codecs.getincrementaldecoder(codificacion)()
+        binario.seek(0)
+        try:
+            for bloque in iter(lambda: binario.read(_BLOQUE_LECTURA), b''):
+                decodificador.decode(bloque)
+            decodificador.decode(b'', final=True)
+            return codificacion
+        except UnicodeDecodeError:
+            continue
+    return codificaciones[-1]
+
+
+def filas_csv(archivo, codificacion, delimitador=';'):
+    """
+    Itera las filas de un CSV como dict (csv.DictReader), decodificando el
+    archivo de a poco. Cada llamada vuelve a leer el archivo desde el inicio.
+    """
+    binario = _binario(archivo)
+    binario.seek(0)
+    texto = io.TextIOWrapper(binario, encoding=codificacion, newline='')
+    try:
+        yield from csv.DictReader(texto, delimiter=delimitador)
+    finally:
+        # Se suelta el archivo sin cerrarlo: sigue siendo del llamador.
+        texto.detach()
+
+
+def _celda_texto(valor):
+    """Valor de una celda de openpyxl como texto, igual que pd.read_excel(dtype=str)."""
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _bloques_xlsx(archivo, tamano):
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        cabecera = next(filas, None)
+        if cabecera is None:
+            return
+        columnas = [f'Unnamed: {i}' if nombre is None else str(nombre)
+                    for i, nombre in enumerate(cabecera)]
+        ancho = len(columnas)
+        bloque, vacias = [], 0
+        for fila in filas:
+            valores = [_celda_texto(v) for v in fila[:ancho]]
+            if not any(valores):
+                # Como pd.read_excel, las filas vacías al final de la hoja se descartan.
+                vacias += 1
+                continue
+            for valores_fila in [[''] * ancho] * vacias + [valores + [''] * (ancho - len(valores))]:
+                bloque.append(valores_fila)
+                if len(bloque) == tamano:
+                    yield pd.DataFrame(bloque, columns=columnas, dtype=str)
+                    bloque = []
+            vacias = 0
+        if bloque:
+            yield pd.DataFrame(bloque, columns=columnas, dtype=str)
+    finally:
+        libro.close()
+
+
+def bloques_tabla(archivo, tamano):
+    """
+    Lee un .csv o .xlsx subido en DataFrames de hasta 'tamano' filas, todas
+    las celdas como texto ('' si están vacías). El CSV se lee con chunksize
+    de pandas y el XLSX con openpyxl en modo read_only, así la memoria
+    depende del tamaño del bloque y no del archivo.
+    """
+    if archivo.name.endswith('.csv'):
+        for bloque in pd.read_csv(archivo, keep_default_na=False, dtype=str, chunksize=tamano):
+            yield bloque.fillna('')
+    else:
+        yield from _bloques_xlsx(archivo, tamano)
@@ -0,0 +1,249 @@
+# gestion/services/motor_sla.py
+
+import logging
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from django.utils import timezone
+
+from .calendario_sla import contar_segundos_laborales
+
+logger = logging.getLogger(__name__)
+
+# Motivos de la traza de segmentos (ver calcular_sla_desde_bitacora).
+MOTIVO_CUENTA = "cuenta"
+MOTIVO_NO_GESTOR = "no_gestor"
+MOTIVO_PAUSADO = "pausado"
+
+
+def normalizar_texto(texto):
+    if not isinstance(texto, str):
+        return ""
+    texto = re.sub(r'\s+', ' ', texto).strip().lower()
+    return "".join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
+
+
+# Cabecera de cada entrada: "dd-mm-aaaa hh:mm:ss , usuario , ". El mensaje
+# termina donde una línea siguiente empieza con una fecha (o al final).
+_CABECERA_BITACORA = re.compile(
+    r'(\d{2})[-/](\d{2})[-/](\d{4}) (\d{1,2}):(\d{2}):(\d{2})\s*,\s*([^,]+?)\s*,\s*')
+_FIN_MENSAJE_BITACORA = re.compile(r'\s*[\r\n]+\s*\d{2}[-/]\d{2}[-/]\d{4}')
+
+
+@lru_cache(maxsize=4096)
+def normalizar_usuario(usuario):
+    """normalizar_texto con caché: los usuarios de las bitácoras se repiten mucho."""
+    return normalizar_texto(usuario)
+
+
+def escanear_bitacora(bitacora_texto):
+    """
+    Recorre la bitácora una sola vez y entrega, por cada entrada, la tupla
+    (match de la cabecera, mensaje sin recortar). Equivale al regex histórico
+    con (.*?) perezoso y lookahead, pero sin reexaminar el texto restante.
+    """
+    texto = bitacora_texto.replace('¶', '\n')
+    posicion = 0
+    while True:
+        cabecera = _CABECERA_BITACORA.search(texto, posicion)
+        if cabecera is None:
+            return
+        fin = _FIN_MENSAJE_BITACORA.search(texto, cabecera.end())
+        posicion = fin.start() if fin else len(texto)
+        yield cabecera, texto[cabecera.end():posicion]
+
+
+def fecha_de_cabecera(cabecera):
+    """Fecha (naive) de una cabecera de bitácora; ValueError si no es válida."""
+    dia, mes, anio, hora, minuto, segundo = cabecera.group(1, 2, 3, 4, 5, 6)
+    fecha_str = cabecera.group(0)[:cabecera.end(6) - cabecera.start()]
+    if not fecha_str.isascii():
+        # Dígitos no ASCII: se mantiene la validación de strptime.
+        return datetime.strptime(fecha_str.replace('/', '-'), "%d-%m-%Y %H:%M:%S")
+    return datetime(int(anio), int(mes), int(dia), int(hora), int(minuto), int(segundo))
+
+
+def parsear_bitacora(bitacora_texto, incidencia_id="N/A"):
+    if not bitacora_texto:
+        return []
+    zona = timezone.get_current_timezone()
+    entries = []
+    for cabecera, message in escanear_bitacora(bitacora_texto):
+        try:
+            dt_obj_aware = timezone.make_aware(fecha_de_cabecera(cabecera), zona)
+            entries.append({"fecha_hora": dt_obj_aware, "usuario": normalizar_usuario(
+                cabecera.group(7)), "mensaje": message.strip()})
+        except ValueError:
+            date_str = cabecera.group(0)[:cabecera.end(6) - cabecera.start()]
+            logger.warning(
+                f"Error parseando fecha en bitácora para Incidencia ID {incidencia_id}: '{date_str}'. Ignorando entrada.")
+    entries.sort(key=lambda x: x["fecha_hora"])
+    return entries
+
+
+def is_working_time(dt_obj, horario_laboral, dias_feriados):
+    """
+    Verifica si una fecha y hora específicas caen dentro del horario laboral,
+    excluyendo días feriados.
+    """
+    if dt_obj.date() in dias_feriados:
+        return False
+
+    dia_semana = dt_obj.weekday()
+    horario_dia = horario_laboral.get(dia_semana)
+
+    # CORRECCIÓN: Se verifica no solo si el horario existe, sino también si contiene horas válidas (no None).
+    # Si 'horario_dia' es (None, None), 'horario_dia[0]' será None y la condición será verdadera, retornando False.
+    if not horario_dia or not horario_dia[0]:
+        return False
+
+    hora_inicio, hora_fin = horario_dia
+    return hora_inicio <= dt_obj.time() <= hora_fin
+
+
+def calcular_tiempo_efectivo(start_dt, end_dt, horario_laboral, dias_feriados, es_critica_24_7=False, calendario=None):
+    """
+    Calcula el tiempo transcurrido entre dos fechas, contando solo el tiempo
+    dentro del horario laboral (a menos que sea 24/7), con precisión de segundos.
+    Si se entrega un WorkingCalendar, se usa su índice precalculado.
+    """
+    if start_dt >= end_dt:
+        return timedelta(0)
+
+    # Si la incidencia es crítica, el cálculo es directo y ya tiene precisión de segundos.
+    if es_critica_24_7:
+        return end_dt - start_dt
+
+    if calendario is not None:
+        return timedelta(seconds=calendario.segundos_laborales(start_dt, end_dt))
+
+    # Cálculo por días: O(días) en vez de O(segundos) del recorrido anterior.
+    return timedelta(seconds=contar_segundos_laborales(start_dt, end_dt, horario_laboral, dias_feriados))
+
+
+def _timedelta_to_hms(td):
+    if not td:
+        return "00:00:00"
+    total_seconds = int(td.total_seconds())
+    h, rem = divmod(total_seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+
+def campos_faltantes_sla(incidencia):
+    """Devuelve los datos obligatorios para el SLA que faltan en la incidencia."""
+    campos_faltantes = []
+    if not incidencia.severidad:
+        campos_faltantes.append("Severidad")
+    if not incidencia.aplicacion:
+        campos_faltantes.append("Aplicación")
+    elif not incidencia.aplicacion.criticidad:
+        campos_faltantes.append("Criticidad de la Aplicación")
+    return campos_faltantes
+
+
+def resultado_faltan_datos(incidencia, campos_faltantes):
+    mensaje_error = ", ".join(campos_faltantes)
+    # Solo en DEBUG: en los cálculos masivos basta con el resumen final.
+    logger.debug(
+        f"Cálculo de SLA para Incidencia ID {incidencia.id} ('{incidencia.incidencia}') omitido. Faltan datos: {mensaje_error}.")
+    return {"cumple_sla": "No Calculado (Faltan Datos)"}
+
+
+def es_severidad_24_7(incidencia):
+    return normalizar_texto(incidencia.severidad.desc_severidad) == "critica"
+
+
+def construir_resultado_sla(codigo_incidencia, clave_regla, usuarios, tiempo_gestion_total, es_critica_24_7, gestores_norm, reglas_sla):
+    """
+    Aplica el fallback de 20 minutos y la regla de SLA al tiempo de gestión
+    ya acumulado, y arma el diccionario de resultado (sin el objeto Incidencia).
+    'usuarios' son los usuarios normalizados de la bitácora, en orden.
+    """
+    if tiempo_gestion_total == timedelta(0) and not es_critica_24_7 and usuarios:
+        tiempo_gestion_total = timedelta(minutes=20)
+        logger.debug(
+            f"{codigo_incidencia}: fallback de 20 minutos por tiempo de gestión 0.")
+
+    logger.debug(
+        f"{codigo_incidencia}: tiempo total de gestión {_timedelta_to_hms(tiempo_gestion_total)}")
+
+    tiempo_sla_objetivo = reglas_sla.get(clave_regla)
+    cumple_sla = "SLA No Definido"
+    if tiempo_sla_objetivo:
+        cumple_sla = "Sí" if tiempo_gestion_total <= tiempo_sla_objetivo else "No"
+    elif not usuarios:
+        cumple_sla = "No Calculado (Bitácora Vacía)"
+
+    ultimo_gestor = "N/A"
+    for usuario in reversed(usuarios):
+        if usuario in gestores_norm:
+            ultimo_gestor = usuario
+            break
+
+    return {"tiempo_gestion_calculado": tiempo_gestion_total, "tiempo_gestion_horas": _timedelta_to_hms(tiempo_gestion_total), "sla_objetivo": tiempo_sla_objetivo, "sla_objetivo_horas": _timedelta_to_hms(tiempo_sla_objetivo), "cumple_sla": cumple_sla, "ultimo_gestor": ultimo_gestor}
+
+
+def calcular_sla_desde_bitacora(incidencia, gestores_norm, horarios, feriados, reglas_sla, calendario=None, traza=None):
+    """
+    Calcula el SLA de una incidencia a partir de su bitácora.
+    Si se entrega una lista en 'traza', se le agrega un registro por segmento
+    (ver explicar_sla) en lugar de escribir el análisis en el log.
+    """
+    campos_faltantes = campos_faltantes_sla(incidencia)
+    if campos_faltantes:
+        return resultado_faltan_datos(incidencia, campos_faltantes)
+
+    bitacora_entries = parsear_bitacora(incidencia.bitacora, incidencia.id)
+    es_critica_24_7 = es_severidad_24_7(incidencia)
+    tiempo_gestion_total = timedelta(0)
+
+    for i in range(len(bitacora_entries) - 1):
+        entrada_actual, entrada_siguiente = bitacora_entries[i], bitacora_entries[i+1]
+        es_respuesta_de_gestor = entrada_siguiente['usuario'] in gestores_norm
+        reloj_no_pausado = 'pendiente' not in normalizar_texto(
+            entrada_actual['mensaje'])
+
+        tiempo_segmento = timedelta(0)
+        if es_respuesta_de_gestor and reloj_no_pausado:
+            tiempo_segmento = calcular_tiempo_efectivo(
+                entrada_actual["fecha_hora"], entrada_siguiente["fecha_hora"], horarios, feriados, es_critica_24_7, calendario)
+            tiempo_gestion_total += tiempo_segmento
+
+        if traza is not None:
+            motivo = (MOTIVO_NO_GESTOR if not es_respuesta_de_gestor else
+                      MOTIVO_PAUSADO if not reloj_no_pausado else MOTIVO_CUENTA)
+            traza.append({"desde": entrada_actual["fecha_hora"].isoformat(), "hasta": entrada_siguiente["fecha_hora"].isoformat(),
+                          "de": entrada_actual['usuario'], "a": entrada_siguiente['usuario'],
+                          "motivo": motivo, "segundos": int(tiempo_segmento.total_seconds())})
+
+    clave_regla = (incidencia.severidad.id,
+                   incidencia.aplicacion.criticidad.id)
+    resultado = construir_resultado_sla(
+        incidencia.incidencia, clave_regla, [e["usuario"] for e in bitacora_entries], tiempo_gestion_total, es_critica_24_7, gestores_norm, reglas_sla)
+    return {"incidencia": incidencia, **resultado}
+
+
+def explicar_sla(incidencia, gestores_norm, horarios, feriados, reglas_sla, calendario=None):
+    """
+    Traza estructurada del cálculo de SLA de una incidencia: cada segmento de
+    la bitácora con su motivo (cuenta / no_gestor / pausado) y los segundos
+    sumados, más el resultado final.
+    """
+    segmentos = []
+    resultado = calcular_sla_desde_bitacora(
+        incidencia, gestores_norm, horarios, feriados, reglas_sla, calendario, traza=segmentos)
+    segundos_contados = sum(s["segundos"] for s in segmentos)
+    tiempo_gestion = resultado.get("tiempo_gestion_calculado")
+    return {
+        "incidencia": incidencia.incidencia,
+        "es_critica_24_7": es_severidad_24_7(incidencia) if incidencia.severidad else None,
+        "segmentos": segmentos,
+        "fallback_20_minutos": tiempo_gestion is not None and segundos_contados != int(tiempo_gestion.total_seconds()),
+        "tiempo_gestion": resultado.get("tiempo_gestion_horas"),
+        "sla_objetivo": resultado.get("sla_objetivo_horas"),
+        "ultimo_gestor": resultado.get("ultimo_gestor"),
+        "cumple_sla": resultado.get("cumple_sla"),
+    }
@@ -73,6 +73,8 @@ def cargar_configuracion(ruta_archivo="config.txt"):
         for fecha_str, _ in config['DIAS_FERIADOS'].items():
             config_data["dias_feriados"].append(
                 datetime.strptime(fecha_str, "%Y-%m-%d").date())
+    config_data["horario_compilado"] = compilar_horario(
+        config_data["horario_laboral"], config_data["dias_feriados"])
     if 'DATABASE_CONFIG' in config:
         config_data["db_config"] = {
             "host": config.get('DATABASE_CONFIG', 'DB_HOST'),
@@ -92,51 +94,114 @@ def normalizar_texto(texto):
     return "".join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
 
 
-def is_working_time(dt_obj, horario_laboral, dias_feriados):
-    if dt_obj.date() in dias_feriados:
-        return False, None
-    weekday_map = {0: 'LUNES', 1: 'MARTES', 2: 'MIERCOLES',
-                   3: 'JUEVES', 4: 'VIERNES', 5: 'SABADO', 6: 'DOMINGO'}
-    dia_semana_str = weekday_map.get(dt_obj.weekday())
-    if dia_semana_str not in horario_laboral or horario_laboral[dia_semana_str] is None:
-        return False, None
-    h_inicio, m_inicio, h_fin, m_fin = horario_laboral[dia_semana_str]
-    start_of_day = dt_obj.replace(
-        hour=h_inicio, minute=m_inicio, second=0, microsecond=0)
-    end_of_day = dt_obj.replace(
-        hour=h_fin, minute=m_fin, second=0, microsecond=0)
-    return start_of_day <= dt_obj < end_of_day, (start_of_day, end_of_day)
+_DIAS_SEMANA = ('LUNES', 'MARTES', 'MIERCOLES', 'JUEVES', 'VIERNES', 'SABADO', 'DOMINGO')
+_MINUTO_US = 60 * 1_000_000
 
 
-def calcular_tiempo_efectivo(start_dt, end_dt, horario_laboral, dias_feriados, es_critica_24_7=False):
+def compilar_horario(horario_laboral, dias_feriados):
+    """
+    Resuelve HORARIO_LABORAL y DIAS_FERIADOS una sola vez: ventana laboral
+    [inicio, fin) en segundos del día por día de la semana (0 = lunes) y los
+    feriados como set.
+    """
+    ventanas = {}
+    for dia_semana, nombre_dia in enumerate(_DIAS_SEMANA):
+        horario = horario_laboral.get(nombre_dia)
+        if horario is None:
+            continue
+        h_inicio, m_inicio, h_fin, m_fin = horario
+        inicio, fin = h_inicio * 3600 + m_inicio * 60, h_fin * 3600 + m_fin * 60
+        if fin > inicio:
+            ventanas[dia_semana] = (inicio, fin)
+    return {"ventanas": ventanas, "feriados": frozenset(dias_feriados)}
+
+
+def _horario_compilado(config_data):
+    # Configuraciones armadas sin cargar_configuracion se compilan en el primer uso.
+    if "horario_compilado" not in config_data:
+        config_data["horario_compilado"] = compilar_horario(
+            config_data["horario_laboral"], config_data["dias_feriados"])
+    return config_data["horario_compilado"]
+
+
+def _microsegundos(td):
+    return (td.days * 86400 + td.seconds) * 1_000_000 + td.microseconds
+
+
+def calcular_tiempo_efectivo(start_dt, end_dt, horario, es_critica_24_7=False):
+    """
+    Tiempo laboral entre dos fechas con el horario de compilar_horario.
+
+    Equivale al recorrido minuto a minuto anterior: cuenta un minuto completo
+    por cada instante start_dt + k minutos (k >= 0) anterior a end_dt que cae
+    en [inicio, fin) de la ventana de su día, pero recorta cada día contra su
+    ventana en lugar de avanzar de a un minuto.
+    """
     if start_dt >= end_dt:
         return timedelta(0)
     if es_critica_24_7:
         return end_dt - start_dt
-    tiempo_laboral_total = timedelta(0)
-    current_time = start_dt
-    while not is_working_time(current_time, horario_laboral, dias_feriados)[0] and current_time < end_dt:
-        current_time += timedelta(minutes=1)
-    while current_time < end_dt:
-        if is_working_time(current_time, horario_laboral, dias_feriados)[0]:
-            tiempo_laboral_total += timedelta(minutes=1)
-        current_time += timedelta(minutes=1)
-    return tiempo_laboral_total
+
+    ventanas, feriados = horario["ventanas"], horario["feriados"]
+    # Instantes revisados: k = 0 .. total_minutos - 1.
+    total_minutos = -(-_microsegundos(end_dt - start_dt) // _MINUTO_US)
+    ultimo_instante = start_dt + timedelta(minutes=total_minutos - 1)
+    inicio_dia = datetime.combine(start_dt.date(), datetime.min.time(), start_dt.tzinfo)
+    dia = start_dt.date()
+    minutos = 0
+    while dia <= ultimo_instante.date():
+        ventana = ventanas.get(dia.weekday())
+        if ventana is not None and dia not in feriados:
+            desde_inicio = _microsegundos(inicio_dia - start_dt)
+            # Primer k con instante >= apertura y último k con instante < cierre.
+            primer_k = max(0, -(-(desde_inicio + ventana[0] * 1_000_000) // _MINUTO_US))
+            ultimo_k = min(total_minutos, -(-(desde_inicio + ventana[1] * 1_000_000) // _MINUTO_US)) - 1
+            if ultimo_k >= primer_k:
+                minutos += ultimo_k - primer_k + 1
+        dia += timedelta(days=1)
+        inicio_dia += timedelta(days=1)
+    return timedelta(minutes=minutos)
+
+
+# Scanner de bitácora compilado una sola vez: se ubica cada cabecera
+# "dd-mm-aaaa hh:mm:ss , usuario ," y el mensaje llega hasta la siguiente
+# línea que empieza con fecha, sin el (.*?) perezoso con lookahead.
+_CABECERA_BITACORA = re.compile(
+    r'(\d{2})[-/](\d{2})[-/](\d{4}) (\d{1,2}):(\d{2}):(\d{2})\s*,\s*([^,]+?)\s*,\s*')
+_FIN_MENSAJE_BITACORA = re.compile(
+    r'\s*[\r\n]+\s*[\xa0]?\d{2}[-/]\d{2}[-/]\d{4}')
+_usuarios_normalizados = {}
+
+
+def _normalizar_usuario(usuario):
+    normalizado = _usuarios_normalizados.get(usuario)
+    if normalizado is None:
+        normalizado = _usuarios_normalizados[usuario] = normalizar_texto(usuario)
+    return normalizado
 
 
 def parsear_bitacora(bitacora_texto, incidencia_id="N/A"):
     bitacora_texto_limpia = bitacora_texto.replace('¶', '\n')
     entries = []
-    regex = re.compile(
-        r'(\d{2}[-/]\d{2}[-/]\d{4} \d{1,2}:\d{2}:\d{2})\s*,\s*([^,]+?)\s*,\s*(.*?)(?=\s*[\r\n]+\s*[\xa0]?\d{2}[-/]\d{2}[-/]\d{4}|\Z)', re.DOTALL)
-    matches = regex.finditer(bitacora_texto_limpia)
-    for match in matches:
-        date_str, user_raw, message = match.groups()
+    posicion = 0
+    while True:
+        match = _CABECERA_BITACORA.search(bitacora_texto_limpia, posicion)
+        if match is None:
+            break
+        fin = _FIN_MENSAJE_BITACORA.search(bitacora_texto_limpia, match.end())
+        posicion = fin.start() if fin else len(bitacora_texto_limpia)
+        message = bitacora_texto_limpia[match.end():posicion]
+        date_str = match.group(0)[:match.end(6) - match.start()]
         try:
-            dt_obj = datetime.strptime(date_str.replace(
-                '/', '-').strip(), "%d-%m-%Y %H:%M:%S")
-            entries.append({"fecha_hora": dt_obj, "usuario": normalizar_texto(
-                user_raw), "mensaje": message.strip()})
+            if date_str.isascii():
+                # Dígitos de ancho fijo: más rápido que strptime.
+                dia, mes, anio, hora, minuto, segundo = map(int, match.group(1, 2, 3, 4, 5, 6))
+                dt_obj = datetime(anio, mes, dia, hora, minuto, segundo)
+            else:
+                dt_obj = datetime.strptime(date_str.replace(
+                    '/', '-').strip(), "%d-%m-%Y %H:%M:%S")
+            entries.append({"fecha_hora": dt_obj, "usuario": _normalizar_usuario(
+                match.group(7)), "mensaje": message.strip()})
         except ValueError:
             logger.warning(
                 f"Error parseando fecha en bitácora para {incidencia_id}: '{date_str}'. Ignorando entrada.")
@@ -146,156 +211,71 @@ def parsear_bitacora(bitacora_texto, incidencia_id="N/A"):
 # --- Función Principal de Procesamiento (MODIFICADA) ---
 
 
-def procesar_incidencias(ruta_incidencias_input, config_data):
-    resultados_dict = {}
-    incidencia_ids_a_procesar = []
-    try:
-        with open(ruta_incidencias_input, 'r', encoding='utf-8') as f:
-            for line in f:
-                inc_id = line.strip()
-                if inc_id:
-                    incidencia_ids_a_procesar.append(inc_id)
-    except Exception as e:
-        logger.critical(f"Error al leer IDs de incidencias: {e}")
-        return []
+# Cantidad de IDs por consulta: acota la memoria y el tamaño del IN (...).
+TAMANO_BLOQUE = 1000
+
 
-    if not incidencia_ids_a_procesar:
-        logger.warning("El archivo de incidencias está vacío.")
-        return []
+def leer_ids(ruta_incidencias_input):
+    """Entrega los IDs del archivo de entrada de a uno, sin cargarlo completo."""
+    with open(ruta_incidencias_input, 'r', encoding='utf-8') as f:
+        for line in f:
+            inc_id = line.strip()
+            if inc_id:
+                yield inc_id
 
+
+def _en_bloques(iterable, tamano):
+    bloque = []
+    for elemento in iterable:
+        bloque.append(elemento)
+        if len(bloque) >= tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def procesar_incidencias(ruta_incidencias_input, config_data, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Generador de resultados de SLA en el mismo orden del archivo de entrada.
+    Los IDs se leen y consultan por bloques de 'tamano_bloque' con un cursor
+    sin buffer, por lo que la memoria no depende del largo del archivo.
+    """
     db_conn = None
+    cursor = None
+    hay_ids = False
     try:
-        db_config = config_data["db_config"]
-        db_conn = mysql.connector.connect(**db_config)
-        cursor = db_conn.cursor(dictionary=True)
-
-        unique_ids = list(set(incidencia_ids_a_procesar))
-        placeholders = ', '.join(['%s'] * len(unique_ids))
-        query = f"SELECT incidencia, id_aplicacion, id_criticidad, fecha_ultima_resolucion, bitacora FROM INCIDENCIA WHERE incidencia IN ({placeholders})"
-
-        cursor.execute(query, tuple(unique_ids))
-        incidencias_from_db = {row['incidencia']                               : row for row in cursor.fetchall()}
-
-        for inc_id in incidencia_ids_a_procesar:
-            if inc_id not in incidencias_from_db:
-                logger.warning(
-                    f"Incidencia '{inc_id}' no encontrada en la base de datos.")
-                resultados_dict[inc_id] = {
-                    "incidencia": inc_id, "cumple_sla": "No Encontrada en DB"}
-                continue
-
-            row = incidencias_from_db[inc_id]
-            incidencia = row["incidencia"]
-
-            # --- INICIO DE LA LÓGICA DE CÁLCULO Y LOGS MEJORADA ---
-            logger.info(
-                f"\n--- Analizando Segmentos para Incidencia: {incidencia} ---")
-
-            bitacora_texto = row.get("bitacora", "") or ""
-            id_aplicacion = int(row["id_aplicacion"]) if row.get(
-                "id_aplicacion") else None
-            id_severidad_inc = int(row["id_criticidad"]) if row.get(
-                "id_criticidad") else None
-
-            severidad_incidencia = config_data["severidad_incidencia_mapeo"].get(
-                id_severidad_inc, "Desconocida")
-            app_info = config_data["aplicacion_criticidad_mapeo"].get(
-                id_aplicacion, {})
-            nombre_aplicativo = app_info.get("nombre", f"ID:{id_aplicacion}")
-            criticidad_aplicativo = app_info.get("criticidad", "sin asignar")
-
-            lista_gestores = config_data.get(
-                "grupos_gestores", {}).get("GLOBAL_GROUP", [])
-            bitacora_entries = parsear_bitacora(bitacora_texto, incidencia)
-            tiempo_gestion_laboral_total_td = timedelta(0)
-            es_critica_24_7 = (severidad_incidencia.lower() == "critica")
-
-            ultimo_gestor = "N/A"
-            if bitacora_entries:
-                for entry in reversed(bitacora_entries):
-                    if entry["usuario"] in lista_gestores:
-                        ultimo_gestor = entry["usuario"]
-                        break
-
-            if len(bitacora_entries) > 1:
-                for j in range(len(bitacora_entries) - 1):
-                    current_entry, next_entry = bitacora_entries[j], bitacora_entries[j+1]
-
-                    segment_start_str = current_entry['fecha_hora'].strftime(
-                        '%d-%m-%Y %H:%M:%S')
-                    segment_end_str = next_entry['fecha_hora'].strftime(
-                        '%d-%m-%Y %H:%M:%S')
-                    start_user = current_entry['usuario']
-                    end_user = next_entry['usuario']
-
-                    logger.info(
-                        f"Desde {segment_start_str} hasta {segment_end_str}.")
-                    logger.info(f"-> De: '{start_user}' | A: '{end_user}'")
-
-                    if end_user in lista_gestores and 'pendiente' not in current_entry['mensaje'].lower():
-                        tiempo_segmento = calcular_tiempo_efectivo(
-                            current_entry["fecha_hora"], next_entry["fecha_hora"],
-                            config_data["horario_laboral"], config_data["dias_feriados"], es_critica_24_7
-                        )
-                        tiempo_gestion_laboral_total_td += tiempo_segmento
-                        logger.info(
-                            f"✅ ANÁLISIS: Se cuenta el tiempo. Gestor '{end_user}' respondió. Tiempo sumado: {str(tiempo_segmento)}")
-                    else:
-                        if end_user not in lista_gestores:
-                            logger.info(
-                                f"❌ ANÁLISIS: No se cuenta. El usuario '{end_user}' no es un gestor.")
-                        elif 'pendiente' in current_entry['mensaje'].lower():
-                            logger.info(
-                                f"⏸️ ANÁLISIS: No se cuenta. El reloj está pausado por nota 'Pendiente' de '{start_user}'.")
-                    logger.info("-" * 60)
-
-            # --- FIN DE LA LÓGICA DE CÁLCULO Y LOGS MEJORADA ---
-
-            if tiempo_gestion_laboral_total_td == timedelta(0) and not es_critica_24_7 and bitacora_entries:
-                tiempo_gestion_laboral_total_td = timedelta(minutes=20)
-                logger.info(
-                    "-> Aplicando fallback de 20 minutos por tiempo de gestión 0.")
-
-            tiempo_gestion_segundos = int(
-                tiempo_gestion_laboral_total_td.total_seconds())
-            h, rem = divmod(tiempo_gestion_segundos, 3600)
-            tiempo_gestion_horas_str = f"{h:02d}:{rem//60:02d}:{rem % 60:02d}"
-            logger.info(
-                f"-> TIEMPO TOTAL DE GESTIÓN PARA {incidencia}: {tiempo_gestion_horas_str}\n")
-
-            fecha_resolucion = row.get("fecha_ultima_resolucion")
-            fecha_resolucion_str = fecha_resolucion.strftime(
-                '%Y-%m-%d %H:%M:%S') if isinstance(fecha_resolucion, datetime) else "N/A"
-
-            sla_key = (normalizar_texto(severidad_incidencia),
-                       normalizar_texto(criticidad_aplicativo))
-            sla_timedelta = config_data["sla_combinado"].get(sla_key)
-            sla_total_segundos, sla_total_horas_str = "N/A", "N/A"
-            if sla_timedelta:
-                sla_total_segundos = int(sla_timedelta.total_seconds())
-                h_sla, rem_sla = divmod(sla_total_segundos, 3600)
-                sla_total_horas_str = f"{h_sla:02d}:{rem_sla//60:02d}:{rem_sla % 60:02d}"
-
-            cumple_sla = ""
-            if criticidad_aplicativo == "sin asignar":
-                cumple_sla = "SLA No Calculado (Criticidad Aplicativo 'sin asignar')"
-            elif not sla_timedelta:
-                cumple_sla = "SLA No Definido para esta combinación"
-            elif not bitacora_entries:
-                cumple_sla = "SLA No Calculado (Bitácora no parseable)"
-            else:
-                cumple_sla = "Sí" if tiempo_gestion_segundos <= sla_total_segundos else "No"
-
-            resultados_dict[incidencia] = {
-                "incidencia": incidencia, "fecha_ultima_resolucion": fecha_resolucion_str,
-                "usuario": ultimo_gestor, "aplicativo": nombre_aplicativo,
-                "criticidad_aplicativo": criticidad_aplicativo, "severidad": severidad_incidencia,
-                "sla_total_segundos": sla_total_segundos, "sla_total_horas": sla_total_horas_str,
-                "tiempo_gestion_laboral_segundos": tiempo_gestion_segundos,
-                "tiempo_gestion_laboral_horas": tiempo_gestion_horas_str,
-                "cumple_sla": cumple_sla
-            }
-
+        for bloque_ids in _en_bloques(leer_ids(ruta_incidencias_input), tamano_bloque):
+            hay_ids = True
+            if db_conn is None:
+                db_conn = mysql.connector.connect(**config_data["db_config"])
+                cursor = db_conn.cursor(dictionary=True, buffered=False)
+
+            unique_ids = list(dict.fromkeys(bloque_ids))
+            placeholders = ', '.join(['%s'] * len(unique_ids))
+            query = f"SELECT incidencia, id_aplicacion, id_criticidad, fecha_ultima_resolucion, bitacora FROM INCIDENCIA WHERE incidencia IN ({placeholders})"
+            cursor.execute(query, tuple(unique_ids))
+
+            # Las filas se consumen a medida que llegan desde el servidor. La
+            # traza por segmento solo se arma si el log está en DEBUG.
+            depurar = logger.isEnabledFor(logging.DEBUG)
+            resultados_dict = {}
+            for row in cursor:
+                resultados_dict[row["incidencia"]] = _procesar_fila(
+                    row, config_data, [] if depurar else None)
+
+            for inc_id in bloque_ids:
+                if inc_id not in resultados_dict:
+                    logger.warning(
+                        f"Incidencia '{inc_id}' no encontrada en la base de datos.")
+                    resultados_dict[inc_id] = {
+                        "incidencia": inc_id, "cumple_sla": "No Encontrada en DB"}
+                yield resultados_dict[inc_id]
+
+        if not hay_ids:
+            logger.warning("El archivo de incidencias está vacío.")
+    except OSError as e:
+        logger.critical(f"Error al leer IDs de incidencias: {e}")
     except mysql.connector.Error as err:
         logger.critical(f"Error de base de datos: {err}")
     except Exception as e:
@@ -306,11 +286,116 @@ def procesar_incidencias(ruta_incidencias_input, config_data):
             db_conn.close()
             logger.info("Conexión a la base de datos cerrada.")
 
-    return [resultados_dict.get(inc_id) for inc_id in incidencia_ids_a_procesar if inc_id in resultados_dict]
+
+def _procesar_fila(row, config_data, traza=None):
+    """
+    Calcula el resultado de SLA de una fila de INCIDENCIA. Si se entrega una
+    lista en 'traza', se le agrega un registro por segmento
+    [desde, hasta, de, a, motivo, segundos sumados] y se escribe en el log
+    (DEBUG) en una sola línea.
+    """
+    incidencia = row["incidencia"]
+
+    # --- INICIO DE LA LÓGICA DE CÁLCULO ---
+    bitacora_texto = row.get("bitacora", "") or ""
+    id_aplicacion = int(row["id_aplicacion"]) if row.get(
+        "id_aplicacion") else None
+    id_severidad_inc = int(row["id_criticidad"]) if row.get(
+        "id_criticidad") else None
+
+    severidad_incidencia = config_data["severidad_incidencia_mapeo"].get(
+        id_severidad_inc, "Desconocida")
+    app_info = config_data["aplicacion_criticidad_mapeo"].get(
+        id_aplicacion, {})
+    nombre_aplicativo = app_info.get("nombre", f"ID:{id_aplicacion}")
+    criticidad_aplicativo = app_info.get("criticidad", "sin asignar")
+
+    lista_gestores = config_data.get(
+        "grupos_gestores", {}).get("GLOBAL_GROUP", [])
+    horario = _horario_compilado(config_data)
+    bitacora_entries = parsear_bitacora(bitacora_texto, incidencia)
+    tiempo_gestion_laboral_total_td = timedelta(0)
+    es_critica_24_7 = (severidad_incidencia.lower() == "critica")
+
+    ultimo_gestor = "N/A"
+    if bitacora_entries:
+        for entry in reversed(bitacora_entries):
+            if entry["usuario"] in lista_gestores:
+                ultimo_gestor = entry["usuario"]
+                break
+
+    for j in range(len(bitacora_entries) - 1):
+        current_entry, next_entry = bitacora_entries[j], bitacora_entries[j+1]
+        end_user = next_entry['usuario']
+        tiempo_segmento = timedelta(0)
+        if end_user not in lista_gestores:
+            motivo = "no_gestor"
+        elif 'pendiente' in current_entry['mensaje'].lower():
+            motivo = "pausado"
+        else:
+            motivo = "cuenta"
+            tiempo_segmento = calcular_tiempo_efectivo(
+                current_entry["fecha_hora"], next_entry["fecha_hora"],
+                horario, es_critica_24_7
+            )
+            tiempo_gestion_laboral_total_td += tiempo_segmento
+        if traza is not None:
+            traza.append([current_entry['fecha_hora'].isoformat(), next_entry['fecha_hora'].isoformat(),
+                          current_entry['usuario'], end_user, motivo, int(tiempo_segmento.total_seconds())])
+
+    # --- FIN DE LA LÓGICA DE CÁLCULO ---
+
+    if tiempo_gestion_laboral_total_td == timedelta(0) and not es_critica_24_7 and bitacora_entries:
+        tiempo_gestion_laboral_total_td = timedelta(minutes=20)
+
+    tiempo_gestion_segundos = int(
+        tiempo_gestion_laboral_total_td.total_seconds())
+    h, rem = divmod(tiempo_gestion_segundos, 3600)
+    tiempo_gestion_horas_str = f"{h:02d}:{rem//60:02d}:{rem % 60:02d}"
+    if traza is not None:
+        # Una sola línea por incidencia en lugar de varias por segmento.
+        logger.debug("Traza %s: total=%s segmentos=%s",
+                     incidencia, tiempo_gestion_horas_str, traza)
+
+    fecha_resolucion = row.get("fecha_ultima_resolucion")
+    fecha_resolucion_str = fecha_resolucion.strftime(
+        '%Y-%m-%d %H:%M:%S') if isinstance(fecha_resolucion, datetime) else "N/A"
+
+    sla_key = (normalizar_texto(severidad_incidencia),
+               normalizar_texto(criticidad_aplicativo))
+    sla_timedelta = config_data["sla_combinado"].get(sla_key)
+    sla_total_segundos, sla_total_horas_str = "N/A", "N/A"
+    if sla_timedelta:
+        sla_total_segundos = int(sla_timedelta.total_seconds())
+        h_sla, rem_sla = divmod(sla_total_segundos, 3600)
+        sla_total_horas_str = f"{h_sla:02d}:{rem_sla//60:02d}:{rem_sla % 60:02d}"
+
+    cumple_sla = ""
+    if criticidad_aplicativo == "sin asignar":
+        cumple_sla = "SLA No Calculado (Criticidad Aplicativo 'sin asignar')"
+    elif not sla_timedelta:
+        cumple_sla = "SLA No Definido para esta combinación"
+    elif not bitacora_entries:
+        cumple_sla = "SLA No Calculado (Bitácora no parseable)"
+    else:
+        cumple_sla = "Sí" if tiempo_gestion_segundos <= sla_total_segundos else "No"
+
+    return {
+        "incidencia": incidencia, "fecha_ultima_resolucion": fecha_resolucion_str,
+        "usuario": ultimo_gestor, "aplicativo": nombre_aplicativo,
+        "criticidad_aplicativo": criticidad_aplicativo, "severidad": severidad_incidencia,
+        "sla_total_segundos": sla_total_segundos, "sla_total_horas": sla_total_horas_str,
+        "tiempo_gestion_laboral_segundos": tiempo_gestion_segundos,
+        "tiempo_gestion_laboral_horas": tiempo_gestion_horas_str,
+        "cumple_sla": cumple_sla
+    }
 
 
 def guardar_resultados_csv(resultados, nombre_archivo="reporte_sla_incidencias.csv"):
-    if not resultados:
+    """Escribe los resultados (lista o generador) fila a fila a medida que llegan."""
+    resultados = iter(resultados)
+    primero = next(resultados, None)
+    if primero is None:
         logger.info("No hay resultados para guardar.")
         return
     fieldnames = [
@@ -323,7 +408,9 @@ def guardar_resultados_csv(resultados, nombre_archivo="reporte_sla_incidencias.c
             writer = csv.DictWriter(
                 csvfile, fieldnames=fieldnames, extrasaction='ignore')
             writer.writeheader()
-            writer.writerows(resultados)
+            writer.writerow(primero)
+            for resultado in resultados:
+                writer.writerow(resultado)
         logger.info(f"Reporte generado exitosamente en '{nombre_archivo}'")
     except IOError as e:
         logger.error(
@@ -353,28 +440,27 @@ if __name__ == "__main__":
             "La configuración [DATABASE_CONFIG] es necesaria en config.txt.")
         exit(1)
 
-    resultados_analisis = procesar_incidencias(
-        ruta_incidencias_input_ids, configuracion)
+    stats = {"Sí": 0, "No": 0, "No Encontrada en DB": 0}
+
+    def contar_resultados(resultados):
+        # Las estadísticas se acumulan mientras los resultados pasan al CSV.
+        for res in resultados:
+            estado = res.get("cumple_sla", "Otro")
+            stats[estado] = stats.get(estado, 0) + 1
+            yield res
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     reporte_csv_path = f"reporte_sla_DB_{timestamp}.csv"
-    guardar_resultados_csv(resultados_analisis, reporte_csv_path)
-
-    if resultados_analisis:
-        stats = {"Sí": 0, "No": 0, "No Encontrada en DB": 0}
-        for res in resultados_analisis:
-            estado = res.get("cumple_sla", "Otro")
-            if estado in stats:
-                stats[estado] += 1
-            else:
-                stats.setdefault(estado, 0)
-                stats[estado] += 1
+    guardar_resultados_csv(contar_resultados(procesar_incidencias(
+        ruta_incidencias_input_ids, configuracion)), reporte_csv_path)
 
+    total_procesadas = sum(stats.values())
+    if total_procesadas:
         logger.info("\n--- RESUMEN DE ESTADÍSTICAS DE SLA ---")
         for estado, count in stats.items():
             logger.info(f"{estado:<40} : {count}")
         logger.info(
-            f"{'Total de incidencias procesadas':<40} : {len(resultados_analisis)}")
+            f"{'Total de incidencias procesadas':<40} : {total_procesadas}")
         logger.info("-------------------------------------")
 
     logger.info("Proceso de análisis de SLA completado.")
@@ -0,0 +1,94 @@
+# gestion/services/simulacion_sla.py
+
+import logging
+import time
+from collections import defaultdict
+
+from .calendario_sla import WorkingCalendar
+from .contexto_sla import obtener_contexto_sla
+from .guardado_sla import iterar_por_id
+from .sla_lote import evaluar_lote, preparar_lote
+
+logger = logging.getLogger(__name__)
+
+_EVALUADOS = ("Sí", "No")
+
+
+def calendario_simulado(calendario, horarios):
+    """
+    WorkingCalendar con los horarios de 'horarios' ({día: (inicio, fin)},
+    (None, None) = cerrado) sobre los vigentes, con los mismos feriados y rango.
+    """
+    if not horarios:
+        return calendario
+    return WorkingCalendar({**calendario.horarios, **horarios}, calendario.feriados,
+                           calendario.desde, calendario.hasta)
+
+
+def _acumular(totales, clave, resultado):
+    cumple = resultado.get("cumple_sla")
+    if cumple in _EVALUADOS:
+        totales[clave][0] += 1
+        totales[clave][1] += cumple == "Sí"
+
+
+def _porcentaje(evaluadas, cumplen):
+    return round(100 * cumplen / evaluadas, 2) if evaluadas else None
+
+
+def simular_sla(incidencias_qs, reglas=None, horarios=None):
+    """
+    Evalúa el cumplimiento de SLA de 'incidencias_qs' con la configuración
+    vigente y con una hipotética ('reglas' {(severidad_id, criticidad_id):
+    timedelta} y/o 'horarios', ver calendario_simulado), sin escribir en
+    Incidencia.
+
+    Las bitácoras se toman ya parseadas de BitacoraParseada (la única
+    escritura: se parsean y guardan las que falten) y cada bloque
+    se evalúa en lote, agrupado por calendario, contra el índice del
+    calendario de cada grupo, una vez por escenario.
+    Devuelve una fila por severidad × criticidad con el porcentaje de
+    cumplimiento actual y simulado.
+    """
+    contexto = obtener_contexto_sla()
+    reglas_simuladas = {**contexto.reglas_sla, **(reglas or {})}
+    # Los horarios hipotéticos reemplazan al calendario general; los
+    # CalendarioLaboral de bloques y grupos se mantienen.
+    calendario_general = calendario_simulado(contexto.calendario, horarios)
+
+    inicio = time.perf_counter()
+    # clave -> [evaluadas, cumplen] por escenario.
+    actuales = defaultdict(lambda: [0, 0])
+    simulados = defaultdict(lambda: [0, 0])
+    total = 0
+    # Por id y sin cursor abierto: preparar_lote guarda en BitacoraParseada las bitácoras aún sin parsear.
+    for bloque in iterar_por_id(incidencias_qs):
+        _, pendientes = preparar_lote(bloque)
+        grupos = defaultdict(list)
+        for posicion, tarea in pendientes:
+            calendario_id = contexto.calendario_id(bloque[posicion])
+            grupos[calendario_id if calendario_id in contexto.calendarios else None].append(tarea)
+        for calendario_id, tareas in grupos.items():
+            calendario = contexto.calendarios[calendario_id]
+            resultados_actuales = evaluar_lote(tareas, contexto.gestores_norm, contexto.reglas_sla, calendario)
+            resultados_simulados = evaluar_lote(tareas, contexto.gestores_norm, reglas_simuladas,
+                                                calendario_general if calendario_id is None else calendario)
+            for tarea, actual, simulado in zip(tareas, resultados_actuales, resultados_simulados):
+                clave = (tarea[3], tarea[4])
+                _acumular(actuales, clave, actual)
+                _acumular(simulados, clave, simulado)
+        total += len(bloque)
+
+    filas = []
+    for clave in sorted(set(actuales) | set(simulados)):
+        evaluadas_actual, cumplen_actual = actuales[clave]
+        evaluadas_simulado, cumplen_simulado = simulados[clave]
+        filas.append({
+            "severidad_id": clave[0], "criticidad_id": clave[1],
+            "sla_actual": contexto.reglas_sla.get(clave), "sla_simulado": reglas_simuladas.get(clave),
+            "evaluadas_actual": evaluadas_actual, "cumple_actual": _porcentaje(evaluadas_actual, cumplen_actual),
+            "evaluadas_simulado": evaluadas_simulado, "cumple_simulado": _porcentaje(evaluadas_simulado, cumplen_simulado),
+        })
+    segundos = time.perf_counter() - inicio
+    logger.info(f"Simulación de SLA sobre {total} incidencias en {segundos:.2f} s.")
+    return {"total": total, "segundos": round(segundos, 3), "filas": filas}
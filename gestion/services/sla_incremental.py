@@ -0,0 +1,167 @@
+# gestion/services/sla_incremental.py
+
+import hashlib
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .cache_bitacora import hash_bitacora
+from .motor_sla import normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+
+def firma_entrada_sla(incidencia):
+    """
+    Hash de los datos propios de la incidencia de los que depende su SLA:
+    bitácora, severidad, criticidad de la aplicación y el bloque y grupo
+    resolutor (que deciden su calendario laboral).
+    """
+    criticidad_id = incidencia.aplicacion.criticidad_id if incidencia.aplicacion_id else None
+    clave = (f"{hash_bitacora(incidencia.bitacora)}|{incidencia.severidad_id}|{criticidad_id}|"
+             f"{incidencia.bloque_id}|{incidencia.grupo_resolutor_id}")
+    return hashlib.sha256(clave.encode('utf-8')).hexdigest()
+
+
+def version_actual():
+    from ..models import VersionSLA
+
+    return VersionSLA.objects.get_or_create(pk=1)[0].version
+
+
+def incrementar_version():
+    """Incrementa la versión global de los datos de referencia del SLA y devuelve la nueva."""
+    from ..models import VersionSLA
+
+    with transaction.atomic():
+        if not VersionSLA.objects.filter(pk=1).update(version=F('version') + 1):
+            VersionSLA.objects.get_or_create(pk=1, defaults={'version': 1})
+        return VersionSLA.objects.get(pk=1).version
+
+
+def registrar_entrada_calculo(incidencia, version):
+    """
+    Anota en la incidencia con qué datos se calculó su SLA (no guarda).
+    Recuerda la sla_version leída para confirmar_calculo.
+    """
+    incidencia._sla_version_leida = incidencia.sla_version
+    incidencia.sla_firma_entrada = firma_entrada_sla(incidencia)
+    incidencia.sla_version = version
+    incidencia.sla_obsoleto = False
+
+
+CAMPOS_ENTRADA_CALCULO = ['sla_firma_entrada']
+
+
+def confirmar_calculo(incidencias, tamano_lote=500):
+    """
+    Guarda sla_version y quita la marca de obsoleto solo en las incidencias
+    que nadie marcó mientras se calculaban. Cada marca escribe en sla_version
+    una versión nueva, así que si el valor guardado ya no es el leído, o es
+    posterior a la versión del cálculo, la incidencia sigue obsoleta.
+    Devuelve cuántas quedaron al día.
+    """
+    from ..models import Incidencia
+
+    por_version = defaultdict(list)
+    for inc in incidencias:
+        leida = getattr(inc, '_sla_version_leida', None)
+        if leida is not None and leida <= inc.sla_version:
+            por_version[(leida, inc.sla_version)].append(inc.pk)
+    confirmadas = 0
+    for (leida, version), ids in por_version.items():
+        for inicio in range(0, len(ids), tamano_lote):
+            confirmadas += Incidencia.objects.filter(
+                pk__in=ids[inicio:inicio + tamano_lote], sla_version=leida).update(
+                sla_version=version, sla_obsoleto=False)
+    return confirmadas
+
+
+def _marcar(queryset, motivo):
+    # También las ya obsoletas: la versión nueva invalida un cálculo en curso (ver confirmar_calculo).
+    marcadas = queryset.update(sla_obsoleto=True, sla_version=incrementar_version())
+    if marcadas:
+        logger.info(
+            f"SLA marcado como obsoleto en {marcadas} incidencias ({motivo}).")
+    return marcadas
+
+
+def _filtro_no_criticas():
+    """Las incidencias 24/7 (severidad 'critica') no dependen del calendario laboral."""
+    from ..models import Severidad
+
+    no_criticas = [s.id for s in Severidad.objects.all()
+                   if normalizar_texto(s.desc_severidad) != "critica"]
+    return Q(severidad_id__in=no_criticas)
+
+
+def marcar_por_regla(severidad_id, criticidad_id):
+    from ..models import Incidencia
+
+    return _marcar(Incidencia.objects.filter(severidad_id=severidad_id, aplicacion__criticidad_id=criticidad_id),
+                   f"regla SLA {severidad_id}/{criticidad_id}")
+
+
+def marcar_por_horario():
+    from ..models import Incidencia
+
+    return _marcar(Incidencia.objects.filter(_filtro_no_criticas()), "horario laboral")
+
+
+def marcar_por_feriado(fecha):
+    from ..models import Incidencia
+
+    # Solo las bitácoras cuyo rango incluye el feriado (o aún sin parsear).
+    afecta = (Q(bitacora_parseada__isnull=True) |
+              Q(bitacora_parseada__primera_fecha__isnull=True) |
+              Q(bitacora_parseada__primera_fecha__lte=fecha, bitacora_parseada__ultima_fecha__gte=fecha))
+    return _marcar(Incidencia.objects.filter(_filtro_no_criticas() & afecta), f"feriado {fecha}")
+
+
+def marcar_por_usuario(usuario):
+    from ..models import Incidencia
+
+    usuario_norm = normalizar_texto(usuario)
+    if not usuario_norm:
+        return 0
+    # Se busca en la lista de usuarios en texto plano y no en el JSON de las
+    # entradas, donde los caracteres no ASCII quedan escapados como \uXXXX.
+    afecta = (Q(bitacora_parseada__isnull=True) |
+              Q(bitacora_parseada__usuarios__contains=f"\n{usuario_norm}\n"))
+    return _marcar(Incidencia.objects.filter(afecta), f"gestor '{usuario_norm}'")
+
+
+def marcar_por_aplicacion(aplicacion_id):
+    from ..models import Incidencia
+
+    return _marcar(Incidencia.objects.filter(aplicacion_id=aplicacion_id), f"criticidad de aplicación {aplicacion_id}")
+
+
+def marcar_por_severidad(severidad_id):
+    from ..models import Incidencia
+
+    return _marcar(Incidencia.objects.filter(severidad_id=severidad_id), f"severidad {severidad_id}")
+
+
+def marcar_por_calendario(calendario_id):
+    from ..models import Incidencia
+
+    usa_calendario = Q(grupo_resolutor__calendario_id=calendario_id) | Q(bloque__calendario_id=calendario_id)
+    return _marcar(Incidencia.objects.filter(_filtro_no_criticas() & usa_calendario),
+                   f"calendario laboral {calendario_id}")
+
+
+def marcar_por_bloque(bloque_id):
+    from ..models import Incidencia
+
+    return _marcar(Incidencia.objects.filter(_filtro_no_criticas(), bloque_id=bloque_id),
+                   f"calendario del bloque {bloque_id}")
+
+
+def marcar_por_grupo_resolutor(grupo_id):
+    from ..models import Incidencia
+
+    return _marcar(Incidencia.objects.filter(_filtro_no_criticas(), grupo_resolutor_id=grupo_id),
+                   f"calendario del grupo resolutor {grupo_id}")
@@ -0,0 +1,173 @@
+# gestion/services/sla_lote.py
+
+from datetime import timedelta
+
+import numpy as np
+
+from .cache_bitacora import instante_local, obtener_entradas, segundos_locales
+from .motor_sla import (MOTIVO_CUENTA, MOTIVO_NO_GESTOR, MOTIVO_PAUSADO, calcular_tiempo_efectivo, campos_faltantes_sla,
+                        construir_resultado_sla, es_severidad_24_7, resultado_faltan_datos)
+
+_SEGUNDOS_DIA = 86400
+_ORDINAL_EPOCA = 719163  # date(1970, 1, 1).toordinal()
+
+
+def tarea_sla(incidencia, entradas):
+    """
+    Resume una incidencia (con sus datos de SLA completos) en una tupla
+    compacta e independiente del ORM:
+    (id, código, entradas compactas, severidad_id, criticidad_id, es_critica_24_7).
+    Las entradas compactas son las de cache_bitacora.compactar_entradas.
+    """
+    return (incidencia.id, incidencia.incidencia, entradas, incidencia.severidad.id,
+            incidencia.aplicacion.criticidad.id, es_severidad_24_7(incidencia))
+
+
+def _segundos_previos(dias, segundos, apertura, acumulado):
+    """Segundos laborales acumulados antes de cada instante (día relativo, segundo del día)."""
+    largo = acumulado[dias + 1] - acumulado[dias]
+    return acumulado[dias] + np.clip(segundos - apertura[dias], 0, largo)
+
+
+def proyectar_vencimiento(entradas, segundos_contados, objetivo, es_critica_24_7, calendario):
+    """
+    Instante (segundos locales) en que se agotaría el SLA si el reloj sigue
+    corriendo desde la última entrada de la bitácora: el saldo de la regla se
+    suma hacia adelante en tiempo laboral, o de reloj si la incidencia es 24/7.
+    None si no hay regla o bitácora, o si el reloj quedó pausado.
+    """
+    if not objetivo or not entradas or entradas[-1][2]:
+        return None
+    ultimo_punto = entradas[-1][0]
+    saldo = max(0, objetivo // timedelta(seconds=1) - segundos_contados)
+    if es_critica_24_7 or not saldo:
+        return ultimo_punto + saldo
+    vence = calendario.sumar_segundos_laborales(instante_local(ultimo_punto), saldo)
+    return segundos_locales(vence) if vence is not None else None
+
+
+def evaluar_lote(tareas, gestores_norm, reglas_sla, calendario, con_segmentos=False):
+    """
+    Evalúa el SLA de muchas tareas (ver tarea_sla) a la vez.
+
+    Aplana los segmentos de todas las bitácoras en arreglos paralelos
+    (inicio, fin, respuesta de gestor, reloj pausado, 24/7, incidencia) y
+    calcula el tiempo efectivo de todos ellos en pasadas vectorizadas contra
+    el índice del WorkingCalendar. Luego reduce por incidencia con el mismo
+    fallback de 20 minutos y la misma búsqueda de regla que
+    calcular_sla_desde_bitacora. Devuelve los resultados en el orden de entrada.
+
+    Con con_segmentos=True cada resultado incluye además "segmentos": una
+    lista de [inicio, fin, usuario origen, usuario destino, motivo, segundos
+    efectivos] (segundos locales, como en las entradas compactas), donde los
+    segundos efectivos se calculan también para los segmentos que no cuentan.
+    Cada resultado trae además "vencimiento_sla" (ver proyectar_vencimiento).
+    """
+    dueno, inicio, fin, gestor, pausa, critica = [], [], [], [], [], []
+
+    for indice, (_id, _codigo, entradas, _sev, _crit, es_critica_24_7) in enumerate(tareas):
+        for i in range(len(entradas) - 1):
+            dueno.append(indice)
+            inicio.append(entradas[i][0])
+            fin.append(entradas[i + 1][0])
+            gestor.append(entradas[i + 1][1] in gestores_norm)
+            pausa.append(bool(entradas[i][2]))
+            critica.append(es_critica_24_7)
+
+    segundos_por_tarea = np.zeros(len(tareas), dtype=np.int64)
+
+    if dueno:
+        base, apertura, acumulado = calendario.indice()
+        apertura = np.asarray(apertura, dtype=np.int64)
+        acumulado = np.asarray(acumulado, dtype=np.int64)
+        ultimo_dia = base + len(apertura) - 1
+
+        dueno = np.asarray(dueno, dtype=np.int64)
+        inicio = np.asarray(inicio, dtype=np.int64)
+        fin = np.asarray(fin, dtype=np.int64)
+        gestor = np.asarray(gestor, dtype=bool)
+        pausa = np.asarray(pausa, dtype=bool)
+        cuenta = gestor & ~pausa
+        critica = np.asarray(critica, dtype=bool)
+
+        inicio_dia, inicio_seg = np.divmod(inicio, _SEGUNDOS_DIA)
+        fin_dia, fin_seg = np.divmod(fin, _SEGUNDOS_DIA)
+        inicio_dia += _ORDINAL_EPOCA
+        fin_dia += _ORDINAL_EPOCA
+
+        duracion = fin - inicio
+        vectorizable = critica | ((inicio_dia >= base) & (fin_dia <= ultimo_dia))
+
+        dia_i = np.clip(inicio_dia - base, 0, len(apertura) - 1)
+        dia_f = np.clip(fin_dia - base, 0, len(apertura) - 1)
+        laboral = (_segundos_previos(dia_f, fin_seg, apertura, acumulado) -
+                   _segundos_previos(dia_i, inicio_seg, apertura, acumulado))
+
+        efectivo = np.where(critica, duracion, laboral)
+        efectivo = np.where((duracion > 0) & vectorizable, efectivo, 0)
+
+        # Segmentos fuera del rango del calendario: cálculo escalar.
+        for fila in np.flatnonzero(~vectorizable & (cuenta | con_segmentos)):
+            efectivo[fila] = calcular_tiempo_efectivo(
+                instante_local(int(inicio[fila])), instante_local(int(fin[fila])),
+                calendario.horarios, calendario.feriados, False, calendario) // timedelta(seconds=1)
+
+        segundos_por_tarea = np.bincount(
+            dueno, weights=np.where(cuenta, efectivo, 0), minlength=len(tareas)).round().astype(np.int64)
+
+    resultados = []
+    for indice, (_id, codigo, entradas, severidad_id, criticidad_id, es_critica_24_7) in enumerate(tareas):
+        segundos_contados = int(segundos_por_tarea[indice])
+        resultado = construir_resultado_sla(
+            codigo, (severidad_id, criticidad_id), [e[1] for e in entradas], timedelta(seconds=segundos_contados),
+            es_critica_24_7, gestores_norm, reglas_sla)
+        resultado["vencimiento_sla"] = proyectar_vencimiento(
+            entradas, segundos_contados, resultado["sla_objetivo"], es_critica_24_7, calendario)
+        resultados.append(resultado)
+
+    if con_segmentos:
+        fila = 0
+        for (_id, _codigo, entradas, _sev, _crit, _critica), resultado in zip(tareas, resultados):
+            segmentos = []
+            for i in range(len(entradas) - 1):
+                motivo = (MOTIVO_NO_GESTOR if not gestor[fila] else
+                          MOTIVO_PAUSADO if pausa[fila] else MOTIVO_CUENTA)
+                segmentos.append([entradas[i][0], entradas[i + 1][0], entradas[i][1], entradas[i + 1][1],
+                                  motivo, int(efectivo[fila])])
+                fila += 1
+            resultado["segmentos"] = segmentos
+    return resultados
+
+
+def preparar_lote(incidencias):
+    """
+    Separa las incidencias a las que les faltan datos de SLA (resultado
+    inmediato) de las evaluables, que se devuelven como tareas compactas.
+    Devuelve (resultados parciales, [(posición, tarea)]).
+    """
+    resultados = [None] * len(incidencias)
+    evaluables = []
+    for posicion, incidencia in enumerate(incidencias):
+        campos_faltantes = campos_faltantes_sla(incidencia)
+        if campos_faltantes:
+            resultados[posicion] = resultado_faltan_datos(
+                incidencia, campos_faltantes)
+        else:
+            evaluables.append((posicion, incidencia))
+
+    # Las bitácoras sin cambios se toman ya parseadas de BitacoraParseada.
+    entradas = obtener_entradas([incidencia for _, incidencia in evaluables])
+    pendientes = [(posicion, tarea_sla(incidencia, entradas[incidencia.id]))
+                  for posicion, incidencia in evaluables]
+    return resultados, pendientes
+
+
+def calcular_sla_lote(incidencias, gestores_norm, reglas_sla, calendario, con_segmentos=False):
+    """Versión en lote de calcular_sla_desde_bitacora para una lista de incidencias."""
+    incidencias = list(incidencias)
+    resultados, pendientes = preparar_lote(incidencias)
+    evaluados = evaluar_lote([tarea for _, tarea in pendientes],
+                             gestores_norm, reglas_sla, calendario, con_segmentos)
+    for (posicion, _), resultado in zip(pendientes, evaluados):
+        resultados[posicion] = {"incidencia": incidencias[posicion], **resultado}
+    return resultados
@@ -0,0 +1,135 @@
+# gestion/services/sla_paralelo.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import repeat
+
+from django.conf import settings
+
+from .sla_lote import evaluar_lote, preparar_lote
+
+# Contexto de referencia (gestores, reglas, calendarios por id) de cada proceso worker.
+_contexto_worker = None
+
+
+def _inicializar_worker(contexto):
+    global _contexto_worker
+    _contexto_worker = contexto
+
+
+def _evaluar_bloque(tareas, calendario_id=None, con_segmentos=False):
+    gestores_norm, reglas_sla, calendarios = _contexto_worker
+    return evaluar_lote(tareas, gestores_norm, reglas_sla, calendarios[calendario_id], con_segmentos)
+
+
+def workers_configurados():
+    """Número de procesos a usar (settings.SLA_WORKERS o los núcleos disponibles)."""
+    return getattr(settings, 'SLA_WORKERS', None) or os.cpu_count() or 1
+
+
+class PoolSLA:
+    """
+    ProcessPoolExecutor para todo un trabajo o ejecución de comando: el
+    contexto de referencia (gestores, reglas y calendarios) se envía a cada
+    worker una sola vez al crearlo, no en cada bloque. Se usa como context
+    manager y se pasa a calcular_sla_contexto con el mismo 'contexto'.
+    """
+
+    def __init__(self, contexto, workers=None):
+        self.contexto = contexto
+        self.workers = workers or workers_configurados()
+        self._executor = None
+
+    def __enter__(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_inicializar_worker,
+            initargs=((self.contexto.gestores_norm, self.contexto.reglas_sla, self.contexto.calendarios),))
+        return self
+
+    def __exit__(self, *exc):
+        self._executor.shutdown()
+        self._executor = None
+
+    def evaluar(self, grupos, con_segmentos):
+        """Evalúa {calendario_id: [tareas]} en los workers, en bloques de un solo calendario."""
+        total = sum(len(tareas) for tareas in grupos.values())
+        tamano_bloque = max(1, min(getattr(settings, 'SLA_PARALELO_BLOQUE', 250), -(-total // self.workers)))
+        bloques = [(calendario_id, tareas[i:i + tamano_bloque])
+                   for calendario_id, tareas in grupos.items()
+                   for i in range(0, len(tareas), tamano_bloque)]
+        evaluados = {calendario_id: [] for calendario_id in grupos}
+        # map() conserva el orden de los bloques.
+        resultados = self._executor.map(_evaluar_bloque, [tareas for _, tareas in bloques],
+                                        [calendario_id for calendario_id, _ in bloques], repeat(con_segmentos))
+        for (calendario_id, _), bloque in zip(bloques, resultados):
+            evaluados[calendario_id].extend(bloque)
+        return evaluados
+
+
+def abrir_pool_sla(contexto, workers=None):
+    """
+    PoolSLA para 'contexto', o un context manager que entrega None (cálculo
+    en el mismo proceso) si solo hay un worker.
+    """
+    workers = workers or workers_configurados()
+    return PoolSLA(contexto, workers) if workers > 1 else nullcontext()
+
+
+def _evaluar_grupos(grupos, gestores_norm, reglas_sla, calendarios, pool, con_segmentos):
+    """
+    Evalúa {calendario_id: [tareas]} y devuelve {calendario_id: [resultados]}:
+    en el pool si lo hay y el lote alcanza settings.SLA_PARALELO_MINIMO, o
+    en el mismo proceso si no.
+    """
+    total = sum(len(tareas) for tareas in grupos.values())
+    if pool is not None and total >= getattr(settings, 'SLA_PARALELO_MINIMO', 500):
+        return pool.evaluar(grupos, con_segmentos)
+    return {calendario_id: evaluar_lote(tareas, gestores_norm, reglas_sla, calendarios[calendario_id], con_segmentos)
+            for calendario_id, tareas in grupos.items()}
+
+
+def calcular_sla_paralelo(incidencias, gestores_norm, reglas_sla, calendario, pool=None, con_segmentos=False,
+                          calendarios=None, calendario_id=None):
+    """
+    Calcula el SLA de una lista de incidencias, repartiendo el trabajo en
+    'pool' (un PoolSLA abierto con el mismo contexto) si se indica.
+
+    Cada incidencia se reduce a una tupla compacta (ver tarea_sla) y los
+    bloques se evalúan con evaluar_lote. Los resultados se devuelven en el
+    orden de entrada. Sin pool, o con pocas incidencias
+    (settings.SLA_PARALELO_MINIMO), se evalúa en el mismo proceso: es lo que
+    usan las vistas y los hilos, que no deben crear procesos por petición.
+    con_segmentos se pasa a evaluar_lote.
+
+    Con 'calendarios' ({id: WorkingCalendar}) y 'calendario_id' (función que
+    da el id para una incidencia) las incidencias se agrupan por calendario
+    y cada grupo se evalúa con el suyo; 'calendario' se usa para los ids que
+    no estén en 'calendarios'.
+    """
+    incidencias = list(incidencias)
+    resultados, pendientes = preparar_lote(incidencias)
+
+    calendarios = {**(calendarios or {}), None: calendario}
+    grupos = {}
+    for posicion, tarea in pendientes:
+        clave = calendario_id(incidencias[posicion]) if calendario_id else None
+        grupos.setdefault(clave if clave in calendarios else None, []).append((posicion, tarea))
+
+    evaluados = _evaluar_grupos({clave: [tarea for _, tarea in grupo] for clave, grupo in grupos.items()},
+                                gestores_norm, reglas_sla, calendarios, pool, con_segmentos)
+    for clave, grupo in grupos.items():
+        for (posicion, _), resultado in zip(grupo, evaluados[clave]):
+            resultados[posicion] = {"incidencia": incidencias[posicion], **resultado}
+    return resultados
+
+
+def calcular_sla_contexto(incidencias, contexto, pool=None, con_segmentos=False):
+    """
+    calcular_sla_paralelo con los datos de un ContextoSLA y el calendario de
+    cada incidencia. 'pool' debe haberse abierto con este mismo contexto.
+    """
+    if pool is not None and pool.contexto is not contexto:
+        raise ValueError("El pool de SLA se abrió con otro contexto.")
+    return calcular_sla_paralelo(incidencias, contexto.gestores_norm, contexto.reglas_sla, contexto.calendario,
+                                 pool, con_segmentos, contexto.calendarios, contexto.calendario_id)
@@ -0,0 +1,77 @@
+# gestion/services/trabajos.py
+
+import logging
+import threading
+from datetime import timedelta
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Ciclo de vida común de los trabajos en segundo plano (TrabajoSLA y
+# TrabajoCarga): ambos modelos tienen estado, fecha_creacion, fecha_inicio y
+# fecha_latido, y se procesan con una función procesar(trabajo_id) que
+# devuelve False si el trabajo ya lo tomó otro worker.
+
+
+def trabajos_pendientes(modelo):
+    """Ids de los trabajos pendientes, del más antiguo al más reciente."""
+    return list(modelo.objects.filter(estado=modelo.Estado.PENDIENTE)
+                .order_by('fecha_creacion').values_list('id', flat=True))
+
+
+def tomar_trabajo(modelo, trabajo_id):
+    """Pasa el trabajo de pendiente a en proceso; False si ya lo tomó otro worker."""
+    ahora = timezone.now()
+    return bool(modelo.objects.filter(pk=trabajo_id, estado=modelo.Estado.PENDIENTE).update(
+        estado=modelo.Estado.EN_PROCESO, fecha_inicio=ahora, fecha_latido=ahora))
+
+
+def registrar_latido(modelo, trabajo_id):
+    """Deja constancia de que el worker sigue avanzando con el trabajo."""
+    modelo.objects.filter(pk=trabajo_id).update(fecha_latido=timezone.now())
+
+
+def recuperar_abandonados(modelo, expiracion, **cambios):
+    """
+    Aplica 'cambios' (p. ej. volver a pendiente o marcar el error) a los
+    trabajos en proceso que no registran latido desde hace 'expiracion'
+    segundos: los dejó así un hilo o un worker que murió a mitad de camino.
+    Devuelve los ids recuperados.
+    """
+    limite = timezone.now() - timedelta(seconds=expiracion)
+    abandonados_qs = modelo.objects.filter(estado=modelo.Estado.EN_PROCESO).filter(
+        Q(fecha_latido__lt=limite) | Q(fecha_latido__isnull=True, fecha_inicio__lt=limite))
+    recuperados = []
+    for trabajo_id in abandonados_qs.values_list('id', flat=True):
+        # La condición se repite al actualizar: otro worker pudo recuperarlo antes.
+        if abandonados_qs.filter(pk=trabajo_id).update(**cambios):
+            logger.warning(f"{modelo._meta.verbose_name} {trabajo_id} sin avance desde antes de {limite}: "
+                           f"se da por abandonado.")
+            recuperados.append(trabajo_id)
+    return recuperados
+
+
+def _ejecutar_en_hilo(procesar, trabajo_id):
+    try:
+        procesar(trabajo_id)
+    finally:
+        # El hilo tiene su propia conexión a la base de datos.
+        connection.close()
+
+
+def _iniciar_hilo(procesar, nombre, trabajo_id):
+    threading.Thread(target=_ejecutar_en_hilo, args=(procesar, trabajo_id), daemon=True,
+                     name=f"{nombre}-{trabajo_id}").start()
+
+
+def lanzar_en_hilos(procesar, trabajo_ids, nombre):
+    """
+    Ejecuta procesar(trabajo_id) en un hilo local por trabajo. Los hilos se
+    inician tras el commit para que vean los trabajos ya guardados.
+    """
+    for trabajo_id in trabajo_ids:
+        transaction.on_commit(partial(_iniciar_hilo, procesar, nombre, trabajo_id))
@@ -0,0 +1,181 @@
+# gestion/services/trabajos_sla.py
+
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .contexto_sla import obtener_contexto_sla
+from .guardado_sla import aplicar_resultados_sla, guardar_resultados_sla, guardar_segmentos
+from .sla_incremental import version_actual
+from .sla_paralelo import abrir_pool_sla, calcular_sla_contexto
+from .trabajos import lanzar_en_hilos, recuperar_abandonados, registrar_latido, tomar_trabajo
+from .vencimiento_sla import actualizar_vencimientos
+
+logger = logging.getLogger(__name__)
+
+# Un solo recálculo de vencimientos a la vez en cada proceso: el trabajo
+# pendiente espera aquí y, mientras tanto, sigue acumulando pedidos.
+_lock_vencimientos = threading.Lock()
+
+
+def crear_trabajo(incidencia_ids=None, solo_obsoletas=False):
+    """
+    Registra un TrabajoSLA con la lista de incidencias a calcular, resuelta en
+    el momento de crearlo (las seleccionadas y/o las marcadas como obsoletas).
+    """
+    from ..models import Incidencia, TrabajoSLA
+
+    incidencias_qs = Incidencia.objects.all()
+    if incidencia_ids:
+        incidencias_qs = incidencias_qs.filter(id__in=incidencia_ids)
+    if solo_obsoletas:
+        incidencias_qs = incidencias_qs.filter(sla_obsoleto=True)
+    ids = list(incidencias_qs.order_by('id').values_list('id', flat=True))
+    return TrabajoSLA.objects.create(incidencia_ids=ids, total=len(ids))
+
+
+def encolar_vencimientos(filtro=None):
+    """
+    Pide recalcular el vencimiento proyectado de las incidencias abiertas que
+    cumplan 'filtro' (kwargs de filter(); todas si es None) tras un cambio de
+    reglas, gestores o calendarios. Los pedidos se suman a un único TrabajoSLA
+    de vencimientos pendiente, así que editar varios feriados seguidos
+    produce un solo recálculo. Debe llamarse tras el commit.
+    """
+    from ..models import TrabajoSLA
+
+    filtro = filtro or {}
+    with transaction.atomic():
+        trabajo = TrabajoSLA.objects.select_for_update().filter(
+            tipo=TrabajoSLA.Tipo.VENCIMIENTOS, estado=TrabajoSLA.Estado.PENDIENTE).first()
+        if trabajo is not None:
+            if {} not in trabajo.filtros and filtro not in trabajo.filtros:
+                trabajo.filtros = [filtro] if not filtro else trabajo.filtros + [filtro]
+                trabajo.save(update_fields=['filtros'])
+            return trabajo
+        trabajo = TrabajoSLA.objects.create(tipo=TrabajoSLA.Tipo.VENCIMIENTOS, filtros=[filtro])
+    lanzar_trabajo(trabajo)
+    return trabajo
+
+
+def _procesar_vencimientos(trabajo_id):
+    from ..models import TrabajoSLA
+
+    with _lock_vencimientos:
+        if not tomar_trabajo(TrabajoSLA, trabajo_id):
+            return False
+        # Los filtros se leen ya tomado el trabajo: los pedidos posteriores van a uno nuevo.
+        trabajo = TrabajoSLA.objects.get(pk=trabajo_id)
+        try:
+            revisadas = 0
+            for filtro in trabajo.filtros:
+                revisadas += actualizar_vencimientos(filtro)
+                registrar_latido(TrabajoSLA, trabajo_id)
+            TrabajoSLA.objects.filter(pk=trabajo_id).update(
+                estado=TrabajoSLA.Estado.COMPLETADO, procesadas=revisadas, total=revisadas, fecha_fin=timezone.now())
+        except Exception as e:
+            logger.error(f"Error en el trabajo SLA {trabajo_id}: {e}", exc_info=True)
+            TrabajoSLA.objects.filter(pk=trabajo_id).update(
+                estado=TrabajoSLA.Estado.ERROR, mensaje=str(e), fecha_fin=timezone.now())
+    return True
+
+
+def recuperar_trabajos_abandonados():
+    """
+    Devuelve a pendientes los TrabajoSLA en proceso que no registran avance
+    desde hace settings.SLA_TRABAJO_EXPIRACION segundos (ver
+    trabajos.recuperar_abandonados). El avance vuelve a cero; los bloques ya
+    guardados se recalculan con el mismo resultado. Devuelve los ids recuperados.
+    """
+    from ..models import TrabajoSLA
+
+    return recuperar_abandonados(
+        TrabajoSLA, getattr(settings, 'SLA_TRABAJO_EXPIRACION', 1800),
+        estado=TrabajoSLA.Estado.PENDIENTE, procesadas=0, conteos={}, fecha_inicio=None, fecha_latido=None)
+
+
+def _guardar_bloque(trabajo_id, incidencias, resultados, version):
+    from ..models import TrabajoSLA
+
+    conteos = aplicar_resultados_sla(incidencias, resultados, version)
+    with transaction.atomic():
+        # Resultados y avance del trabajo se confirman juntos.
+        guardar_resultados_sla(incidencias, resultados)
+        trabajo = TrabajoSLA.objects.select_for_update().get(pk=trabajo_id)
+        trabajo.procesadas = F('procesadas') + len(incidencias)
+        trabajo.conteos = dict(Counter(trabajo.conteos) + conteos)
+        trabajo.fecha_latido = timezone.now()
+        trabajo.save(update_fields=['procesadas', 'conteos', 'fecha_latido'])
+
+
+def calcular_por_bloques(bloques, workers=1):
+    """
+    Calcula el SLA de cada bloque de incidencias de 'bloques' (listas, que
+    pueden leerse a medida que se piden) con un mismo contexto y un solo pool
+    de 'workers' procesos para todos: los workers reciben el contexto una
+    vez. Entrega (bloque, resultados, versión) y deja el guardado a quien
+    llama; es el bucle común de procesar_trabajo y del comando calcular_sla.
+    """
+    # La versión se lee antes que el contexto: las marcas posteriores dejan la incidencia obsoleta.
+    version = version_actual()
+    contexto = obtener_contexto_sla()
+    with abrir_pool_sla(contexto, workers) as pool:
+        for bloque in bloques:
+            yield bloque, calcular_sla_contexto(bloque, contexto, pool, con_segmentos=guardar_segmentos()), version
+
+
+def procesar_trabajo(trabajo_id, workers=1):
+    """
+    Ejecuta un TrabajoSLA pendiente por bloques de settings.SLA_TRABAJO_BLOQUE
+    incidencias. Cada bloque se guarda en su propia transacción, así que un
+    fallo a mitad de camino deja guardados los bloques ya terminados.
+    Con 'workers' > 1 (o None = settings.SLA_WORKERS) abre un solo pool de
+    procesos para todo el trabajo; por defecto calcula en el mismo proceso,
+    como corresponde al hilo lanzado desde una vista. Los trabajos de
+    vencimientos se delegan en actualizar_vencimientos, uno a la vez.
+    Devuelve False si el trabajo ya lo tomó otro worker.
+    """
+    from ..models import Incidencia, TrabajoSLA
+
+    tipo = TrabajoSLA.objects.filter(pk=trabajo_id).values_list('tipo', flat=True).first()
+    if tipo == TrabajoSLA.Tipo.VENCIMIENTOS:
+        return _procesar_vencimientos(trabajo_id)
+
+    if not tomar_trabajo(TrabajoSLA, trabajo_id):
+        return False
+
+    trabajo = TrabajoSLA.objects.get(pk=trabajo_id)
+    tamano_bloque = getattr(settings, 'SLA_TRABAJO_BLOQUE', 1000)
+    bloques = (list(Incidencia.objects.filter(id__in=trabajo.incidencia_ids[i:i + tamano_bloque])
+                    .select_related('aplicacion__criticidad', 'severidad'))
+               for i in range(0, len(trabajo.incidencia_ids), tamano_bloque))
+    try:
+        for incidencias, resultados, version in calcular_por_bloques(bloques, workers):
+            _guardar_bloque(trabajo_id, incidencias, resultados, version)
+
+        TrabajoSLA.objects.filter(pk=trabajo_id).update(
+            estado=TrabajoSLA.Estado.COMPLETADO, fecha_fin=timezone.now())
+        trabajo.refresh_from_db()
+        logger.info(
+            f"Trabajo SLA {trabajo_id} completado: {trabajo.procesadas}/{trabajo.total} incidencias {trabajo.conteos}")
+    except Exception as e:
+        logger.error(f"Error en el trabajo SLA {trabajo_id}: {e}", exc_info=True)
+        TrabajoSLA.objects.filter(pk=trabajo_id).update(
+            estado=TrabajoSLA.Estado.ERROR, mensaje=str(e), fecha_fin=timezone.now())
+    return True
+
+
+def lanzar_trabajo(trabajo):
+    """
+    Inicia el trabajo en un hilo local si settings.SLA_TRABAJOS_EN_HILO lo
+    permite, junto con los abandonados que se recuperen en ese momento (sin
+    el comando procesar_trabajos_sla nadie más los volvería a tomar).
+    """
+    if not getattr(settings, 'SLA_TRABAJOS_EN_HILO', True):
+        return
+    lanzar_en_hilos(procesar_trabajo, [trabajo.pk, *recuperar_trabajos_abandonados()], 'trabajo-sla')
@@ -0,0 +1,88 @@
+# gestion/services/vencimiento_sla.py
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .contexto_sla import obtener_contexto_sla
+from .guardado_sla import iterar_por_id, vencimiento_aware
+from .sla_paralelo import calcular_sla_contexto
+
+logger = logging.getLogger(__name__)
+
+
+def actualizar_vencimientos(filtro=None):
+    """
+    Recalcula y guarda el vencimiento proyectado (vencimiento_sla) de las
+    incidencias abiertas que cumplan 'filtro' (kwargs de filter(); todas si
+    es None). Solo escribe esa columna: el resto del SLA guardado no cambia.
+    Devuelve la cantidad de incidencias revisadas.
+    """
+    from ..models import Incidencia
+
+    incidencias_qs = Incidencia.objects.select_related('aplicacion__criticidad', 'severidad').filter(
+        fecha_ultima_resolucion__isnull=True, **(filtro or {}))
+    contexto = obtener_contexto_sla()
+    total = 0
+    for bloque in iterar_por_id(incidencias_qs):
+        resultados = calcular_sla_contexto(bloque, contexto)
+        cambiadas = []
+        for inc, resultado in zip(bloque, resultados):
+            vencimiento = vencimiento_aware(inc, resultado.get("vencimiento_sla"))
+            if vencimiento != inc.vencimiento_sla:
+                inc.vencimiento_sla = vencimiento
+                cambiadas.append(inc)
+        Incidencia.objects.bulk_update(cambiadas, ['vencimiento_sla'],
+                                       batch_size=getattr(settings, 'SLA_GUARDADO_LOTE', 500))
+        total += len(bloque)
+    logger.info(f"Vencimiento de SLA revisado en {total} incidencias abiertas.")
+    return total
+
+
+def actualizar_vencimiento(incidencia_id):
+    """
+    Recalcula el vencimiento proyectado de una sola incidencia abierta, en
+    el mismo proceso. Es lo que usa la señal de Incidencia al guardar; los
+    cambios de reglas o calendario van por trabajos_sla.encolar_vencimientos.
+    """
+    from ..models import Incidencia
+
+    inc = Incidencia.objects.select_related('aplicacion__criticidad', 'severidad').filter(
+        pk=incidencia_id, fecha_ultima_resolucion__isnull=True).first()
+    if inc is None:
+        return
+    resultado, = calcular_sla_contexto([inc], obtener_contexto_sla())
+    vencimiento = vencimiento_aware(inc, resultado.get("vencimiento_sla"))
+    if vencimiento != inc.vencimiento_sla:
+        Incidencia.objects.filter(pk=inc.pk).update(vencimiento_sla=vencimiento)
+
+
+def incidencias_en_riesgo(horas=4, limite=None):
+    """
+    Incidencias abiertas cuyo SLA vence entre ahora y ahora + 'horas',
+    ordenadas por vencimiento. Las ya vencidas quedan fuera (ver
+    incidencias_vencidas): si no, las atrasadas hace días ocuparían el límite
+    y ocultarían las que están por vencer. Es una sola consulta por rango
+    sobre el índice de vencimiento_sla.
+    """
+    from ..models import Incidencia
+
+    ahora = timezone.now()
+    incidencias_qs = Incidencia.objects.select_related('aplicacion', 'severidad', 'usuario_asignado').filter(
+        vencimiento_sla__gte=ahora, vencimiento_sla__lte=ahora + timedelta(hours=horas),
+        fecha_ultima_resolucion__isnull=True).order_by('vencimiento_sla')
+    return incidencias_qs[:limite] if limite else incidencias_qs
+
+
+def incidencias_vencidas(limite=None):
+    """
+    Incidencias abiertas cuyo vencimiento proyectado ya pasó, de la más
+    atrasada a la más reciente.
+    """
+    from ..models import Incidencia
+
+    incidencias_qs = Incidencia.objects.select_related('aplicacion', 'severidad', 'usuario_asignado').filter(
+        vencimiento_sla__lt=timezone.now(), fecha_ultima_resolucion__isnull=True).order_by('vencimiento_sla')
+    return incidencias_qs[:limite] if limite else incidencias_qs
@@ -0,0 +1,218 @@
+# gestion/signals.py
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import (Aplicacion, Bloque, CalendarioLaboral, DiaFeriado, FeriadoCalendario, GrupoResolutor, HorarioLaboral,
+                     Incidencia, ReglaSLA, Severidad, Usuario, VentanaCalendario)
+from .services import sla_incremental, trabajos_sla, vencimiento_sla
+from .services.contexto_sla import invalidar_contexto_sla
+
+
+@receiver(post_save, sender=HorarioLaboral)
+@receiver(post_delete, sender=HorarioLaboral)
+@receiver(post_save, sender=DiaFeriado)
+@receiver(post_delete, sender=DiaFeriado)
+@receiver(post_save, sender=ReglaSLA)
+@receiver(post_delete, sender=ReglaSLA)
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+@receiver(post_save, sender=CalendarioLaboral)
+@receiver(post_delete, sender=CalendarioLaboral)
+@receiver(post_save, sender=VentanaCalendario)
+@receiver(post_delete, sender=VentanaCalendario)
+@receiver(post_save, sender=FeriadoCalendario)
+@receiver(post_delete, sender=FeriadoCalendario)
+def contexto_sla_modificado(sender, instance, **kwargs):
+    """Fuerza la reconstrucción del contexto de SLA (gestores, reglas y calendarios)."""
+    if _sin_cambios_sla(instance, kwargs):
+        return
+    # Tras el commit, para que ningún proceso reconstruya con datos aún no confirmados.
+    transaction.on_commit(invalidar_contexto_sla)
+    # Con reglas, calendario o gestores nuevos cambia el vencimiento proyectado;
+    # los cambios seguidos se acumulan en un solo trabajo pendiente.
+    transaction.on_commit(trabajos_sla.encolar_vencimientos)
+
+
+# --- Recálculo incremental del SLA ---
+# Los pre_save guardan los valores anteriores para marcar también las
+# incidencias que dependían de ellos.
+
+def _valor_anterior(sender, instance, campos):
+    if not instance.pk:
+        return None
+    return sender.objects.filter(pk=instance.pk).values(*campos).first()
+
+
+# Campos de cada modelo de los que depende el SLA.
+_CAMPOS_SLA = {
+    ReglaSLA: ('severidad_id', 'criticidad_aplicacion_id', 'tiempo_sla'),
+    DiaFeriado: ('fecha',),
+    Usuario: ('usuario',),
+    Aplicacion: ('criticidad_id',),
+    Severidad: ('desc_severidad',),
+    Bloque: ('calendario_id',),
+    GrupoResolutor: ('calendario_id',),
+    HorarioLaboral: ('dia_semana', 'hora_inicio', 'hora_fin'),
+    CalendarioLaboral: ('usa_feriados_generales',),
+    VentanaCalendario: ('calendario_id', 'dia_semana', 'hora_inicio', 'hora_fin'),
+    FeriadoCalendario: ('calendario_id', 'fecha'),
+}
+
+
+@receiver(pre_save, sender=ReglaSLA)
+@receiver(pre_save, sender=DiaFeriado)
+@receiver(pre_save, sender=Usuario)
+@receiver(pre_save, sender=Aplicacion)
+@receiver(pre_save, sender=Severidad)
+@receiver(pre_save, sender=Bloque)
+@receiver(pre_save, sender=GrupoResolutor)
+@receiver(pre_save, sender=HorarioLaboral)
+@receiver(pre_save, sender=CalendarioLaboral)
+@receiver(pre_save, sender=VentanaCalendario)
+@receiver(pre_save, sender=FeriadoCalendario)
+def guardar_valor_anterior(sender, instance, **kwargs):
+    instance._sla_anterior = _valor_anterior(sender, instance, _CAMPOS_SLA[sender])
+
+
+def _sin_cambios_sla(instance, kwargs):
+    """True si fue un post_save de un registro existente que no cambió ningún campo de _CAMPOS_SLA."""
+    anterior = getattr(instance, '_sla_anterior', None)
+    if kwargs.get('created') is not False or not anterior:
+        return False
+    return all(getattr(instance, campo) == valor for campo, valor in anterior.items())
+
+
+@receiver(post_save, sender=ReglaSLA)
+@receiver(post_delete, sender=ReglaSLA)
+def regla_sla_modificada(sender, instance, **kwargs):
+    anterior = getattr(instance, '_sla_anterior', None)
+    if anterior and anterior['tiempo_sla'] == instance.tiempo_sla and \
+            (anterior['severidad_id'], anterior['criticidad_aplicacion_id']) == \
+            (instance.severidad_id, instance.criticidad_aplicacion_id):
+        return
+    sla_incremental.marcar_por_regla(instance.severidad_id, instance.criticidad_aplicacion_id)
+    if anterior:
+        sla_incremental.marcar_por_regla(anterior['severidad_id'], anterior['criticidad_aplicacion_id'])
+    sla_incremental.incrementar_version()
+
+
+@receiver(post_save, sender=HorarioLaboral)
+@receiver(post_delete, sender=HorarioLaboral)
+def horario_modificado(sender, instance, **kwargs):
+    if _sin_cambios_sla(instance, kwargs):
+        return
+    sla_incremental.marcar_por_horario()
+    sla_incremental.incrementar_version()
+
+
+@receiver(post_save, sender=DiaFeriado)
+@receiver(post_delete, sender=DiaFeriado)
+def feriado_modificado(sender, instance, **kwargs):
+    anterior = getattr(instance, '_sla_anterior', None)
+    if anterior and anterior['fecha'] == instance.fecha and kwargs.get('created') is False:
+        return
+    sla_incremental.marcar_por_feriado(instance.fecha)
+    if anterior:
+        sla_incremental.marcar_por_feriado(anterior['fecha'])
+    sla_incremental.incrementar_version()
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def gestor_modificado(sender, instance, **kwargs):
+    anterior = getattr(instance, '_sla_anterior', None)
+    if anterior and anterior['usuario'] == instance.usuario and kwargs.get('created') is False:
+        return
+    sla_incremental.marcar_por_usuario(instance.usuario)
+    if anterior:
+        sla_incremental.marcar_por_usuario(anterior['usuario'])
+    sla_incremental.incrementar_version()
+
+
+@receiver(post_save, sender=Aplicacion)
+def criticidad_aplicacion_modificada(sender, instance, created, **kwargs):
+    anterior = getattr(instance, '_sla_anterior', None)
+    if not created and anterior and anterior['criticidad_id'] != instance.criticidad_id:
+        sla_incremental.marcar_por_aplicacion(instance.pk)
+        transaction.on_commit(partial(trabajos_sla.encolar_vencimientos, {'aplicacion_id': instance.pk}))
+
+
+@receiver(post_save, sender=Severidad)
+def severidad_modificada(sender, instance, created, **kwargs):
+    # El nombre decide si la severidad es 24/7 ('critica').
+    anterior = getattr(instance, '_sla_anterior', None)
+    if not created and anterior and anterior['desc_severidad'] != instance.desc_severidad:
+        sla_incremental.marcar_por_severidad(instance.pk)
+        transaction.on_commit(partial(trabajos_sla.encolar_vencimientos, {'severidad_id': instance.pk}))
+
+
+@receiver(post_save, sender=VentanaCalendario)
+@receiver(post_delete, sender=VentanaCalendario)
+@receiver(post_save, sender=FeriadoCalendario)
+@receiver(post_delete, sender=FeriadoCalendario)
+@receiver(post_save, sender=CalendarioLaboral)
+@receiver(pre_delete, sender=CalendarioLaboral)
+def calendario_laboral_modificado(sender, instance, **kwargs):
+    if _sin_cambios_sla(instance, kwargs):
+        return
+    # En pre_delete: después del borrado los bloques y grupos ya no lo referencian.
+    calendario_id = instance.pk if sender is CalendarioLaboral else instance.calendario_id
+    sla_incremental.marcar_por_calendario(calendario_id)
+    sla_incremental.incrementar_version()
+
+
+@receiver(post_save, sender=Bloque)
+@receiver(post_save, sender=GrupoResolutor)
+def calendario_asignado(sender, instance, created, **kwargs):
+    """Al cambiar el calendario de un bloque o grupo resolutor cambia el de sus incidencias."""
+    anterior = getattr(instance, '_sla_anterior', None)
+    if created or not anterior or anterior['calendario_id'] == instance.calendario_id:
+        return
+    if sender is Bloque:
+        sla_incremental.marcar_por_bloque(instance.pk)
+        filtro = {'bloque_id': instance.pk}
+    else:
+        sla_incremental.marcar_por_grupo_resolutor(instance.pk)
+        filtro = {'grupo_resolutor_id': instance.pk}
+    sla_incremental.incrementar_version()
+    transaction.on_commit(invalidar_contexto_sla)
+    transaction.on_commit(partial(trabajos_sla.encolar_vencimientos, filtro))
+
+
+@receiver(pre_save, sender=Incidencia)
+def incidencia_modificada(sender, instance, update_fields=None, **kwargs):
+    """Marca la incidencia como pendiente si cambió alguno de sus datos de SLA."""
+    if instance.fecha_ultima_resolucion and instance.vencimiento_sla:
+        # Una incidencia resuelta ya no tiene vencimiento pendiente.
+        instance.vencimiento_sla = None
+        if update_fields is not None and 'vencimiento_sla' not in update_fields:
+            Incidencia.objects.filter(pk=instance.pk).update(vencimiento_sla=None)
+    elif (instance.pk and instance.fecha_ultima_resolucion is None and instance.vencimiento_sla is None
+          and (update_fields is None or 'fecha_ultima_resolucion' in update_fields)
+          and Incidencia.objects.filter(pk=instance.pk, fecha_ultima_resolucion__isnull=False).exists()):
+        # Reapertura: la resolución borró el vencimiento; se vuelve a proyectar en post_save.
+        instance._vencimiento_pendiente = True
+    if update_fields is not None and not {'bitacora', 'severidad', 'aplicacion', 'bloque', 'grupo_resolutor'} & set(update_fields):
+        return
+    if sla_incremental.firma_entrada_sla(instance) != instance.sla_firma_entrada:
+        # El vencimiento se vuelve a proyectar en post_save (ver vencimiento_incidencia).
+        instance._vencimiento_pendiente = True
+        # Versión nueva aunque ya estuviera obsoleta: invalida un cálculo en curso.
+        instance.sla_obsoleto = True
+        instance.sla_version = sla_incremental.incrementar_version()
+        if update_fields is not None and not {'sla_obsoleto', 'sla_version'} <= set(update_fields):
+            # save(update_fields=...) no escribiría la marca: se guarda aparte.
+            Incidencia.objects.filter(pk=instance.pk).update(
+                sla_obsoleto=True, sla_version=instance.sla_version)
+
+
+@receiver(post_save, sender=Incidencia)
+def vencimiento_incidencia(sender, instance, created, **kwargs):
+    """Proyecta el vencimiento de SLA de una incidencia abierta nueva o con datos de SLA cambiados."""
+    pendiente, instance._vencimiento_pendiente = getattr(instance, '_vencimiento_pendiente', False), False
+    if instance.fecha_ultima_resolucion is None and (created or pendiente):
+        transaction.on_commit(partial(vencimiento_sla.actualizar_vencimiento, instance.pk))
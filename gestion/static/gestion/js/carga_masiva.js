@@ -47,4 +47,42 @@ $(document).ready(function() {
             });
         }
     }
+
+
+    // 3. Avance de la carga encolada (TrabajoCarga)
+    // ---------------------------------------------
+    // El servidor procesa el archivo en segundo plano; se consulta su estado
+    // hasta que termina y se actualizan los contadores.
+
+    const estadoCarga = $('#estado-carga');
+
+    function consultarEstadoCarga() {
+        fetch(estadoCarga.data('estado-url'))
+            .then(response => response.json())
+            .then(data => {
+                ['procesadas', 'creadas', 'actualizadas', 'omitidas', 'fallidas'].forEach(function(contador) {
+                    estadoCarga.find('[data-contador="' + contador + '"]').text(data[contador]);
+                });
+                if (data.errores_url) {
+                    $('#descargar-errores').attr('href', data.errores_url).prop('hidden', false);
+                }
+                const texto = estadoCarga.find('.estado-carga-texto');
+                if (data.estado === 'completado') {
+                    texto.text('¡Carga completada!');
+                } else if (data.estado === 'error') {
+                    texto.text('Error: ' + data.mensaje);
+                } else {
+                    texto.text(data.estado === 'pendiente' ? 'En cola...' : 'Procesando...');
+                    setTimeout(consultarEstadoCarga, 2000);
+                }
+            })
+            .catch(error => {
+                console.error('Error consultando el estado de la carga masiva:', error);
+                estadoCarga.find('.estado-carga-texto').text('Ocurrió un error de comunicación con el servidor.');
+            });
+    }
+
+    if (estadoCarga.length > 0) {
+        consultarEstadoCarga();
+    }
 });
\ No newline at end of file
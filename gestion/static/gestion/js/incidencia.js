@@ -122,38 +122,85 @@ $(document).ready(function() {
         $('.incidencia-checkbox').prop('checked', this.checked);
     });
 
-    // Lógica para el botón "Asignar SLA"
-    $('#btn-asignar-sla').on('click', function() {
-        var selected_ids = [];
-        $('.incidencia-checkbox:checked').each(function() {
-            selected_ids.push($(this).val());
+    function getCookie(name) {
+        let cookieValue = null;
+        if (document.cookie && document.cookie !== '') {
+            const cookies = document.cookie.split(';');
+            for (let i = 0; i < cookies.length; i++) {
+                const cookie = cookies[i].trim();
+                if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                    cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                    break;
+                }
+            }
+        }
+        return cookieValue;
+    }
+
+    function actualizarFilasSla(results) {
+        results.forEach(function(result) {
+            var fila = $('tr[data-incidencia-id="' + result.id + '"]');
+            fila.find('.celda-cumple-sla').text(result.cumple_sla);
+            fila.find('.celda-tiempo-sla').text(formatSlaToHHMMSS(result.tiempo_sla));
         });
+    }
 
-        if (selected_ids.length === 0) {
-            alert('Por favor, selecciona al menos una incidencia para calcular el SLA.');
-            return;
-        }
+    // Trae los resultados de un trabajo terminado página por página
+    function cargarResultadosSla(url, procesadas, textoOriginal) {
+        fetch(url)
+            .then(response => response.json())
+            .then(data => {
+                actualizarFilasSla(data.results);
+                if (data.siguiente) {
+                    cargarResultadosSla(data.siguiente, procesadas, textoOriginal);
+                } else {
+                    finalizarCalculoSla(textoOriginal);
+                    alert('Se procesaron ' + procesadas + ' incidencias.');
+                }
+            })
+            .catch(error => {
+                console.error('Error consultando los resultados del cálculo de SLA:', error);
+                finalizarCalculoSla(textoOriginal);
+                alert('Ocurrió un error de comunicación con el servidor.');
+            });
+    }
 
-        $('#loading-spinner').css('display', 'flex');
+    function finalizarCalculoSla(textoOriginal) {
+        $('#loading-spinner .spinner-texto').text(textoOriginal);
+        $('#loading-spinner').hide();
+    }
 
-        function getCookie(name) {
-            let cookieValue = null;
-            if (document.cookie && document.cookie !== '') {
-                const cookies = document.cookie.split(';');
-                for (let i = 0; i < cookies.length; i++) {
-                    const cookie = cookies[i].trim();
-                    if (cookie.substring(0, name.length + 1) === (name + '=')) {
-                        cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
-                        break;
-                    }
+    // Consulta el avance del trabajo de SLA hasta que termina
+    function consultarTrabajoSla(estadoUrl, textoOriginal) {
+        fetch(estadoUrl)
+            .then(response => response.json())
+            .then(data => {
+                if (data.estado === 'completado') {
+                    cargarResultadosSla(data.resultados_url, data.procesadas, textoOriginal);
+                } else if (data.estado === 'error') {
+                    finalizarCalculoSla(textoOriginal);
+                    alert('Error: ' + data.mensaje);
+                } else {
+                    $('#loading-spinner .spinner-texto').text(
+                        'Calculando SLA... ' + data.procesadas + ' / ' + data.total);
+                    setTimeout(function() {
+                        consultarTrabajoSla(estadoUrl, textoOriginal);
+                    }, 2000);
                 }
-            }
-            return cookieValue;
-        }
-        const csrftoken = getCookie('csrftoken');
+            })
+            .catch(error => {
+                console.error('Error consultando el estado del cálculo de SLA:', error);
+                finalizarCalculoSla(textoOriginal);
+                alert('Ocurrió un error de comunicación con el servidor.');
+            });
+    }
 
-        // Se obtiene la URL del atributo data-url del botón
-        const url = $(this).data('url');
+    // Encola el cálculo de SLA en el servidor y sigue su avance
+    function solicitarCalculoSla(url, payload) {
+        const textoOriginal = $('#loading-spinner .spinner-texto').text();
+        $('#loading-spinner').css('display', 'flex');
+        const csrftoken = getCookie('csrftoken');
+        payload.asincrono = true;
 
         fetch(url, {
                 method: 'POST',
@@ -161,29 +208,47 @@ $(document).ready(function() {
                     'Content-Type': 'application/json',
                     'X-CSRFToken': csrftoken
                 },
-                body: JSON.stringify({
-                    'incidencia_ids': selected_ids
-                })
+                body: JSON.stringify(payload)
             })
             .then(response => response.json())
             .then(data => {
                 if (data.status === 'success') {
-                    alert(data.message);
-                    data.results.forEach(function(result) {
-                        var fila = $('tr[data-incidencia-id="' + result.id + '"]');
-                        fila.find('.celda-cumple-sla').text(result.cumple_sla);
-                        fila.find('.celda-tiempo-sla').text(formatSlaToHHMMSS(result.tiempo_sla));
-                    });
+                    consultarTrabajoSla(data.estado_url, textoOriginal);
                 } else {
+                    finalizarCalculoSla(textoOriginal);
                     alert('Error: ' + data.message);
                 }
-                $('#loading-spinner').hide();
             })
             .catch(error => {
                 console.error('Error en la petición AJAX:', error);
                 alert('Ocurrió un error de comunicación con el servidor.');
-                $('#loading-spinner').hide();
+                finalizarCalculoSla(textoOriginal);
             });
+    }
+
+    // Lógica para el botón "Asignar SLA"
+    $('#btn-asignar-sla').on('click', function() {
+        var selected_ids = [];
+        $('.incidencia-checkbox:checked').each(function() {
+            selected_ids.push($(this).val());
+        });
+
+        if (selected_ids.length === 0) {
+            alert('Por favor, selecciona al menos una incidencia para calcular el SLA.');
+            return;
+        }
+
+        // Se obtiene la URL del atributo data-url del botón
+        solicitarCalculoSla($(this).data('url'), {
+            'incidencia_ids': selected_ids
+        });
+    });
+
+    // Recalcula solo las incidencias cuyos datos de SLA cambiaron
+    $('#btn-recalcular-sla-obsoletos').on('click', function() {
+        solicitarCalculoSla($(this).data('url'), {
+            'solo_obsoletas': true
+        });
     });
 
     // Código para exportar CSV
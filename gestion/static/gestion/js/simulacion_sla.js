@@ -0,0 +1,99 @@
+// gestion\static\gestion\js\simulacion_sla.js
+
+$(document).ready(function() {
+
+    // Solo se envían las reglas cuyo valor difiere del vigente.
+    function reglasModificadas() {
+        const reglas = [];
+        $('.input-regla').each(function() {
+            const horas = parseFloat($(this).val());
+            if (!isNaN(horas) && horas !== parseFloat($(this).data('original'))) {
+                reglas.push({
+                    severidad_id: $(this).data('severidad-id'),
+                    criticidad_id: $(this).data('criticidad-id'),
+                    horas: horas
+                });
+            }
+        });
+        return reglas;
+    }
+
+    // Solo se envían los días cuyo horario difiere del vigente.
+    function horariosModificados() {
+        const horarios = [];
+        $('.fila-horario').each(function() {
+            const inicio = $(this).find('.input-hora-inicio').val();
+            const fin = $(this).find('.input-hora-fin').val();
+            if (inicio + '-' + fin !== String($(this).data('original'))) {
+                horarios.push({
+                    dia_semana: $(this).data('dia-semana'),
+                    hora_inicio: inicio,
+                    hora_fin: fin
+                });
+            }
+        });
+        return horarios;
+    }
+
+    function formatearPorcentaje(valor) {
+        return valor === null ? 'N/A' : valor.toFixed(2) + ' %';
+    }
+
+    function mostrarResultado(data) {
+        const cuerpo = $('#tabla-resultado-simulacion tbody').empty();
+        data.filas.forEach(function(fila) {
+            let diferencia = 'N/A';
+            let clase = '';
+            if (fila.cumple_actual !== null && fila.cumple_simulado !== null) {
+                const delta = fila.cumple_simulado - fila.cumple_actual;
+                diferencia = (delta > 0 ? '+' : '') + delta.toFixed(2) + ' pp';
+                clase = delta > 0 ? 'mejora' : (delta < 0 ? 'empeora' : '');
+            }
+            const tr = $('<tr>');
+            [fila.severidad, fila.criticidad, fila.sla_actual, fila.sla_simulado,
+                fila.evaluadas_simulado, formatearPorcentaje(fila.cumple_actual),
+                formatearPorcentaje(fila.cumple_simulado)
+            ].forEach(function(valor) {
+                tr.append($('<td>').text(valor));
+            });
+            tr.append($('<td>').addClass(clase).text(diferencia));
+            cuerpo.append(tr);
+        });
+        $('#resumen-simulacion').text(
+            data.total + ' incidencias evaluadas en ' + data.segundos + ' s.');
+        $('#resultado-simulacion').show();
+    }
+
+    $('#form-simulacion-sla').on('submit', function(e) {
+        e.preventDefault();
+        const payload = {
+            fecha_desde: $('#fecha_desde').val(),
+            fecha_hasta: $('#fecha_hasta').val(),
+            reglas: reglasModificadas(),
+            horarios: horariosModificados()
+        };
+        $('#loading-spinner').css('display', 'flex');
+
+        fetch($(this).data('url'), {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': $('input[name="csrfmiddlewaretoken"]').val()
+                },
+                body: JSON.stringify(payload)
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.status === 'success') {
+                    mostrarResultado(data);
+                } else {
+                    alert('Error: ' + data.message);
+                }
+            })
+            .catch(error => {
+                console.error('Error en la petición AJAX:', error);
+                alert('Ocurrió un error de comunicación con el servidor.');
+            })
+            .finally(() => $('#loading-spinner').hide());
+    });
+});
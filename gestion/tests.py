@@ -1,3 +1,1322 @@
-from django.test import TestCase
+import csv
+import json
+import random
+import shutil
+import tempfile
+from collections import Counter
+from datetime import date, datetime, time as hora, timedelta
+from importlib.util import find_spec
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook
+
+from gestion.management.commands import calcular_sla as calcular_sla_comando
+from gestion.management.commands.benchmark_bitacora import generar_bitacora, parsear_bitacora_regex
+from gestion.management.commands.benchmark_sla import (_FERIADOS, _GESTORES, _HORARIOS, _REGLAS, PERFILES,
+                                                       calcular_tiempo_efectivo_por_segundo, generar_incidencia,
+                                                       sla_referencia)
+from gestion.models import (Aplicacion, BitacoraParseada, Bloque, CalendarioLaboral, Cluster, CodigoCierre, Criticidad,
+                            DiaFeriado, Estado, FeriadoCalendario, GrupoResolutor, HorarioLaboral, Impacto, Incidencia,
+                            IncidenciaSegmento, Interfaz, ReglaSLA, Severidad, TrabajoCarga, TrabajoSLA, Usuario,
+                            VentanaCalendario)
+from gestion.services.cache_bitacora import obtener_entradas, parsear_compacto
+from gestion.services.calendario_sla import WorkingCalendar, contar_segundos_laborales
+from gestion.services.cargas_masivas import (_COLUMNAS_CARGA_INCIDENCIA, crear_trabajo_carga, lanzar_trabajo_carga,
+                                             normalize_text, procesar_trabajo_carga)
+from gestion.services.contexto_sla import invalidar_contexto_sla, obtener_contexto_sla
+from gestion.services.guardado_sla import aplicar_resultados_sla, guardar_resultados_sla
+from gestion.services.lectura_carga import bloques_tabla, codificacion_csv, filas_csv
+from gestion.services.motor_sla import (calcular_sla_desde_bitacora, calcular_tiempo_efectivo, normalizar_texto,
+                                        parsear_bitacora)
+from gestion.services.simulacion_sla import simular_sla
+from gestion.services.sla_incremental import marcar_por_usuario, version_actual
+from gestion.services.sla_lote import evaluar_lote, tarea_sla
+from gestion.services.sla_paralelo import PoolSLA, abrir_pool_sla, calcular_sla_contexto
+from gestion.services.vencimiento_sla import incidencias_en_riesgo, incidencias_vencidas
+
+_SANTIAGO = ZoneInfo('America/Santiago')
+
+
+def _intervalos(rnd, cantidad, max_segundos, inicios):
+    """Pares (inicio, fin) aleatorios a partir de los instantes de 'inicios'."""
+    pares = []
+    for _ in range(cantidad):
+        inicio = rnd.choice(inicios) + timedelta(seconds=rnd.randint(-12 * 3600, 12 * 3600))
+        pares.append((inicio, inicio + timedelta(seconds=rnd.randint(0, max_segundos))))
+    return pares
+
+
+# Días con cambio de hora, feriados, fines de semana y días hábiles de 2025.
+_INICIOS = [datetime(2025, 4, 6), datetime(2025, 9, 7), datetime(2025, 4, 18), datetime(2025, 1, 4),
+            datetime(2025, 1, 8, 8, 30), datetime(2025, 3, 14, 18)]
+
+
+class ConteoPorDiasTests(SimpleTestCase):
+    """contar_segundos_laborales contra el recorrido segundo a segundo original."""
+
+    def assertIgualAlRecorrido(self, inicio, fin):
+        esperado = calcular_tiempo_efectivo_por_segundo(inicio, fin, _HORARIOS, _FERIADOS)
+        self.assertEqual(timedelta(seconds=contar_segundos_laborales(inicio, fin, _HORARIOS, _FERIADOS)),
+                         esperado, f"{inicio} -> {fin}")
+        self.assertEqual(calcular_tiempo_efectivo(inicio, fin, _HORARIOS, _FERIADOS), esperado)
+
+    def test_intervalos_aleatorios(self):
+        rnd = random.Random(1)
+        for inicio, fin in _intervalos(rnd, 25, 36 * 3600, _INICIOS):
+            self.assertIgualAlRecorrido(inicio, fin)
+
+    def test_intervalos_con_zona_horaria_y_cambio_de_hora(self):
+        rnd = random.Random(2)
+        for inicio, fin in _intervalos(rnd, 20, 36 * 3600, _INICIOS):
+            self.assertIgualAlRecorrido(inicio.replace(tzinfo=_SANTIAGO), fin.replace(tzinfo=_SANTIAGO))
+
+    def test_bordes_de_la_ventana(self):
+        lunes = date(2025, 1, 6)
+        viernes = date(2025, 1, 10)
+        casos = [
+            (datetime.combine(lunes, hora(8, 30)), datetime.combine(lunes, hora(8, 30, 1))),
+            (datetime.combine(lunes, hora(8, 29, 59)), datetime.combine(lunes, hora(8, 30, 1))),
+            (datetime.combine(lunes, hora(17, 59, 59)), datetime.combine(lunes, hora(18, 0, 2))),
+            (datetime.combine(viernes, hora(17, 59, 58)), datetime.combine(viernes, hora(18, 0, 5))),
+            (datetime.combine(lunes, hora(8, 30, 0, 250000)), datetime.combine(lunes, hora(8, 30, 3, 100))),
+            (datetime.combine(lunes, hora(18, 0, 0, 1)), datetime.combine(lunes, hora(18, 0, 1))),
+            (datetime.combine(lunes, hora(12)), datetime.combine(lunes, hora(12))),
+            (datetime.combine(lunes, hora(12)), datetime.combine(lunes, hora(11))),
+        ]
+        for inicio, fin in casos:
+            self.assertIgualAlRecorrido(inicio, fin)
+
+    def test_fechas_en_zonas_distintas(self):
+        inicio = datetime(2025, 9, 5, 17, tzinfo=_SANTIAGO)
+        fin = datetime(2025, 9, 8, 14, tzinfo=ZoneInfo('UTC'))
+        self.assertIgualAlRecorrido(inicio, fin)
+
+    def test_critica_24_7_cuenta_el_reloj(self):
+        inicio = datetime(2025, 4, 5, 22, tzinfo=_SANTIAGO)
+        fin = datetime(2025, 4, 6, 3, tzinfo=_SANTIAGO)
+        self.assertEqual(calcular_tiempo_efectivo(inicio, fin, _HORARIOS, _FERIADOS, es_critica_24_7=True),
+                         calcular_tiempo_efectivo_por_segundo(inicio, fin, _HORARIOS, _FERIADOS, es_critica_24_7=True))
+
+
+class WorkingCalendarTests(SimpleTestCase):
+    """El índice con acumulados debe contar lo mismo que el conteo por días."""
+
+    def setUp(self):
+        self.calendario = WorkingCalendar(_HORARIOS, _FERIADOS, date(2025, 1, 1), date(2025, 12, 31))
+
+    def test_igual_al_conteo_por_dias(self):
+        rnd = random.Random(3)
+        inicios = _INICIOS + [datetime(2024, 12, 31, 12), datetime(2025, 12, 31, 12)]
+        for inicio, fin in _intervalos(rnd, 300, 20 * 86400, inicios):
+            if rnd.random() < 0.2:
+                inicio += timedelta(microseconds=rnd.randint(1, 999999))
+            for zona in (None, _SANTIAGO):
+                a, b = inicio.replace(tzinfo=zona), fin.replace(tzinfo=zona)
+                self.assertEqual(self.calendario.segundos_laborales(a, b),
+                                 contar_segundos_laborales(a, b, _HORARIOS, _FERIADOS), f"{a} -> {b}")
+
+    def test_fuera_del_rango_indexado(self):
+        casos = [(datetime(2024, 12, 20, 9), datetime(2025, 1, 10, 9)),
+                 (datetime(2025, 12, 20, 9), datetime(2026, 1, 10, 9)),
+                 (datetime(2023, 3, 1, 9), datetime(2023, 3, 9, 9))]
+        for inicio, fin in casos:
+            self.assertEqual(self.calendario.segundos_laborales(inicio, fin),
+                             contar_segundos_laborales(inicio, fin, _HORARIOS, _FERIADOS))
+
+    def test_sumar_segundos_es_la_inversa(self):
+        rnd = random.Random(4)
+        for _ in range(200):
+            inicio = rnd.choice(_INICIOS) + timedelta(seconds=rnd.randint(-12 * 3600, 12 * 3600))
+            segundos = rnd.randint(1, 30 * 3600)
+            vence = self.calendario.sumar_segundos_laborales(inicio, segundos)
+            self.assertEqual(vence, self.calendario._sumar_por_dias(inicio, segundos))
+            self.assertEqual(self.calendario.segundos_laborales(inicio, vence), segundos)
+            self.assertLess(self.calendario.segundos_laborales(inicio, vence - timedelta(seconds=1)), segundos)
+
+
+class EvaluacionLoteTests(SimpleTestCase):
+    """evaluar_lote contra calcular_sla_desde_bitacora original (regex y segundo a segundo)."""
+
+    def _comparar(self, semilla, zona):
+        rnd = random.Random(semilla)
+        incidencias = [generar_incidencia(rnd, i, perfil) for i, perfil in enumerate(PERFILES * 2)]
+        gestores_norm = frozenset(normalizar_texto(g) for g in _GESTORES)
+        # Rango corto a propósito: parte de los segmentos cae fuera del índice.
+        calendario = WorkingCalendar(_HORARIOS, _FERIADOS, date(2025, 1, 1), date(2025, 6, 30))
+        with timezone.override(zona):
+            tareas = [tarea_sla(inc, parsear_compacto(inc.bitacora, inc.id)) for inc in incidencias]
+            obtenidos = evaluar_lote(tareas, gestores_norm, _REGLAS, calendario)
+            for inc, obtenido in zip(incidencias, obtenidos):
+                esperado = sla_referencia(inc, gestores_norm, _REGLAS, calendario)
+                for clave, valor in esperado.items():
+                    self.assertEqual(obtenido[clave], valor, f"{inc.incidencia} ({inc.perfil}): {clave}")
+
+    def test_igual_a_la_referencia_en_utc(self):
+        self._comparar(5, 'UTC')
+
+    def test_igual_a_la_referencia_con_cambio_de_hora(self):
+        self._comparar(6, 'America/Santiago')
+
+
+def _crear_incidencia(codigo, bitacora, **campos):
+    return Incidencia.objects.create(incidencia=codigo, bitacora=bitacora, estado=Estado.objects.first(),
+                                     impacto=Impacto.objects.first(), **campos)
+
+
+class CacheBitacoraTests(TestCase):
+    """obtener_entradas debe devolver lo mismo que parsear la bitácora, guardándola una sola vez."""
+
+    def setUp(self):
+        rnd = random.Random(7)
+        self.incidencias = [_crear_incidencia(f"INC{i:04d}", generar_incidencia(rnd, i, perfil).bitacora)
+                            for i, perfil in enumerate(PERFILES)]
+        self.incidencias.append(_crear_incidencia("INC9999", ""))
+
+    def test_igual_al_parser_y_guarda_la_cache(self):
+        entradas = obtener_entradas(self.incidencias)
+        for inc in self.incidencias:
+            self.assertEqual(entradas[inc.id], parsear_compacto(inc.bitacora, inc.id))
+        self.assertEqual(BitacoraParseada.objects.count(), len(self.incidencias))
+        cacheada = BitacoraParseada.objects.get(incidencia=self.incidencias[0])
+        self.assertEqual(cacheada.entradas, entradas[self.incidencias[0].id])
+
+    def test_reutiliza_la_cache_si_el_hash_coincide(self):
+        obtener_entradas(self.incidencias)
+        inc = self.incidencias[0]
+        BitacoraParseada.objects.filter(incidencia=inc).update(entradas=[[0, 'marca', 0]])
+        self.assertEqual(obtener_entradas([inc])[inc.id], [[0, 'marca', 0]])
+
+    def test_reparsea_la_bitacora_modificada(self):
+        obtener_entradas(self.incidencias)
+        inc = self.incidencias[0]
+        inc.bitacora += "\n31-12-2025 10:00:00 , Gestor Uno , Cierre confirmado."
+        esperado = parsear_compacto(inc.bitacora, inc.id)
+        self.assertEqual(obtener_entradas([inc])[inc.id], esperado)
+        cacheada = BitacoraParseada.objects.get(incidencia=inc)
+        self.assertEqual(cacheada.entradas, esperado)
+        self.assertEqual(cacheada.ultima_fecha, date(2025, 12, 31))
+
+
+_CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class DatosSLAMixin:
+    """Horario, gestores, reglas y incidencias resueltas con bitácoras generadas, para los TestCase del SLA."""
+
+    cantidad_incidencias = 10
+
+    def setUp(self):
+        super().setUp()
+        for dia_semana, (hora_inicio, hora_fin) in _HORARIOS.items():
+            HorarioLaboral.objects.create(dia_semana=dia_semana, hora_inicio=hora_inicio, hora_fin=hora_fin)
+        for gestor in _GESTORES:
+            Usuario.objects.create(usuario=gestor, nombre=gestor)
+        criticidad = Criticidad.objects.first()
+        self.aplicacion = Aplicacion.objects.create(cod_aplicacion='APP1', nombre_aplicacion='App',
+                                                    criticidad=criticidad)
+        self.severidades = list(Severidad.objects.order_by('id')[1:3])
+        for severidad in self.severidades:
+            ReglaSLA.objects.create(severidad=severidad, criticidad_aplicacion=criticidad,
+                                    tiempo_sla=timedelta(hours=8 * severidad.id))
+        rnd = random.Random(8)
+        perfiles = PERFILES[:-1] * (self.cantidad_incidencias // (len(PERFILES) - 1) + 1)
+        for i, perfil in enumerate(perfiles[:self.cantidad_incidencias]):
+            incidencia = generar_incidencia(rnd, i, perfil)
+            _crear_incidencia(f"INC{i:04d}", incidencia.bitacora, aplicacion=self.aplicacion,
+                              severidad=self.severidades[i % 2], fecha_ultima_resolucion=timezone.now(),
+                              fecha_apertura=parsear_bitacora(incidencia.bitacora)[0]['fecha_hora'])
+        invalidar_contexto_sla()
+
+
+@override_settings(CACHES=_CACHE_LOCAL, SLA_TRABAJOS_EN_HILO=False, SLA_GUARDAR_SEGMENTOS=False)
+class RecalculoIncrementalTests(DatosSLAMixin, TestCase):
+    """Recalcular solo las incidencias obsoletas debe dejar lo mismo que recalcular todo."""
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        self.checkpoint = f"{directorio}/calcular_sla.checkpoint.json"
+
+    def _calcular(self, **opciones):
+        call_command('calcular_sla', restart=True, workers=1, checkpoint=self.checkpoint, stdout=StringIO(),
+                     **opciones)
+
+    def _resultados(self):
+        return {inc.incidencia: (inc.tiempo_sla_calculado, inc.cumple_sla)
+                for inc in Incidencia.objects.order_by('id')}
+
+    def test_solo_obsoletas_igual_al_recalculo_completo(self):
+        self._calcular()
+        self.assertFalse(Incidencia.objects.filter(sla_obsoleto=True).exists())
+        antes = self._resultados()
+
+        editada = Incidencia.objects.get(incidencia='INC0000')
+        editada.bitacora += "\n31-12-2025 10:00:00 , Gestor Uno , Cierre confirmado."
+        editada.save()
+        # Feriado en el primer día de otra bitácora (un día hábil del perfil 'laboral').
+        fecha = BitacoraParseada.objects.get(incidencia__incidencia='INC0005').primera_fecha
+        DiaFeriado.objects.create(fecha=fecha, descripcion='Feriado de prueba')
+        invalidar_contexto_sla()
+        obsoletas = set(Incidencia.objects.filter(sla_obsoleto=True).values_list('incidencia', flat=True))
+        self.assertIn('INC0000', obsoletas)
+        self.assertLess(len(obsoletas), Incidencia.objects.count())
+
+        self._calcular(only_stale=True)
+        incremental = self._resultados()
+        self.assertNotEqual(incremental, antes)
+        self.assertFalse(Incidencia.objects.filter(sla_obsoleto=True).exists())
+        self._calcular()
+        self.assertEqual(incremental, self._resultados())
+
+    def test_marca_durante_el_calculo_no_se_pierde(self):
+        self._calcular()
+        version = version_actual()
+        incidencias = list(Incidencia.objects.select_related('aplicacion__criticidad', 'severidad').order_by('id'))
+        resultados = calcular_sla_contexto(incidencias, obtener_contexto_sla())
+        aplicar_resultados_sla(incidencias, resultados, version)
+
+        # Entre la evaluación y el guardado cambian una regla y la bitácora de otra incidencia.
+        regla = ReglaSLA.objects.order_by('id').first()
+        regla.tiempo_sla += timedelta(hours=1)
+        regla.save()
+        editada = Incidencia.objects.get(pk=incidencias[1].pk)
+        editada.bitacora += "\n31-12-2025 10:00:00 , Gestor Uno , Cierre confirmado."
+        editada.save()
+        esperadas = set(Incidencia.objects.filter(sla_obsoleto=True).values_list('pk', flat=True))
+        self.assertIn(editada.pk, esperadas)
+        self.assertLess(len(esperadas), len(incidencias))
+
+        guardar_resultados_sla(incidencias, resultados)
+        self.assertEqual(set(Incidencia.objects.filter(sla_obsoleto=True).values_list('pk', flat=True)), esperadas)
+
+
+class ParserBitacoraTests(SimpleTestCase):
+    """El escáner de una pasada debe entregar las mismas entradas que el parser regex anterior."""
+
+    BITACORAS = [
+        "",
+        "sin fechas en todo el texto",
+        "01-02-2025 08:00:00 , Gestor Uno , Inicio¶02-02-2025 09:15:00 , Cliente Externo , Respuesta",
+        "03/02/2025 10:00:00 , Soporte N1 , Fecha con barras\n03-02-2025 9:05:07 , Gestor Uno , Hora de un dígito",
+        "31-02-2025 10:00:00 , Gestor Uno , Fecha inválida\n01-03-2025 10:00:00 , Gestor Uno , Válida",
+        "05-03-2025 10:00:00 , Gestor Uno , Mensaje,\ncon comas y\r\nvarias líneas\n\n04-03-2025 10:00:00 , María López , Anterior",
+        "  06-03-2025 10:00:00 ,  MARÍA  LÓPEZ  , con espacios   \n06-03-2025 10:00:00 , Gestor Uno , misma hora",
+        "texto previo 07-03-2025 10:00:00 , Gestor Uno , sin salto antes",
+        "08-03-2025 10:00:00 , Gestor Uno ,\n08-03-2025 11:00:00 , Gestor Uno , mensaje vacío antes",
+        "06-04-2025 00:30:00 , Gestor Uno , Cambio de hora¶07-09-2025 00:30:00 , Soporte N1 , Hora inexistente",
+    ]
+
+    def _comparar(self, bitacoras):
+        for zona in ('UTC', 'America/Santiago'):
+            with timezone.override(zona):
+                for bitacora in bitacoras:
+                    self.assertEqual(parsear_bitacora(bitacora), parsear_bitacora_regex(bitacora), repr(bitacora))
+
+    def test_casos_borde(self):
+        # La fecha inválida se descarta avisando en el log, como antes.
+        with self.assertLogs('gestion.services.motor_sla', 'WARNING'):
+            self._comparar(self.BITACORAS)
+
+    def test_bitacoras_generadas(self):
+        rnd = random.Random(9)
+        bitacoras = [generar_bitacora(rnd, rnd.randint(200, 20000)) for _ in range(20)]
+        bitacoras += [generar_incidencia(rnd, i, perfil).bitacora for i, perfil in enumerate(PERFILES * 3)]
+        self._comparar(bitacoras)
+
+
+def _incidencia_como_antes(row):
+    """
+    Campos con que la carga fila a fila original (get_or_create) creaba la
+    incidencia de 'row', o el motivo por el que la omitía: 'sin_ticket' o
+    'indra_d'. Lanza la misma excepción que hacía fallar la fila.
+    """
+    def buscar(modelo, campo, valor):
+        return {normalize_text(getattr(o, campo)): o for o in modelo.objects.all()}.get(normalize_text(valor))
+
+    def fecha(valor):
+        return timezone.make_aware(datetime.strptime(valor.strip(), '%d-%m-%Y %H:%M:%S')) if valor.strip() else None
+
+    incidencia_id = row['incidencia'].strip()
+    if not incidencia_id or not incidencia_id.upper().startswith('INC'):
+        return 'sin_ticket'
+    aplicacion, codigo_cierre = None, None
+    app_val, cc_val = row['aplicacion_id'].strip(), row['codigo_cierre_id'].strip()
+    if app_val and cc_val:
+        aplicacion = buscar(Aplicacion, 'cod_aplicacion', app_val)
+        if aplicacion:
+            try:
+                codigo_cierre = CodigoCierre.objects.get(cod_cierre__iexact=cc_val, aplicacion=aplicacion)
+            except CodigoCierre.DoesNotExist:
+                aplicacion = None
+    elif app_val:
+        aplicacion = buscar(Aplicacion, 'cod_aplicacion', app_val)
+    elif cc_val:
+        try:
+            codigo_cierre = CodigoCierre.objects.get(cod_cierre__iexact=cc_val)
+            aplicacion = codigo_cierre.aplicacion
+        except (CodigoCierre.DoesNotExist, CodigoCierre.MultipleObjectsReturned):
+            pass
+    bloque_val = normalize_text(row['bloque_id'])
+    if bloque_val == 'indra_d':
+        return 'indra_d'
+    bloque, grupo = {'indra_b3': ('bloque 3', 'SWF_INDRA_3B'), 'indra': ('bloque 4', 'SWF_INDRA_G3'),
+                     'indra_a': ('bloque 4', 'SWF_INDRA_G3')}.get(bloque_val, (None, None))
+    return {
+        'incidencia': incidencia_id,
+        'descripcion_incidencia': row['descripcion_incidencia'].strip(),
+        'fecha_apertura': fecha(row['fecha_apertura']),
+        'fecha_ultima_resolucion': fecha(row['fecha_ultima_resolucion']),
+        **{campo: row[columna].strip() for columna, campo in (
+            ('causa', 'causa'), ('bitacora', 'bitacora'), ('tec_analisis', 'tec_analisis'),
+            ('correccion', 'correccion'), ('solucion_final', 'solucion_final'),
+            ('observaciones', 'observaciones'), ('demanadas', 'demandas'))},
+        'workaround': 'Sí' if 'con wa' in row['workaround'].strip().lower() else 'No',
+        'aplicacion': aplicacion,
+        'estado': buscar(Estado, 'desc_estado', row['estado_id']),
+        'severidad': buscar(Severidad, 'desc_severidad', row['severidad_id']),
+        'grupo_resolutor': buscar(GrupoResolutor, 'desc_grupo_resol', grupo) if grupo else None,
+        'interfaz': Interfaz.objects.get(desc_interfaz__iexact='WEB'),
+        'impacto': Impacto.objects.get(desc_impacto__iexact='interno'),
+        'cluster': buscar(Cluster, 'desc_cluster', row['cluster_id']),
+        'bloque': buscar(Bloque, 'desc_bloque', bloque) if bloque else None,
+        'codigo_cierre': codigo_cierre,
+        'usuario_asignado': buscar(Usuario, 'usuario', row['usuario_asignado_id']),
+    }
+
+
+def _fila_carga(incidencia, **valores):
+    fila = dict.fromkeys(_COLUMNAS_CARGA_INCIDENCIA, '')
+    fila.update(incidencia=incidencia, descripcion_incidencia=f"Descripción {incidencia}",
+                fecha_apertura='02-01-2025 09:00:00', estado_id='Resuelto', severidad_id='Alta',
+                bloque_id='indra', bitacora='02-01-2025 09:00:00 , Gestor Uno , Inicio')
+    fila.update(valores)
+    return fila
+
+
+@override_settings(CARGA_MASIVA_EN_HILO=False, CARGA_MASIVA_LOTE=3, CARGA_MASIVA_LOTE_INSERCION=2)
+class CargaMasivaIncidenciasTests(TestCase):
+    """La carga en lote debe crear, omitir e informar las mismas filas que la carga fila a fila original."""
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ajustes = override_settings(CARGA_MASIVA_DIR=Path(directorio))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        app1 = Aplicacion.objects.create(cod_aplicacion='APP1', nombre_aplicacion='Uno')
+        app2 = Aplicacion.objects.create(cod_aplicacion='App Dos', nombre_aplicacion='Dos')
+        for codigo, aplicacion in (('CC1', app1), ('cc2', app1), ('CC2', app2), ('dup', app1), ('DUP', app1)):
+            CodigoCierre.objects.create(cod_cierre=codigo, aplicacion=aplicacion)
+        Usuario.objects.create(usuario='jperez', nombre='Juan Pérez')
+        _crear_incidencia('INC0000', '')
+
+        self.filas = [
+            _fila_carga('INC0001', aplicacion_id='APP1', codigo_cierre_id='cc1', workaround='Con WA temporal',
+                        usuario_asignado_id='JPEREZ', cluster_id='sw', causa='  con espacios  '),
+            _fila_carga('INC0000'),
+            _fila_carga(''),
+            _fila_carga('REQ0001'),
+            _fila_carga('INC0002', bloque_id='INDRA_D', fecha_apertura='fecha mala'),
+            _fila_carga('INC0003', fecha_apertura='31-02-2025 10:00:00'),
+            _fila_carga('INC0004', estado_id='no existe'),
+            _fila_carga('INC0004', severidad_id='Media', bloque_id='indra_b3'),
+            _fila_carga('INC0001', descripcion_incidencia='repetida en el archivo'),
+            _fila_carga('INC0005', codigo_cierre_id='CC2'),
+            _fila_carga('inc0006', aplicacion_id='app dos', codigo_cierre_id='cc2', bloque_id='indra_a'),
+            _fila_carga('INC0007', codigo_cierre_id='CC1', fecha_ultima_resolucion='03-01-2025 18:30:00'),
+            _fila_carga('INC0008', aplicacion_id='APP1', codigo_cierre_id='DUP'),
+            _fila_carga('INC0009', aplicacion_id='APP1', codigo_cierre_id='no existe'),
+            _fila_carga('INC0010', aplicacion_id='APP1', bloque_id='otro'),
+            _fila_carga('INC0011', fecha_apertura='05-04-2025 23:30:00', fecha_ultima_resolucion='07-09-2025 00:30:00'),
+            _fila_carga('INC0012', fecha_apertura='06-04-2025 00:30:00', fecha_ultima_resolucion='06-09-2025 23:59:59'),
+        ]
+
+    def _esperado(self):
+        """Resultado de la carga original sobre self.filas: (campos por ticket, omitidas, líneas con error)."""
+        creadas, omitidas, errores = {}, Counter(), []
+        conocidas = set(Incidencia.objects.values_list('incidencia', flat=True))
+        for line_number, row in enumerate(self.filas, start=2):
+            try:
+                campos = _incidencia_como_antes(row)
+            except Exception:
+                errores.append(line_number)
+                continue
+            if isinstance(campos, str):
+                omitidas[campos] += 1
+            elif campos['incidencia'] in conocidas:
+                omitidas['existentes'] += 1
+            elif campos['estado'] is None:
+                # Incidencia.estado es obligatorio: la inserción fallaba.
+                errores.append(line_number)
+            else:
+                creadas[campos['incidencia']] = campos
+                conocidas.add(campos['incidencia'])
+        return creadas, omitidas, errores
+
+    def _cargar(self, nombre, contenido):
+        trabajo = crear_trabajo_carga(TrabajoCarga.Tipo.INCIDENCIAS, SimpleUploadedFile(nombre, contenido))
+        self.assertTrue(procesar_trabajo_carga(trabajo.pk))
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, TrabajoCarga.Estado.COMPLETADO, trabajo.mensaje)
+        return trabajo
+
+    def _csv(self):
+        return pd.DataFrame(self.filas, columns=_COLUMNAS_CARGA_INCIDENCIA).to_csv(index=False).encode('utf-8')
+
+    def _xlsx(self):
+        salida = BytesIO()
+        pd.DataFrame(self.filas, columns=_COLUMNAS_CARGA_INCIDENCIA).to_excel(salida, index=False)
+        return salida.getvalue()
+
+    def _comparar(self, trabajo, esperado):
+        creadas, omitidas, errores = esperado
+        self.assertEqual(trabajo.procesadas, len(self.filas))
+        self.assertEqual(trabajo.creadas, len(creadas))
+        self.assertEqual({motivo: trabajo.detalle.get(motivo, 0) for motivo in omitidas}, dict(omitidas))
+        self.assertEqual(trabajo.fallidas, len(errores))
+        with open(trabajo.ruta_errores, encoding='utf-8-sig', newline='') as archivo:
+            lineas = [int(fila[0]) for fila in list(csv.reader(archivo, delimiter=';'))[1:]]
+        self.assertEqual(lineas, errores)
+        for codigo, campos in creadas.items():
+            incidencia = Incidencia.objects.get(incidencia=codigo)
+            for campo, valor in campos.items():
+                obtenido = getattr(incidencia, campo)
+                if isinstance(valor, datetime):
+                    # Entre zonas distintas, Python no iguala horas ambiguas: se comparan los instantes.
+                    obtenido, valor = obtenido.timestamp(), valor.timestamp()
+                self.assertEqual(obtenido, valor, f"{codigo}: {campo}")
+
+    def test_csv_igual_a_la_carga_original(self):
+        esperado = self._esperado()
+        self.assertEqual(sorted(esperado[0]), ['INC0001', 'INC0004', 'INC0005', 'INC0007', 'INC0009', 'INC0010',
+                                               'INC0011', 'INC0012', 'inc0006'])
+        self._comparar(self._cargar('carga.csv', self._csv()), esperado)
+
+    def test_xlsx_igual_a_la_carga_original(self):
+        esperado = self._esperado()
+        self._comparar(self._cargar('carga.xlsx', self._xlsx()), esperado)
+
+    def test_fechas_con_cambio_de_hora(self):
+        with timezone.override('America/Santiago'):
+            esperado = self._esperado()
+            self._comparar(self._cargar('carga.csv', self._csv()), esperado)
+        # Hora repetida al atrasar el reloj: la primera ocurrencia (UTC-3); hora
+        # inexistente al adelantarlo: con el desfase anterior al cambio (UTC-4).
+        incidencia = Incidencia.objects.get(incidencia='INC0011')
+        self.assertEqual(incidencia.fecha_apertura, datetime(2025, 4, 6, 2, 30, tzinfo=ZoneInfo('UTC')))
+        self.assertEqual(incidencia.fecha_ultima_resolucion, datetime(2025, 9, 7, 4, 30, tzinfo=ZoneInfo('UTC')))
+
+    def test_codigos_de_cierre_con_una_consulta(self):
+        self.filas = [
+            _fila_carga(f'INC{i:04d}', codigo_cierre_id=codigo, aplicacion_id=aplicacion)
+            for i, (codigo, aplicacion) in enumerate([('cc1', ''), ('CC2', ''), ('dup', ''), ('Cc1', 'app1'),
+                                                      ('CC2', 'App Dos'), ('dup', 'APP1')] * 5, start=100)]
+        with CaptureQueriesContext(connection) as consultas:
+            trabajo = self._cargar('carga.csv', self._csv())
+        self.assertEqual(len([c for c in consultas.captured_queries if 'gestion_codigocierre' in c['sql']]), 1)
+
+        codigos = {inc.incidencia: (inc.aplicacion.cod_aplicacion if inc.aplicacion else None,
+                                    inc.codigo_cierre.cod_cierre if inc.codigo_cierre else None)
+                   for inc in Incidencia.objects.filter(incidencia__gte='INC0100')
+                   .select_related('aplicacion', 'codigo_cierre')}
+        # Solo código: se toma con su aplicación si es único; 'cc2' está en dos aplicaciones y 'dup' repetido.
+        self.assertEqual(codigos['INC0100'], ('APP1', 'CC1'))
+        self.assertEqual(codigos['INC0101'], (None, None))
+        self.assertEqual(codigos['INC0102'], (None, None))
+        self.assertEqual(codigos['INC0103'], ('APP1', 'CC1'))
+        self.assertEqual(codigos['INC0104'], ('App Dos', 'CC2'))
+        # Aplicación y código repetido en esa aplicación: la fila falla.
+        self.assertNotIn('INC0105', codigos)
+        self.assertEqual(trabajo.fallidas, 5)
+        with open(trabajo.ruta_errores, encoding='utf-8-sig', newline='') as archivo:
+            errores = [fila[-1] for fila in list(csv.reader(archivo, delimiter=';'))[1:]]
+        mensaje = "El código de cierre 'dup' coincide con más de un código de la aplicación 'APP1'."
+        self.assertEqual(errores, [mensaje] * 5)
+
+
+class LecturaPorBloquesTests(SimpleTestCase):
+    """Los lectores por bloques deben entregar las mismas filas que leer el archivo completo."""
+
+    def _unir(self, archivo, tamano):
+        bloques = list(bloques_tabla(archivo, tamano))
+        self.assertTrue(all(len(bloque) <= tamano for bloque in bloques))
+        return pd.concat(bloques, ignore_index=True)
+
+    def test_csv_igual_a_read_csv(self):
+        contenido = ("incidencia,descripcion,numero\nINC1,\"con, coma\",1\nINC2,,2.50\n,NA,\n"
+                     "INC3,\"varias\nlíneas\",null\nINC4,ñandú,007\n").encode('utf-8')
+        esperado = pd.read_csv(BytesIO(contenido), keep_default_na=False, dtype=str).fillna('')
+        for tamano in (1, 2, 10):
+            archivo = SimpleUploadedFile('carga.csv', contenido)
+            pd.testing.assert_frame_equal(self._unir(archivo, tamano), esperado)
+
+    def test_xlsx_igual_a_read_excel(self):
+        libro = Workbook()
+        hoja = libro.active
+        filas = [['incidencia', 'fecha', 'numero', None, 'nota'],
+                 ['INC1', datetime(2025, 1, 2, 9, 30), 10, 'x', 'a'],
+                 ['INC2', '02-01-2025 09:00:00', 2.5, None, None],
+                 [None, None, None, None, None],
+                 ['INC3', None, 3.0, None, 'fila tras una vacía'],
+                 ['INC4', None, None, None, None, 'fuera de la cabecera']]
+        for fila in filas:
+            hoja.append(fila)
+        # Filas vacías al final de la hoja (con formato, sin valores).
+        hoja.cell(row=10, column=2).number_format = '0.00'
+        salida = BytesIO()
+        libro.save(salida)
+        contenido = salida.getvalue()
+
+        esperado = pd.read_excel(BytesIO(contenido), keep_default_na=False, dtype=str).fillna('')
+        for tamano in (1, 2, 10):
+            archivo = SimpleUploadedFile('carga.xlsx', contenido)
+            pd.testing.assert_frame_equal(self._unir(archivo, tamano), esperado)
+
+    def test_codificacion_y_filas_csv(self):
+        texto = "id;nombre\n1;Ñuñoa\n2;Peñalolén\n3;\n"
+        for codificacion in ('utf-8', 'latin-1'):
+            contenido = texto.encode(codificacion)
+            archivo = SimpleUploadedFile('aplicaciones.csv', contenido)
+            self.assertEqual(codificacion_csv(archivo), codificacion)
+            try:
+                decodificado = contenido.decode('utf-8')
+            except UnicodeDecodeError:
+                decodificado = contenido.decode('latin-1')
+            esperado = list(csv.DictReader(StringIO(decodificado), delimiter=';'))
+            self.assertEqual(list(filas_csv(archivo, codificacion)), esperado)
+            # Cada llamada vuelve a leer desde el inicio.
+            self.assertEqual(list(filas_csv(archivo, codificacion)), esperado)
+
+    def test_codificacion_con_caracter_partido_entre_bloques(self):
+        contenido = ('a' * (1024 * 1024 - 1) + 'ñ\n').encode('utf-8')
+        self.assertEqual(codificacion_csv(SimpleUploadedFile('grande.csv', contenido)), 'utf-8')
+
+
+@override_settings(CACHES=_CACHE_LOCAL, SLA_PARALELO_MINIMO=1, SLA_PARALELO_BLOQUE=2)
+class PoolSlaTests(DatosSLAMixin, TestCase):
+    """El cálculo en el pool de procesos devuelve lo mismo que en el mismo proceso, en el orden de entrada."""
+
+    def test_igual_al_calculo_en_el_mismo_proceso(self):
+        # Una incidencia sin datos de SLA (la primera): se resuelve sin pasar por el pool.
+        _crear_incidencia('INC9999', '')
+        incidencias = list(Incidencia.objects.select_related('aplicacion__criticidad', 'severidad').order_by('-id'))
+        contexto = obtener_contexto_sla()
+        serie = calcular_sla_contexto(incidencias, contexto)
+
+        with abrir_pool_sla(contexto, workers=2) as pool:
+            self.assertIsInstance(pool, PoolSLA)
+            paralelo = calcular_sla_contexto(incidencias, contexto, pool)
+        self.assertEqual(paralelo, serie)
+        self.assertEqual(paralelo[0], {'cumple_sla': 'No Calculado (Faltan Datos)'})
+        self.assertEqual([r['incidencia'] for r in paralelo[1:]], incidencias[1:])
+
+    def test_un_worker_y_pool_de_otro_contexto(self):
+        contexto = obtener_contexto_sla()
+        with abrir_pool_sla(contexto, workers=1) as pool:
+            self.assertIsNone(pool)
+        with abrir_pool_sla(contexto, workers=2) as pool:
+            invalidar_contexto_sla()
+            with self.assertRaises(ValueError):
+                calcular_sla_contexto([], obtener_contexto_sla(), pool)
+
+
+@override_settings(CACHES=_CACHE_LOCAL)
+class TrazaSlaTests(TestCase):
+    """La traza de una incidencia explica cada segmento de la bitácora con su motivo y sus segundos."""
+
+    def setUp(self):
+        criticidad = Criticidad.objects.first()
+        aplicacion = Aplicacion.objects.create(cod_aplicacion='APP1', nombre_aplicacion='App', criticidad=criticidad)
+        severidad = Severidad.objects.get(pk=2)
+        ReglaSLA.objects.create(severidad=severidad, criticidad_aplicacion=criticidad, tiempo_sla=timedelta(hours=4))
+        HorarioLaboral.objects.create(dia_semana=0, hora_inicio=hora(8, 30), hora_fin=hora(18))
+        Usuario.objects.create(usuario='Gestor Uno', nombre='Gestor')
+        invalidar_contexto_sla()
+        self.incidencia = _crear_incidencia('INC0001', "\n".join([
+            "10-03-2025 10:00:00 , Cliente , Inicio",
+            "10-03-2025 11:00:00 , Gestor Uno , Pendiente de respuesta del usuario",
+            "10-03-2025 13:00:00 , Gestor Uno , Retoma",
+            "10-03-2025 13:30:00 , Cliente , Consulta",
+        ]), aplicacion=aplicacion, severidad=severidad)
+
+    def test_segmentos_con_motivo(self):
+        url = reverse('gestion:traza_sla', args=[self.incidencia.pk])
+        self.client.force_login(User.objects.create_user('analista'))
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(User.objects.create_user('jefe', is_staff=True))
+        traza = self.client.get(url).json()['traza']
+        self.assertEqual([(s['de'], s['a'], s['motivo'], s['segundos']) for s in traza['segmentos']], [
+            ('cliente', 'gestor uno', 'cuenta', 3600),
+            ('gestor uno', 'gestor uno', 'pausado', 0),
+            ('gestor uno', 'cliente', 'no_gestor', 0),
+        ])
+        self.assertEqual((traza['tiempo_gestion'], traza['sla_objetivo'], traza['cumple_sla']),
+                         ('01:00:00', '04:00:00', 'Sí'))
+        self.assertFalse(traza['fallback_20_minutos'])
+
+    def test_calculo_sin_log_por_segmento(self):
+        contexto = obtener_contexto_sla()
+        calendario = contexto.calendario
+        with self.assertNoLogs('gestion.services.motor_sla', 'INFO'):
+            resultado = calcular_sla_desde_bitacora(self.incidencia, contexto.gestores_norm, calendario.horarios,
+                                                    calendario.feriados, contexto.reglas_sla)
+        self.assertEqual(resultado['tiempo_gestion_horas'], '01:00:00')
+
+
+@override_settings(CACHES=_CACHE_LOCAL, SLA_GUARDAR_SEGMENTOS=False)
+class ComandoCalcularSlaTests(DatosSLAMixin, TestCase):
+    """calcular_sla guarda el avance por bloque y, si se interrumpe, la siguiente ejecución continúa desde ahí."""
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        self.checkpoint = f"{directorio}/calcular_sla.checkpoint.json"
+
+    def _calcular(self, **opciones):
+        salida = StringIO()
+        call_command('calcular_sla', workers=1, chunk_size=3, checkpoint=self.checkpoint, stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def test_reanuda_tras_una_interrupcion(self):
+        ids = list(Incidencia.objects.order_by('id').values_list('id', flat=True))
+        Incidencia.objects.update(cumple_sla=None)
+        guardar = calcular_sla_comando.guardar_resultados_sla
+        bloques_guardados = []
+
+        def guardar_y_cortar(bloque, resultados):
+            if bloques_guardados:
+                raise RuntimeError("interrumpido")
+            guardar(bloque, resultados)
+            bloques_guardados.append(bloque)
+
+        with mock.patch.object(calcular_sla_comando, 'guardar_resultados_sla', guardar_y_cortar):
+            with self.assertRaises(RuntimeError):
+                self._calcular()
+        with open(self.checkpoint, encoding='utf-8') as archivo:
+            self.assertEqual(json.load(archivo), {'firma': mock.ANY, 'ultimo_id': ids[2], 'procesadas': 3})
+        self.assertEqual(Incidencia.objects.filter(cumple_sla__isnull=False).count(), 3)
+        # Marca las del bloque guardado: al reanudar no se deben volver a calcular.
+        Incidencia.objects.filter(pk__in=ids[:3]).update(cumple_sla='ya calculada')
+
+        salida = self._calcular()
+        self.assertIn(f"Reanudando desde la incidencia id {ids[2]} (3 ya procesadas).", salida)
+        self.assertIn("Se procesaron 7 incidencias", salida)
+        self.assertIn("incidencias/s", salida)
+        self.assertEqual(Incidencia.objects.filter(cumple_sla='ya calculada').count(), 3)
+        self.assertFalse(Incidencia.objects.filter(cumple_sla__isnull=True).exists())
+        self.assertFalse(Path(self.checkpoint).exists())
+
+
+@override_settings(CACHES=_CACHE_LOCAL, SLA_CALCULO_BLOQUE=3)
+class ExportacionSlaTests(DatosSLAMixin, TestCase):
+    """El CSV del reporte debe tener las filas y el orden del reporte anterior a la serie."""
+
+    def _filas_como_antes(self):
+        """Filas de exportar_sla_csv_view original: queryset en el orden del modelo, una incidencia a la vez."""
+        gestores_norm = set(normalizar_texto(u.usuario) for u in Usuario.objects.all())
+        horarios = {h.dia_semana: (h.hora_inicio, h.hora_fin) for h in HorarioLaboral.objects.all()}
+        feriados = set(d.fecha for d in DiaFeriado.objects.all())
+        reglas_sla = {(r.severidad_id, r.criticidad_aplicacion_id): r.tiempo_sla for r in ReglaSLA.objects.all()}
+        filas = []
+        for inc in Incidencia.objects.select_related('aplicacion__criticidad', 'severidad', 'usuario_asignado').all():
+            resultado = calcular_sla_desde_bitacora(inc, gestores_norm, horarios, feriados, reglas_sla)
+            if "Error" not in resultado.get("cumple_sla", ""):
+                filas.append([
+                    inc.incidencia,
+                    inc.fecha_ultima_resolucion.strftime('%Y-%m-%d %H:%M:%S') if inc.fecha_ultima_resolucion else "N/A",
+                    resultado.get("ultimo_gestor", "N/A"),
+                    inc.aplicacion.nombre_aplicacion if inc.aplicacion else "N/A",
+                    inc.aplicacion.criticidad.desc_criticidad if inc.aplicacion and inc.aplicacion.criticidad else "N/A",
+                    inc.severidad.desc_severidad if inc.severidad else "N/A",
+                    resultado.get("sla_objetivo_horas", "N/A"),
+                    resultado.get("tiempo_gestion_horas", "N/A"),
+                    resultado.get("cumple_sla", "Error")])
+        return filas
+
+    def test_mismas_filas_en_el_mismo_orden(self):
+        # Una incidencia sin fecha de apertura y sin datos de SLA, creada al final.
+        _crear_incidencia('INC9999', '')
+        esperado = self._filas_como_antes()
+        self.assertNotEqual([fila[0] for fila in esperado], sorted(fila[0] for fila in esperado))
+
+        respuesta = self.client.get(reverse('gestion:exportar_sla_csv'))
+        contenido = b''.join(respuesta.streaming_content).decode('utf-8-sig')
+        filas = list(csv.reader(StringIO(contenido)))
+        self.assertEqual(filas[0][0], 'Incidencia')
+        self.assertEqual(filas[1:], esperado)
+
+    def test_cabecera_inmediata_y_un_bloque_por_parte(self):
+        def lecturas():
+            return [c['sql'] for c in consultas.captured_queries if 'FROM "gestion_incidencia"' in c['sql']]
+
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('gestion:exportar_sla_csv'))
+            self.assertTrue(respuesta.streaming)
+            partes = iter(respuesta.streaming_content)
+            cabecera = next(partes)
+            # La cabecera sale antes de leer incidencias.
+            self.assertEqual(lecturas(), [])
+            self.assertTrue(cabecera.decode('utf-8-sig').startswith('Incidencia,'))
+            bloques = [len(list(csv.reader(StringIO(parte.decode('utf-8'))))) for parte in partes]
+        self.assertEqual(bloques, [3, 3, 3, 1])
+        # Una lectura de ids y una por bloque: el queryset no se recorre otra vez para contar.
+        self.assertEqual(len(lecturas()), 1 + len(bloques))
+
+
+@override_settings(CACHES=_CACHE_LOCAL, SLA_CALCULO_BLOQUE=3, SLA_GUARDAR_SEGMENTOS=False)
+class CalculoSlaSincronoTests(DatosSLAMixin, TestCase):
+    """El modo síncrono de calcular_sla_view responde con el mismo JSON que antes de la serie."""
+
+    def test_respuesta_con_los_resultados(self):
+        _crear_incidencia('INC9999', '')
+        ids = list(Incidencia.objects.order_by('id').values_list('id', flat=True))
+        respuesta = self.client.post(reverse('gestion:calcular_sla'), {'incidencia_ids': ids},
+                                     content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual(datos['status'], 'success')
+        self.assertEqual(datos['message'], f'Se procesaron {len(ids)} incidencias.')
+        self.assertEqual([r['id'] for r in datos['results']], ids)
+
+        gestores_norm = set(normalizar_texto(g) for g in _GESTORES)
+        horarios = {h.dia_semana: (h.hora_inicio, h.hora_fin) for h in HorarioLaboral.objects.all()}
+        reglas_sla = {(r.severidad_id, r.criticidad_aplicacion_id): r.tiempo_sla for r in ReglaSLA.objects.all()}
+        for resultado in datos['results']:
+            self.assertEqual(set(resultado), {'id', 'incidencia', 'cumple_sla', 'tiempo_sla'})
+            inc = Incidencia.objects.get(pk=resultado['id'])
+            esperado = calcular_sla_desde_bitacora(inc, gestores_norm, horarios, set(), reglas_sla)
+            self.assertEqual(resultado['incidencia'], inc.incidencia)
+            self.assertEqual(resultado['cumple_sla'], esperado['cumple_sla'])
+            self.assertEqual(resultado['tiempo_sla'], esperado.get('tiempo_gestion_horas'))
+            self.assertEqual(inc.cumple_sla, esperado['cumple_sla'])
+
+
+@override_settings(CACHES=_CACHE_LOCAL, SLA_TRABAJOS_EN_HILO=False)
+class InvalidacionContextoTests(TestCase):
+    """Solo un cambio en un dato del SLA invalida el contexto y encola el recálculo de vencimientos."""
+
+    def _callbacks(self, guardar):
+        with self.captureOnCommitCallbacks() as callbacks:
+            guardar()
+        return callbacks
+
+    def test_guardar_sin_cambios_no_invalida(self):
+        usuario = Usuario.objects.create(usuario='Gestor Uno', nombre='Gestor')
+        horario = HorarioLaboral.objects.create(dia_semana=0, hora_inicio=hora(8, 30), hora_fin=hora(18))
+        feriado = DiaFeriado.objects.create(fecha=date(2025, 1, 1), descripcion='Año nuevo')
+        _crear_incidencia('INC0001', '01-01-2025 10:00:00 , Gestor Uno , Inicio')
+        Incidencia.objects.update(sla_obsoleto=False)
+
+        usuario.nombre = 'Otro nombre'
+        feriado.descripcion = 'Año Nuevo'
+        for registro in (usuario, horario, feriado):
+            self.assertEqual(self._callbacks(registro.save), [], registro)
+        self.assertFalse(Incidencia.objects.filter(sla_obsoleto=True).exists())
+
+    def test_cambio_del_sla_invalida(self):
+        usuario = Usuario.objects.create(usuario='Gestor Uno', nombre='Gestor')
+        horario = HorarioLaboral.objects.create(dia_semana=0, hora_inicio=hora(8, 30), hora_fin=hora(18))
+        usuario.usuario = 'Gestor Dos'
+        horario.hora_fin = hora(17)
+        for registro in (usuario, horario):
+            callbacks = self._callbacks(registro.save)
+            self.assertIn(invalidar_contexto_sla, callbacks)
+
+
+@override_settings(CACHES=_CACHE_LOCAL, SLA_TRABAJOS_EN_HILO=False)
+class VencimientoSlaTests(TestCase):
+    """El vencimiento proyectado se suma desde la última entrada y se mantiene al resolver y reabrir."""
+
+    def setUp(self):
+        criticidad = Criticidad.objects.first()
+        self.aplicacion = Aplicacion.objects.create(cod_aplicacion='APP1', nombre_aplicacion='App',
+                                                    criticidad=criticidad)
+        self.critica, self.alta = Severidad.objects.order_by('id')[:2]
+        ReglaSLA.objects.create(severidad=self.critica, criticidad_aplicacion=criticidad, tiempo_sla=timedelta(hours=4))
+        ReglaSLA.objects.create(severidad=self.alta, criticidad_aplicacion=criticidad, tiempo_sla=timedelta(hours=4))
+        # Solo los lunes son laborales: el saldo que no cabe en el día pasa al lunes siguiente.
+        HorarioLaboral.objects.create(dia_semana=0, hora_inicio=hora(8, 30), hora_fin=hora(18))
+        invalidar_contexto_sla()
+
+    def _crear(self, codigo, severidad, **campos):
+        with self.captureOnCommitCallbacks(execute=True):
+            inc = _crear_incidencia(codigo, '10-03-2025 16:00:00 , Gestor Uno , Inicio', aplicacion=self.aplicacion,
+                                    severidad=severidad, **campos)
+        inc.refresh_from_db()
+        return inc
+
+    def test_proyeccion_24_7_y_laboral(self):
+        self.assertEqual(self._crear('INC0001', self.critica).vencimiento_sla,
+                         datetime(2025, 3, 10, 20, tzinfo=ZoneInfo('UTC')))
+        # La ventana incluye el segundo de cierre (18:00:00): el lunes aporta 2 h + 1 s.
+        self.assertEqual(self._crear('INC0002', self.alta).vencimiento_sla,
+                         datetime(2025, 3, 17, 10, 29, 59, tzinfo=ZoneInfo('UTC')))
+
+    def test_resolver_y_reabrir_reproyecta(self):
+        inc = self._crear('INC0001', self.critica)
+        proyectado = inc.vencimiento_sla
+        self.assertIsNotNone(proyectado)
+
+        inc.fecha_ultima_resolucion = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            inc.save()
+        inc.refresh_from_db()
+        self.assertIsNone(inc.vencimiento_sla)
+
+        # Instancia nueva, como la de un formulario: la reapertura sola debe bastar.
+        inc = Incidencia.objects.get(pk=inc.pk)
+        inc.fecha_ultima_resolucion = None
+        with self.captureOnCommitCallbacks(execute=True):
+            inc.save(update_fields=['fecha_ultima_resolucion'])
+        inc.refresh_from_db()
+        self.assertEqual(inc.vencimiento_sla, proyectado)
+
+    def test_en_riesgo_excluye_las_vencidas(self):
+        ahora = timezone.now()
+        plazos = {'INC0001': -timedelta(days=3), 'INC0002': -timedelta(minutes=5),
+                  'INC0003': timedelta(hours=1), 'INC0004': timedelta(hours=3), 'INC0005': timedelta(hours=10)}
+        for codigo, plazo in plazos.items():
+            inc = self._crear(codigo, self.critica)
+            Incidencia.objects.filter(pk=inc.pk).update(vencimiento_sla=ahora + plazo)
+
+        self.assertEqual([inc.incidencia for inc in incidencias_en_riesgo(4)], ['INC0003', 'INC0004'])
+        self.assertEqual([inc.incidencia for inc in incidencias_en_riesgo(4, limite=1)], ['INC0003'])
+        self.assertEqual([inc.incidencia for inc in incidencias_vencidas()], ['INC0001', 'INC0002'])
+
+        self.client.force_login(User.objects.create_user('analista'))
+        datos = self.client.get(reverse('gestion:incidencias_en_riesgo'), {'horas': 4, 'limite': 1}).json()
+        self.assertEqual([fila['incidencia'] for fila in datos['results']], ['INC0003'])
+        self.assertEqual([fila['incidencia'] for fila in datos['vencidas']], ['INC0001'])
+
+
+@override_settings(CACHES=_CACHE_LOCAL, SLA_TRABAJOS_EN_HILO=False, SLA_GUARDAR_SEGMENTOS=False,
+                   SLA_TRABAJO_EXPIRACION=600)
+class TrabajosSlaTests(DatosSLAMixin, TestCase):
+    """Un trabajo que quedó en proceso sin avance se recupera; uno con latido reciente no se toca."""
+
+    def test_recupera_trabajo_abandonado(self):
+        ids = list(Incidencia.objects.order_by('id').values_list('id', flat=True))
+        hace_una_hora = timezone.now() - timedelta(hours=1)
+        abandonado = TrabajoSLA.objects.create(
+            incidencia_ids=ids, total=len(ids), procesadas=3, estado=TrabajoSLA.Estado.EN_PROCESO,
+            fecha_inicio=hace_una_hora, fecha_latido=hace_una_hora)
+        activo = TrabajoSLA.objects.create(
+            incidencia_ids=ids, total=len(ids), estado=TrabajoSLA.Estado.EN_PROCESO,
+            fecha_inicio=hace_una_hora, fecha_latido=timezone.now())
+
+        salida = StringIO()
+        call_command('procesar_trabajos_sla', workers=1, stdout=salida)
+
+        abandonado.refresh_from_db()
+        activo.refresh_from_db()
+        self.assertIn(f"Trabajo {abandonado.pk}: abandonado", salida.getvalue())
+        self.assertEqual(abandonado.estado, TrabajoSLA.Estado.COMPLETADO)
+        self.assertEqual(abandonado.procesadas, len(ids))
+        self.assertGreater(abandonado.fecha_inicio, hace_una_hora)
+        self.assertEqual(activo.estado, TrabajoSLA.Estado.EN_PROCESO)
+        self.assertFalse(Incidencia.objects.filter(sla_obsoleto=True).exists())
+
+
+@override_settings(CARGA_MASIVA_EN_HILO=False, CARGA_MASIVA_EXPIRACION=600)
+class TrabajoCargaTests(TestCase):
+    """Ciclo de vida de una carga: se lanza tras el commit, se toma una sola vez y la abandonada queda con error."""
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ajustes = override_settings(CARGA_MASIVA_DIR=Path(directorio))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def _crear(self, codigo='INC0001'):
+        contenido = pd.DataFrame([_fila_carga(codigo)], columns=_COLUMNAS_CARGA_INCIDENCIA).to_csv(index=False)
+        return crear_trabajo_carga(TrabajoCarga.Tipo.INCIDENCIAS, SimpleUploadedFile('carga.csv', contenido.encode()))
+
+    def test_lanzar_solo_en_hilo_y_tras_el_commit(self):
+        trabajo = self._crear()
+        with self.captureOnCommitCallbacks() as callbacks:
+            lanzar_trabajo_carga(trabajo)
+        self.assertEqual(callbacks, [])
+        with self.settings(CARGA_MASIVA_EN_HILO=True), self.captureOnCommitCallbacks() as callbacks:
+            lanzar_trabajo_carga(trabajo)
+        self.assertEqual(len(callbacks), 1)
+        # El hilo aún no corre: el trabajo sigue pendiente hasta el commit.
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, TrabajoCarga.Estado.PENDIENTE)
+
+    def test_se_toma_una_sola_vez(self):
+        trabajo = self._crear()
+        salida = StringIO()
+        call_command('procesar_cargas_masivas', stdout=salida)
+        self.assertIn(f"Carga {trabajo.pk} (Incidencias): Completado (1 filas, 1 creadas", salida.getvalue())
+        self.assertFalse(procesar_trabajo_carga(trabajo.pk))
+
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.creadas, 1)
+        self.assertGreaterEqual(trabajo.fecha_latido, trabajo.fecha_inicio)
+        self.assertFalse(Path(trabajo.ruta_archivo).exists())
+
+    def test_carga_abandonada_queda_con_error(self):
+        hace_una_hora = timezone.now() - timedelta(hours=1)
+        abandonada, activa = self._crear('INC0001'), self._crear('INC0002')
+        TrabajoCarga.objects.filter(pk=abandonada.pk).update(
+            estado=TrabajoCarga.Estado.EN_PROCESO, fecha_inicio=hace_una_hora, fecha_latido=hace_una_hora)
+        TrabajoCarga.objects.filter(pk=activa.pk).update(
+            estado=TrabajoCarga.Estado.EN_PROCESO, fecha_inicio=hace_una_hora, fecha_latido=timezone.now())
+
+        salida = StringIO()
+        call_command('procesar_cargas_masivas', stdout=salida)
+
+        abandonada.refresh_from_db()
+        activa.refresh_from_db()
+        self.assertIn(f"Carga {abandonada.pk}: abandonada", salida.getvalue())
+        self.assertEqual(abandonada.estado, TrabajoCarga.Estado.ERROR)
+        self.assertIsNotNone(abandonada.fecha_fin)
+        self.assertFalse(Path(abandonada.ruta_archivo).exists())
+        self.assertEqual(activa.estado, TrabajoCarga.Estado.EN_PROCESO)
+        self.assertTrue(Path(activa.ruta_archivo).exists())
+        self.assertFalse(Incidencia.objects.exists())
+
+
+@override_settings(CACHES=_CACHE_LOCAL, SLA_CALCULO_BLOQUE=3, SLA_TRABAJOS_EN_HILO=False, SLA_GUARDAR_SEGMENTOS=False)
+class SimulacionSlaTests(DatosSLAMixin, TestCase):
+    """La simulación no escribe en Incidencia ni cambia los resultados guardados."""
+
+    def test_no_escribe_en_incidencia(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        call_command('calcular_sla', restart=True, workers=1, checkpoint=f"{directorio}/calcular_sla.checkpoint.json",
+                     stdout=StringIO())
+        # Sin caché de bitácoras: la simulación la completa entre bloques.
+        BitacoraParseada.objects.all().delete()
+        antes = list(Incidencia.objects.order_by('id').values())
+        version = version_actual()
+
+        criticidad = self.aplicacion.criticidad_id
+        reglas = {(severidad.id, criticidad): timedelta(minutes=1) for severidad in self.severidades}
+        resultado = simular_sla(Incidencia.objects.all(), reglas=reglas, horarios={5: (hora(9), hora(13))})
+
+        self.assertEqual(resultado['total'], self.cantidad_incidencias)
+        self.assertTrue(all(fila['evaluadas_simulado'] for fila in resultado['filas']))
+        self.assertEqual(list(Incidencia.objects.order_by('id').values()), antes)
+        self.assertEqual(version_actual(), version)
+        self.assertEqual(BitacoraParseada.objects.count(), self.cantidad_incidencias)
+
+
+class MarcaPorGestorTests(TestCase):
+    """Un cambio de gestor marca solo las incidencias con ese usuario en la bitácora, con o sin acentos."""
+
+    def setUp(self):
+        bitacoras = {
+            'INC0001': "10-03-2025 10:00:00 , María López , Inicio¶10-03-2025 11:00:00 , Gestor Uno , Respuesta",
+            'INC0002': "10-03-2025 10:00:00 , Søren Ørsted , Inicio",
+            'INC0003': "10-03-2025 10:00:00 , Gestor Uno , Inicio¶10-03-2025 11:00:00 , María Lópezz , Otra",
+        }
+        self.incidencias = {codigo: _crear_incidencia(codigo, bitacora) for codigo, bitacora in bitacoras.items()}
+        obtener_entradas(list(self.incidencias.values()))
+
+    def _marcadas(self, usuario):
+        Incidencia.objects.update(sla_obsoleto=False)
+        marcar_por_usuario(usuario)
+        return set(Incidencia.objects.filter(sla_obsoleto=True).values_list('incidencia', flat=True))
+
+    def test_marca_por_usuario_normalizado(self):
+        self.assertEqual(self._marcadas("maría lópez"), {'INC0001'})
+        self.assertEqual(self._marcadas("  MARIA  LOPEZ "), {'INC0001'})
+        self.assertEqual(self._marcadas("Søren Ørsted"), {'INC0002'})
+        self.assertEqual(self._marcadas("Gestor Uno"), {'INC0001', 'INC0003'})
+        self.assertEqual(self._marcadas("Nadie"), set())
+
+    def test_bitacora_sin_parsear_se_marca(self):
+        BitacoraParseada.objects.filter(incidencia=self.incidencias['INC0002']).delete()
+        self.assertEqual(self._marcadas("maría lópez"), {'INC0001', 'INC0002'})
+
+
+_DIAS_PROCESA_SLA = ('LUNES', 'MARTES', 'MIERCOLES', 'JUEVES', 'VIERNES', 'SABADO', 'DOMINGO')
+
+
+def _tiempo_por_minuto(start_dt, end_dt, horario_laboral, dias_feriados, es_critica_24_7=False):
+    """calcular_tiempo_efectivo de procesa_sla antes de compilar_horario: recorrido minuto a minuto."""
+    def es_laboral(instante):
+        horario = horario_laboral.get(_DIAS_PROCESA_SLA[instante.weekday()])
+        if instante.date() in dias_feriados or horario is None:
+            return False
+        h_inicio, m_inicio, h_fin, m_fin = horario
+        return (instante.replace(hour=h_inicio, minute=m_inicio, second=0, microsecond=0) <= instante <
+                instante.replace(hour=h_fin, minute=m_fin, second=0, microsecond=0))
+
+    if start_dt >= end_dt:
+        return timedelta(0)
+    if es_critica_24_7:
+        return end_dt - start_dt
+    total, instante = timedelta(0), start_dt
+    while instante < end_dt:
+        if es_laboral(instante):
+            total += timedelta(minutes=1)
+        instante += timedelta(minutes=1)
+    return total
+
+
+
+class _ConexionFalsa:
+    """Conexión de mysql.connector con la tabla INCIDENCIA en memoria; guarda los parámetros de cada consulta."""
+
+    def __init__(self, filas):
+        self.filas = filas
+        self.consultas = []
+
+    def cursor(self, **opciones):
+        return self
+
+    def execute(self, consulta, parametros):
+        self.consultas.append(parametros)
+
+    def __iter__(self):
+        # Como MySQL, sin orden garantizado: se entregan al revés.
+        buscadas = set(self.consultas[-1])
+        return (dict(fila) for fila in reversed(self.filas) if fila['incidencia'] in buscadas)
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+@skipUnless(find_spec('mysql'), "procesa_sla necesita mysql-connector-python")
+class ProcesaSlaTests(SimpleTestCase):
+    """El script procesa_sla debe contar lo mismo que su recorrido minuto a minuto original."""
+
+    HORARIO = {'LUNES': (8, 30, 18, 0), 'MARTES': (8, 30, 18, 0), 'MIERCOLES': (8, 30, 18, 0),
+               'JUEVES': (8, 30, 18, 0), 'VIERNES': (8, 30, 17, 45), 'SABADO': (9, 0, 13, 0), 'DOMINGO': None}
+    FERIADOS = [date(2025, 1, 1), date(2025, 4, 18), date(2025, 4, 19), date(2025, 9, 18), date(2025, 9, 19)]
+
+    def test_igual_al_recorrido_por_minuto(self):
+        from gestion.services import procesa_sla
+
+        horario = procesa_sla.compilar_horario(self.HORARIO, self.FERIADOS)
+        rnd = random.Random(20)
+        inicios = _INICIOS + [datetime(2025, 9, 17, 17, 59, 30), datetime(2025, 12, 31, 23, 59, 59)]
+        pares = _intervalos(rnd, 300, 4 * 86400, inicios)
+        pares += [(inicio, inicio + timedelta(microseconds=rnd.randint(1, 10 ** 6))) for inicio, _ in pares[:20]]
+        for inicio, fin in pares:
+            for critica in (False, True):
+                self.assertEqual(procesa_sla.calcular_tiempo_efectivo(inicio, fin, horario, critica),
+                                 _tiempo_por_minuto(inicio, fin, self.HORARIO, set(self.FERIADOS), critica),
+                                 (inicio, fin, critica))
+
+    def _datos(self):
+        from gestion.services import procesa_sla
+
+        rnd = random.Random(12)
+        filas = []
+        for i, perfil in enumerate(PERFILES * 2):
+            incidencia = generar_incidencia(rnd, i, perfil)
+            filas.append({'incidencia': f"INC{i:04d}", 'id_aplicacion': 10 + i % 3,
+                          'id_criticidad': 1 if perfil == 'critica_24_7' else 2 + i % 2,
+                          'fecha_ultima_resolucion': datetime(2025, 12, 1, 10), 'bitacora': incidencia.bitacora})
+        config = {
+            'grupos_gestores': {'GLOBAL_GROUP': [procesa_sla.normalizar_texto(g) for g in _GESTORES]},
+            'severidad_incidencia_mapeo': {1: 'Critica', 2: 'Alta', 3: 'Media'},
+            'aplicacion_criticidad_mapeo': {10: {'nombre': 'App Uno', 'criticidad': 'alta'},
+                                            11: {'nombre': 'App Dos', 'criticidad': 'media'}},
+            'sla_combinado': {('critica', 'alta'): timedelta(hours=4), ('alta', 'alta'): timedelta(hours=2),
+                              ('media', 'alta'): timedelta(hours=8), ('alta', 'media'): timedelta(hours=1)},
+            'horario_laboral': self.HORARIO, 'dias_feriados': self.FERIADOS, 'db_config': {},
+        }
+        # Repetidos, uno inexistente y líneas vacías, como en los archivos reales.
+        ids = [fila['incidencia'] for fila in filas]
+        ids = ids[5:] + ['INC9999'] + ids[:5] + [ids[7], ids[0]]
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ruta = Path(directorio) / 'incidencias.txt'
+        ruta.write_text('\n'.join(ids[:4] + [''] + ids[4:]) + '\n\n', encoding='utf-8')
+        return procesa_sla, filas, config, ids, str(ruta)
+
+    def _procesar(self, procesa_sla, filas, config, ruta, tamano_bloque):
+        conexion = _ConexionFalsa(filas)
+        with mock.patch.object(procesa_sla.mysql.connector, 'connect', return_value=conexion, create=True):
+            return list(procesa_sla.procesar_incidencias(ruta, config, tamano_bloque)), conexion
+
+    def test_streaming_igual_a_la_lista_anterior(self):
+        procesa_sla, filas, config, ids, ruta = self._datos()
+        # La versión en lista anterior: una sola consulta y los resultados en el orden del archivo.
+        por_codigo = {fila['incidencia']: fila for fila in filas}
+        esperado = [procesa_sla._procesar_fila(por_codigo[inc_id], config) if inc_id in por_codigo
+                    else {'incidencia': inc_id, 'cumple_sla': 'No Encontrada en DB'} for inc_id in ids]
+        self.assertLessEqual({'Sí', 'No', 'No Encontrada en DB'}, {fila['cumple_sla'] for fila in esperado})
+
+        for tamano_bloque in (1, 4, 1000):
+            resultados, conexion = self._procesar(procesa_sla, filas, config, ruta, tamano_bloque)
+            self.assertEqual(resultados, esperado, tamano_bloque)
+            self.assertEqual(len(conexion.consultas), -(-len(ids) // tamano_bloque))
+            self.assertTrue(all(len(parametros) <= tamano_bloque for parametros in conexion.consultas))
+
+    def test_traza_solo_en_debug(self):
+        procesa_sla, filas, config, ids, ruta = self._datos()
+        nivel = procesa_sla.logger.level
+        self.addCleanup(procesa_sla.logger.setLevel, nivel)
+
+        procesa_sla.logger.setLevel('INFO')
+        with mock.patch.object(procesa_sla.logger, 'debug') as debug, \
+                mock.patch.object(procesa_sla, '_procesar_fila', wraps=procesa_sla._procesar_fila) as procesar_fila:
+            self._procesar(procesa_sla, filas, config, ruta, 4)
+        debug.assert_not_called()
+        self.assertTrue(all(llamada.args[2] is None for llamada in procesar_fila.call_args_list))
+
+        procesa_sla.logger.setLevel('DEBUG')
+        with self.assertLogs(procesa_sla.logger, 'DEBUG') as registro:
+            _, conexion = self._procesar(procesa_sla, filas, config, ruta, 4)
+        # Una línea por fila leída: un repetido en otro bloque se vuelve a calcular.
+        existentes = {fila['incidencia'] for fila in filas}
+        leidas = sum(len(set(parametros) & existentes) for parametros in conexion.consultas)
+        trazas = [linea for linea in registro.output if 'Traza INC' in linea]
+        self.assertEqual(len(trazas), leidas)
+
+
+@override_settings(CACHES=_CACHE_LOCAL, SLA_TRABAJOS_EN_HILO=False)
+class CalendarioPorIncidenciaTests(TestCase):
+    """Cada incidencia usa el calendario de su grupo, si no el de su bloque, si no el general."""
+
+    # Lunes 10 de marzo de 2025, 08:00, al martes 11 (feriado general), 20:00.
+    INICIO, FIN = datetime(2025, 3, 10, 8), datetime(2025, 3, 11, 20)
+
+    def setUp(self):
+        for dia_semana in range(5):
+            HorarioLaboral.objects.create(dia_semana=dia_semana, hora_inicio=hora(9), hora_fin=hora(18))
+        DiaFeriado.objects.create(fecha=date(2025, 3, 11), descripcion='Feriado general')
+        self.continuo = CalendarioLaboral.objects.create(nombre='Continuo', usa_feriados_generales=False)
+        for dia_semana in range(7):
+            VentanaCalendario.objects.create(calendario=self.continuo, dia_semana=dia_semana,
+                                             hora_inicio=hora(0), hora_fin=hora(23, 59, 59))
+        self.reducido = CalendarioLaboral.objects.create(nombre='Reducido')
+        self.ventana = VentanaCalendario.objects.create(calendario=self.reducido, dia_semana=0,
+                                                        hora_inicio=hora(10), hora_fin=hora(12))
+        self.bloque = Bloque.objects.get(desc_bloque='BLOQUE 1')
+        self.bloque.calendario = self.continuo
+        self.bloque.save()
+        self.grupo = GrupoResolutor.objects.get(desc_grupo_resol='SWF_INDRA_G3')
+        self.grupo.calendario = self.reducido
+        self.grupo.save()
+
+        severidad = Severidad.objects.order_by('id')[1]
+        self.incidencias = {
+            'general': _crear_incidencia('INC0001', '', severidad=severidad),
+            'bloque': _crear_incidencia('INC0002', '', severidad=severidad, bloque=self.bloque),
+            'grupo_y_bloque': _crear_incidencia('INC0003', '', severidad=severidad, bloque=self.bloque,
+                                                grupo_resolutor=self.grupo),
+            'grupo': _crear_incidencia('INC0004', '', severidad=severidad, grupo_resolutor=self.grupo),
+        }
+        invalidar_contexto_sla()
+
+    def _segundos(self, inicio=INICIO, fin=FIN):
+        contexto = obtener_contexto_sla()
+        return {clave: contexto.calendario_de(inc).segundos_laborales(inicio, fin)
+                for clave, inc in self.incidencias.items()}
+
+    def _guardar(self, guardar):
+        Incidencia.objects.update(sla_obsoleto=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            guardar()
+        return set(Incidencia.objects.filter(sla_obsoleto=True).values_list('incidencia', flat=True))
+
+    def test_grupo_antes_que_bloque_antes_que_general(self):
+        contexto = obtener_contexto_sla()
+        self.assertEqual({clave: contexto.calendario_id(inc) for clave, inc in self.incidencias.items()},
+                         {'general': None, 'bloque': self.continuo.pk,
+                          'grupo_y_bloque': self.reducido.pk, 'grupo': self.reducido.pk})
+        # Las ventanas incluyen el segundo de cierre. El continuo no suma el feriado general del martes.
+        self.assertEqual(self._segundos(), {'general': 9 * 3600 + 1, 'bloque': 16 * 3600 + 20 * 3600,
+                                            'grupo_y_bloque': 2 * 3600 + 1, 'grupo': 2 * 3600 + 1})
+
+    def test_feriados_del_calendario(self):
+        lunes = datetime(2025, 3, 17, 8), datetime(2025, 3, 17, 20)
+        self.assertEqual(self._segundos(*lunes)['grupo'], 2 * 3600 + 1)
+        marcadas = self._guardar(lambda: FeriadoCalendario.objects.create(calendario=self.reducido,
+                                                                          fecha=date(2025, 3, 17)))
+        self.assertEqual(marcadas, {'INC0003', 'INC0004'})
+        self.assertEqual(self._segundos(*lunes), {'general': 9 * 3600 + 1, 'bloque': 12 * 3600,
+                                                  'grupo_y_bloque': 0, 'grupo': 0})
+
+        # El feriado general solo llega al calendario que usa los feriados generales.
+        self._guardar(lambda: DiaFeriado.objects.create(fecha=date(2025, 3, 10), descripcion='Otro'))
+        self.assertEqual(self._segundos(), {'general': 0, 'bloque': 16 * 3600 + 20 * 3600,
+                                            'grupo_y_bloque': 0, 'grupo': 0})
+
+    def test_cambio_de_calendario_invalida_el_contexto(self):
+        self.assertEqual(self._segundos()['grupo'], 2 * 3600 + 1)
+
+        self.ventana.hora_fin = hora(13)
+        self.assertEqual(self._guardar(self.ventana.save), {'INC0003', 'INC0004'})
+        self.assertEqual(self._segundos()['grupo'], 3 * 3600 + 1)
+
+        self.reducido.usa_feriados_generales = False
+        self.assertEqual(self._guardar(self.reducido.save), {'INC0003', 'INC0004'})
+
+        # Sin calendario en el grupo, la incidencia con bloque pasa al del bloque y la otra al general.
+        self.grupo.calendario = None
+        self.assertEqual(self._guardar(self.grupo.save), {'INC0003', 'INC0004'})
+        segundos = self._segundos()
+        self.assertEqual((segundos['grupo_y_bloque'], segundos['grupo']), (16 * 3600 + 20 * 3600, 9 * 3600 + 1))
+
+
+@override_settings(CACHES=_CACHE_LOCAL, SLA_TRABAJOS_EN_HILO=False, SLA_CALCULO_BLOQUE=4)
+class SegmentosSlaTests(DatosSLAMixin, TestCase):
+    """Recalcular reemplaza los IncidenciaSegmento de la incidencia; con SLA_GUARDAR_SEGMENTOS=False no se guardan."""
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        self.checkpoint = f"{directorio}/calcular_sla.checkpoint.json"
+
+    def _calcular(self, **opciones):
+        call_command('calcular_sla', restart=True, workers=1, checkpoint=self.checkpoint, stdout=StringIO(),
+                     **opciones)
+
+    def _segmentos(self):
+        return list(IncidenciaSegmento.objects.order_by('incidencia_id', 'orden').values_list(
+            'incidencia__incidencia', 'orden', 'inicio', 'fin', 'usuario_origen', 'usuario_destino', 'contado',
+            'motivo', 'segundos_efectivos'))
+
+    def test_recalcular_reemplaza_los_segmentos(self):
+        self._calcular()
+        primera = self._segmentos()
+        esperados = sum(len(parsear_bitacora(inc.bitacora)) - 1 for inc in Incidencia.objects.all())
+        self.assertEqual(len(primera), esperados)
+
+        self._calcular()
+        self.assertEqual(self._segmentos(), primera)
+
+        # Con menos entradas en la bitácora, el recálculo incremental deja solo los segmentos nuevos.
+        inc = Incidencia.objects.get(incidencia='INC0000')
+        inc.bitacora = "10-03-2025 10:00:00 , Gestor Uno , Inicio\n10-03-2025 11:00:00 , Soporte N1 , Cierre"
+        inc.save()
+        self._calcular(only_stale=True)
+        segmentos = self._segmentos()
+        self.assertEqual([segmento[:2] for segmento in segmentos if segmento[0] == 'INC0000'], [('INC0000', 0)])
+        self.assertEqual([segmento for segmento in segmentos if segmento[0] != 'INC0000'],
+                         [segmento for segmento in primera if segmento[0] != 'INC0000'])
+
+    @override_settings(SLA_GUARDAR_SEGMENTOS=False)
+    def test_sin_segmentos(self):
+        self._calcular()
+        self.assertFalse(IncidenciaSegmento.objects.exists())
+        self.assertFalse(Incidencia.objects.filter(sla_obsoleto=True).exists())
+        self.assertFalse(Incidencia.objects.filter(cumple_sla__isnull=True).exists())
@@ -48,9 +48,25 @@ urlpatterns = [
          views.eliminar_incidencia_view, name='eliminar_incidencia'),
     path('incidencias/carga-masiva/', views.carga_masiva_incidencia_view,
          name='carga_masiva_incidencia'),
+    path('cargas-masivas/<int:pk>/estado/', views.estado_carga_masiva_view,
+         name='estado_carga_masiva'),
+    path('cargas-masivas/<int:pk>/errores/', views.errores_carga_masiva_view,
+         name='errores_carga_masiva'),
 
     path('incidencias/calcular-sla/',
          views.calculo_sla.calcular_sla_view, name='calcular_sla'),
+    path('incidencias/calcular-sla/estado/<int:job_id>/',
+         views.estado_calculo_sla_view, name='estado_calculo_sla'),
+    path('incidencias/calcular-sla/resultados/<int:job_id>/',
+         views.resultados_calculo_sla_view, name='resultados_calculo_sla'),
+    path('incidencias/sla-en-riesgo/', views.incidencias_en_riesgo_view,
+         name='incidencias_en_riesgo'),
+    path('incidencias/<int:pk>/traza-sla/',
+         views.traza_sla_view, name='traza_sla'),
+    path('incidencias/simulacion-sla/',
+         views.simulacion_sla_view, name='simulacion_sla'),
+    path('incidencias/simulacion-sla/simular/',
+         views.simular_sla_view, name='simular_sla'),
     path('incidencias/exportar-sla-csv/',
          views.exportar_sla_csv_view, name='exportar_sla_csv'),
     path('incidencias/exportar-reporte/', views.exportar_incidencias_reporte_view,
@@ -8,4 +8,6 @@ from .aplicaciones import (aplicaciones_view, registrar_aplicacion_view,
 from .cod_cierre import (
     codigos_cierre_view, registrar_cod_cierre_view, eliminar_cod_cierre_view, editar_cod_cierre_view, carga_masiva_cod_cierre_view, obtener_ultimos_codigos_cierre, )
 from .logs import view_logs, download_log_file
-from .calculo_sla import calcular_sla_view, exportar_sla_csv_view
+from .cargas import estado_carga_masiva_view, errores_carga_masiva_view
+from .calculo_sla import calcular_sla_view, estado_calculo_sla_view, resultados_calculo_sla_view, traza_sla_view, incidencias_en_riesgo_view, exportar_sla_csv_view
+from .simulacion_sla import simulacion_sla_view, simular_sla_view
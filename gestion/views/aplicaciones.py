@@ -1,15 +1,15 @@
 # gestion/views/aplicaciones.py
 
-import csv
-import io
-
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q
 from django.shortcuts import render, redirect
+from django.urls import reverse
 
-from ..models import Aplicacion, Bloque, Criticidad, Estado
+from ..models import Aplicacion, Bloque, Criticidad, Estado, TrabajoCarga
 from .utils import no_cache, logger
+from .cargas import trabajo_carga_solicitado
+from ..services.cargas_masivas import crear_trabajo_carga, lanzar_trabajo_carga
 
 
 @login_required
@@ -160,182 +160,25 @@ def carga_masiva_view(request):
     """
     Gestiona la carga masiva de aplicaciones desde un archivo CSV con mapeo de datos,
     validación de duplicados y registro de resumen detallado.
+    El archivo se guarda en disco y lo procesa un TrabajoCarga en segundo
+    plano (ver services.cargas_masivas); la página consulta su avance.
     """
     if request.method == 'POST':
         logger.info(
             f"Usuario '{request.user}' ha iniciado una carga masiva de aplicaciones.")
         csv_file = request.FILES.get('csv_file')
-        context = {}
 
         if not csv_file or not csv_file.name.endswith('.csv'):
             messages.error(
                 request, 'Por favor, seleccione un archivo CSV válido.')
             return render(request, 'gestion/carga_masiva_aplicativo.html')
 
-        try:
-            # Decodificación del archivo
-            try:
-                decoded_file = csv_file.read().decode('utf-8')
-            except UnicodeDecodeError:
-                csv_file.seek(0)
-                decoded_file = csv_file.read().decode('latin-1')
-
-            io_string = io.StringIO(decoded_file)
-            reader = csv.DictReader(io_string, delimiter=';')
-            all_rows = list(reader)
-            total_records_in_file = len(all_rows)
-
-            # --- NUEVO: VALIDACIÓN DE DUPLICADOS POR CLAVE COMPUESTA ---
-            seen_keys = set()
-            duplicates_found = []
-            for line_number, row in enumerate(all_rows, start=2):
-                id_val = row.get('id_aplicacion', '').strip()
-                cod_val = row.get('id_modulo', '').strip()
-
-                if not id_val or not cod_val:
-                    continue  # No se puede validar una clave incompleta
-
-                composite_key = (id_val, cod_val)
-                if composite_key in seen_keys:
-                    duplicates_found.append({
-                        'line': line_number,
-                        'id': id_val,
-                        'cod': cod_val
-                    })
-                else:
-                    seen_keys.add(composite_key)
-
-            if duplicates_found:
-                error_msg = "El archivo contiene combinaciones de 'id_aplicacion' y 'id_modulo' duplicadas y no pudo ser procesado."
-                logger.error(
-                    f"{error_msg} Usuario: '{request.user}'. Duplicados: {duplicates_found}")
-                messages.error(request, error_msg +
-                               " Revisa los detalles a continuación.")
-                context['duplicates'] = duplicates_found
-                return render(request, 'gestion/carga_masiva_aplicativo.html', context)
-            # --- FIN DE LA VALIDACIÓN DE DUPLICADOS ---
-
-            criticidad_map = {
-                'alta': 'critica', 'critica': 'critica', 'crítica': 'critica', 'media': 'no critica',
-                'no critica': 'no critica', 'baja': 'sin criticidad', 'sin criticidad': 'sin criticidad',
-                'no crítica': 'no critica',
-            }
-            estado_map = {
-                'dev': 'Construccion', 'construccion': 'Construccion', 'en construcción': 'Construccion', 'prod': 'Produccion',
-                'produccion': 'Produccion', 'en producción': 'Produccion', 'en revisión': 'Pendiente', 'desuso': 'Deshuso',
-                'pendiente': 'Pendiente', 'resuelto': 'Resuelto', 'cerrado': 'Cerrado',
-            }
-            bloque_map = {
-                'b1': 'BLOQUE 1', 'bloque 1': 'BLOQUE 1', 'b2': 'BLOQUE 2', 'bloque 2': 'BLOQUE 2',
-                'b3': 'BLOQUE 3', 'bloque 3': 'BLOQUE 3', 'b4': 'BLOQUE 4', 'bloque 4': 'BLOQUE 4',
-                'ninguno': 'Sin bloque', 'sin bloque': 'Sin bloque',
-            }
-
-            success_count = 0
-            failed_rows = []
-
-            for line_number, row in enumerate(all_rows, start=2):
-                try:
-                    if not any(field.strip() for field in row.values()):
-                        total_records_in_file -= 1
-                        continue
-
-                    id_aplicacion_str = row.get('id_aplicacion', '').strip()
-                    if not id_aplicacion_str:
-                        raise ValueError(
-                            "La columna 'id_aplicacion' es obligatoria.")
-                    id_aplicacion_pk = int(id_aplicacion_str)
-
-                    cod_aplicacion = row.get('id_modulo', '').strip()
-                    nombre_aplicacion = row.get('nombre_app', '').strip()
-                    if not cod_aplicacion or not nombre_aplicacion:
-                        raise ValueError(
-                            "Las columnas 'id_modulo' y 'nombre_app' son obligatorias.")
-
-                    # ... (lógica de mapeo y obtención de objetos que ya tenías)
-                    criticidad_csv = row.get('criticidad', '').strip().lower()
-                    estado_csv = row.get('estado', '').strip().lower()
-                    bloque_csv = row.get('bloque', '').strip().lower()
-
-                    criticidad_str = criticidad_map.get(
-                        criticidad_csv, row.get('criticidad', '').strip())
-                    estado_str = estado_map.get(
-                        estado_csv, row.get('estado', '').strip())
-                    bloque_str = bloque_map.get(
-                        bloque_csv, row.get('bloque', '').strip())
-
-                    bloque_obj = Bloque.objects.get(
-                        desc_bloque__iexact=bloque_str) if bloque_str else None
-                    criticidad_obj = Criticidad.objects.get(
-                        desc_criticidad__iexact=criticidad_str) if criticidad_str else None
-                    estado_obj = Estado.objects.get(
-                        desc_estado__iexact=estado_str) if estado_str else None
-
-                    Aplicacion.objects.update_or_create(
-                        id=id_aplicacion_pk,
-                        defaults={
-                            'cod_aplicacion': cod_aplicacion,
-                            'nombre_aplicacion': nombre_aplicacion,
-                            'bloque': bloque_obj,
-                            'criticidad': criticidad_obj,
-                            'estado': estado_obj,
-                            'desc_aplicacion': row.get('descripcion', '').strip()
-                        }
-                    )
-                    success_count += 1
-
-                except Exception as e:
-                    failed_rows.append({
-                        'line': line_number,
-                        'row_data': ';'.join(row.values()),
-                        'error': str(e)
-                    })
-
-            # --- NUEVO: LOGGING DETALLADO Y MENSAJES A USUARIO ---
-            log_summary = f"""
---------------------------------------------------
-RESUMEN DE CARGA MASIVA DE APLICACIONES
-Usuario: {request.user}
-Archivo: {csv_file.name}
---------------------------------------------------
-Total de filas en el archivo: {total_records_in_file}
-Cargados/Actualizados con éxito: {success_count}
-Filas con errores: {len(failed_rows)}
---------------------------------------------------"""
-
-            if failed_rows:
-                log_summary += "\nDETALLE DE ERRORES:\n"
-                for item in failed_rows:
-                    log_summary += f"  - Fila {item['line']}: {item['error']} (Datos: {item['row_data']})\n"
-                log_summary += "--------------------------------------------------"
-
-            logger.info(log_summary)
-
-            if success_count > 0:
-                messages.success(
-                    request, f'¡Carga completada! Se procesaron {success_count} aplicaciones con éxito.')
-            if failed_rows:
-                messages.warning(
-                    request, f'Se encontraron {len(failed_rows)} errores. Revisa los detalles en el log del sistema.')
-
-            context = {
-                'failed_rows': failed_rows,
-                'stats': {
-                    'total': total_records_in_file,
-                    'success': success_count,
-                    'failed': len(failed_rows)
-                }
-            }
-            return render(request, 'gestion/carga_masiva_aplicativo.html', context)
-
-        except Exception as e:
-            logger.critical(
-                f"Error CRÍTICO en carga masiva por '{request.user}': {e}", exc_info=True)
-            messages.error(
-                request, f"Ocurrió un error general e inesperado: {e}")
-            return render(request, 'gestion/carga_masiva_aplicativo.html')
+        trabajo = crear_trabajo_carga(TrabajoCarga.Tipo.APLICACIONES, csv_file, request.user)
+        lanzar_trabajo_carga(trabajo)
+        return redirect(f"{reverse('gestion:carga_masiva_aplicaciones')}?trabajo={trabajo.pk}")
 
-    return render(request, 'gestion/carga_masiva_aplicativo.html')
+    return render(request, 'gestion/carga_masiva_aplicativo.html',
+                  {'trabajo': trabajo_carga_solicitado(request, TrabajoCarga.Tipo.APLICACIONES)})
 
 
 @login_required
@@ -0,0 +1,54 @@
+# gestion/views/cargas.py
+
+from pathlib import Path
+
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from .utils import logger, no_cache
+from ..models import TrabajoCarga
+
+
+def _trabajo_de_usuario(user, pk):
+    """TrabajoCarga 'pk' si lo creó 'user' (el staff ve todos); si no, 404."""
+    trabajos = TrabajoCarga.objects.all() if user.is_staff else TrabajoCarga.objects.filter(usuario=user)
+    return get_object_or_404(trabajos, pk=pk)
+
+
+def trabajo_carga_solicitado(request, tipo):
+    """TrabajoCarga indicado en ?trabajo= de una página de carga masiva, o None."""
+    trabajo_id = request.GET.get('trabajo')
+    if not trabajo_id or not trabajo_id.isdigit():
+        return None
+    try:
+        trabajo = _trabajo_de_usuario(request.user, int(trabajo_id))
+    except Http404:
+        return None
+    return trabajo if trabajo.tipo == tipo else None
+
+
+@login_required
+@no_cache
+def estado_carga_masiva_view(request, pk):
+    """Avance de un TrabajoCarga: filas procesadas, creadas, omitidas y con error."""
+    trabajo = _trabajo_de_usuario(request.user, pk)
+    return JsonResponse({
+        'status': 'success', 'estado': trabajo.estado, 'procesadas': trabajo.procesadas,
+        'creadas': trabajo.creadas, 'actualizadas': trabajo.actualizadas, 'omitidas': trabajo.omitidas,
+        'fallidas': trabajo.fallidas, 'detalle': trabajo.detalle, 'mensaje': trabajo.mensaje,
+        'errores_url': reverse('gestion:errores_carga_masiva', args=[trabajo.pk]) if trabajo.ruta_errores else None,
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@login_required
+def errores_carga_masiva_view(request, pk):
+    """Descarga el CSV con las filas que no se pudieron cargar."""
+    trabajo = _trabajo_de_usuario(request.user, pk)
+    if not trabajo.ruta_errores or not Path(trabajo.ruta_errores).exists():
+        raise Http404("La carga no tiene un reporte de errores.")
+    logger.info(
+        f"Usuario '{request.user}' descargó los errores de la carga masiva {trabajo.pk}.")
+    return FileResponse(open(trabajo.ruta_errores, 'rb'), as_attachment=True,
+                        filename=f"errores_carga_{trabajo.tipo}_{trabajo.pk}.csv", content_type='text/csv')
@@ -1,14 +1,15 @@
 # gestion/views/cod_cierre.py
 
-import csv
-import io
 from django.http import JsonResponse
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q  # <-- AÑADIDO: Importante para búsquedas complejas
 from .utils import no_cache, logger
-from ..models import CodigoCierre, Aplicacion
+from .cargas import trabajo_carga_solicitado
+from ..services.cargas_masivas import crear_trabajo_carga, lanzar_trabajo_carga
+from ..models import CodigoCierre, Aplicacion, TrabajoCarga
 
 
 @login_required
@@ -206,148 +207,25 @@ def carga_masiva_cod_cierre_view(request):
     """
     Gestiona la carga masiva de códigos de cierre desde un archivo CSV,
     validando duplicados por clave compuesta y registrando un resumen detallado.
+    El archivo se guarda en disco y lo procesa un TrabajoCarga en segundo
+    plano (ver services.cargas_masivas); la página consulta su avance.
     """
     if request.method == 'POST':
         logger.info(
             f"Usuario '{request.user}' ha iniciado una carga masiva de códigos de cierre.")
         csv_file = request.FILES.get('csv_file')
-        context = {}
 
         if not csv_file or not csv_file.name.endswith('.csv'):
             messages.error(
                 request, 'Por favor, seleccione un archivo CSV válido.')
             return render(request, 'gestion/carga_masiva_cod_cierre.html')
 
-        try:
-            # Decodificación del archivo
-            try:
-                decoded_file = csv_file.read().decode('utf-8')
-            except UnicodeDecodeError:
-                csv_file.seek(0)
-                decoded_file = csv_file.read().decode('latin-1')
-
-            io_string = io.StringIO(decoded_file)
-            reader = csv.DictReader(io_string, delimiter=';')
-            all_rows = list(reader)
-            total_records_in_file = len(all_rows)
-
-            # --- NUEVO: VALIDACIÓN DE DUPLICADOS POR CLAVE COMPUESTA ---
-            seen_keys = set()
-            duplicates_found = []
-            for line_number, row in enumerate(all_rows, start=2):
-                id_val = row.get('idCodCierre', '').strip()
-                cod_val = row.get('cod_cierre', '').strip()
-
-                if not id_val or not cod_val:
-                    continue  # No se puede validar una clave incompleta
-
-                composite_key = (id_val, cod_val)
-                if composite_key in seen_keys:
-                    duplicates_found.append({
-                        'line': line_number,
-                        'id': id_val,
-                        'cod': cod_val
-                    })
-                else:
-                    seen_keys.add(composite_key)
-
-            if duplicates_found:
-                error_msg = "El archivo contiene combinaciones de 'idCodCierre' y 'cod_cierre' duplicadas y no pudo ser procesado."
-                logger.error(
-                    f"{error_msg} Usuario: '{request.user}'. Duplicados: {duplicates_found}")
-                messages.error(request, error_msg +
-                               " Revisa los detalles a continuación.")
-                context['duplicates'] = duplicates_found
-                return render(request, 'gestion/carga_masiva_cod_cierre.html', context)
-            # --- FIN DE LA VALIDACIÓN DE DUPLICADOS ---
-
-            success_count = 0
-            failed_rows = []
-
-            for line_number, row in enumerate(all_rows, start=2):
-                try:
-                    if not any(field.strip() for field in row.values()):
-                        total_records_in_file -= 1
-                        continue
-
-                    # ... (lógica de procesamiento de fila que ya tenías)
-                    id_cod_cierre_str = row.get('idCodCierre', '').strip()
-                    if not id_cod_cierre_str:
-                        raise ValueError(
-                            "La columna 'idCodCierre' es obligatoria.")
-                    id_cod_cierre_pk = int(id_cod_cierre_str)
-
-                    cod_cierre = row.get('cod_cierre', '').strip()
-                    id_aplicacion = row.get('id_aplicacion', '').strip()
-                    if not all([cod_cierre, id_aplicacion]):
-                        raise ValueError(
-                            "Las columnas 'cod_cierre' y 'id_aplicacion' son obligatorias.")
-
-                    aplicacion_obj = Aplicacion.objects.get(pk=id_aplicacion)
-
-                    CodigoCierre.objects.update_or_create(
-                        id=id_cod_cierre_pk,
-                        defaults={
-                            'cod_cierre': cod_cierre,
-                            'aplicacion': aplicacion_obj,
-                            'desc_cod_cierre': row.get('descripcion_cierre', '').strip(),
-                            'causa_cierre': row.get('causa_cierre', '').strip()
-                        }
-                    )
-                    success_count += 1
-
-                except Exception as e:
-                    failed_rows.append({
-                        'line': line_number,
-                        'row_data': ';'.join(row.values()),
-                        'error': str(e)
-                    })
-
-            # --- NUEVO: LOGGING DETALLADO Y MENSAJES A USUARIO ---
-            log_summary = f"""
---------------------------------------------------
-RESUMEN DE CARGA MASIVA DE CÓDIGOS DE CIERRE
-Usuario: {request.user}
-Archivo: {csv_file.name}
---------------------------------------------------
-Total de filas en el archivo: {total_records_in_file}
-Cargados/Actualizados con éxito: {success_count}
-Filas con errores: {len(failed_rows)}
---------------------------------------------------"""
-
-            if failed_rows:
-                log_summary += "\nDETALLE DE ERRORES:\n"
-                for item in failed_rows:
-                    log_summary += f"  - Fila {item['line']}: {item['error']} (Datos: {item['row_data']})\n"
-                log_summary += "--------------------------------------------------"
-
-            logger.info(log_summary)
-
-            if success_count > 0:
-                messages.success(
-                    request, f'¡Carga completada! Se procesaron {success_count} registros con éxito.')
-            if failed_rows:
-                messages.warning(
-                    request, f'Se encontraron {len(failed_rows)} errores. Revisa los detalles en el log del sistema.')
-
-            context = {
-                'failed_rows': failed_rows,
-                'stats': {
-                    'total': total_records_in_file,
-                    'success': success_count,
-                    'failed': len(failed_rows)
-                }
-            }
-            return render(request, 'gestion/carga_masiva_cod_cierre.html', context)
-
-        except Exception as e:
-            logger.critical(
-                f"Error CRÍTICO en carga masiva por '{request.user}': {e}", exc_info=True)
-            messages.error(
-                request, f"Ocurrió un error general e inesperado: {e}")
-            return render(request, 'gestion/carga_masiva_cod_cierre.html')
+        trabajo = crear_trabajo_carga(TrabajoCarga.Tipo.CODIGOS_CIERRE, csv_file, request.user)
+        lanzar_trabajo_carga(trabajo)
+        return redirect(f"{reverse('gestion:carga_masiva_cod_cierre')}?trabajo={trabajo.pk}")
 
-    return render(request, 'gestion/carga_masiva_cod_cierre.html')
+    return render(request, 'gestion/carga_masiva_cod_cierre.html',
+                  {'trabajo': trabajo_carga_solicitado(request, TrabajoCarga.Tipo.CODIGOS_CIERRE)})
 
 
 def obtener_ultimos_codigos_cierre(request, aplicacion_id):
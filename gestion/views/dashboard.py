@@ -1,9 +1,11 @@
 # gestion/views/dashboard.py
 
+from django.conf import settings
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from .utils import no_cache, logger
 from ..models import Incidencia  # '..' sube un nivel para encontrar models.py
+from ..services.vencimiento_sla import incidencias_en_riesgo, incidencias_vencidas
 
 
 @login_required
@@ -11,7 +13,13 @@ from ..models import Incidencia  # '..' sube un nivel para encontrar models.py
 def dashboard_view(request):
     """Vista para el panel principal."""
     logger.info(f"El usuario '{request.user}' ha accedido al dashboard.")
+    horas_riesgo = getattr(settings, 'SLA_RIESGO_HORAS', 4)
+    # Widget de SLA en riesgo: consultas por rango sobre vencimiento_sla. Las
+    # vencidas se cuentan aparte para que no desplacen a las que están por vencer.
     context = {
         'total_incidencias': Incidencia.objects.count(),
+        'incidencias_en_riesgo': list(incidencias_en_riesgo(horas_riesgo, limite=10)),
+        'total_sla_vencidas': incidencias_vencidas().count(),
+        'horas_riesgo': horas_riesgo,
     }
     return render(request, 'gestion/dashboard.html', context)
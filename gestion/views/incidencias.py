@@ -5,16 +5,17 @@ import io
 import pandas as pd
 from datetime import datetime, timedelta
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.http import JsonResponse, HttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import F, Q
 from django.utils import timezone
-from django.db import transaction
 from .utils import no_cache, logger
-from ..models import Aplicacion, Estado, Severidad, Impacto, GrupoResolutor, Interfaz, Cluster, Bloque, Incidencia, CodigoCierre, Usuario
+from .cargas import trabajo_carga_solicitado
+from ..services.cargas_masivas import crear_trabajo_carga, lanzar_trabajo_carga
+from ..models import Aplicacion, Estado, Severidad, Impacto, GrupoResolutor, Interfaz, Cluster, Bloque, Incidencia, CodigoCierre, Usuario, TrabajoCarga
 from django.core.exceptions import ObjectDoesNotExist
-from unidecode import unidecode
 from openpyxl.utils import get_column_letter
 
 
@@ -371,46 +372,15 @@ def get_codigos_cierre_por_aplicacion(request, aplicacion_id):
         return JsonResponse({'error': 'Ocurrió un error en el servidor.'}, status=500)
 
 
-def normalize_text(text):
-    """Convierte texto a minúsculas y quita acentos."""
-    if text is None:
-        return ""
-    return unidecode(str(text)).lower().strip()
-
-
 @login_required
 @no_cache
 def carga_masiva_incidencia_view(request):
     """
     Gestiona la carga masiva de incidencias.
     (Versión que crea si no existe, o informa si ya existe sin actualizar).
+    El archivo se guarda en disco y lo procesa un TrabajoCarga en segundo
+    plano (ver services.cargas_masivas); la página consulta su avance.
     """
-    # ... (bloque try/except para las cachés sin cambios) ...
-    try:
-        # --- Creación de Cachés de Búsqueda ---
-        aplicacion_cache = {normalize_text(
-            a.cod_aplicacion): a for a in Aplicacion.objects.all()}
-        estado_cache = {normalize_text(
-            e.desc_estado): e for e in Estado.objects.all()}
-        severidad_cache = {normalize_text(
-            s.desc_severidad): s for s in Severidad.objects.all()}
-        cluster_cache = {normalize_text(
-            c.desc_cluster): c for c in Cluster.objects.all()}
-        bloque_cache = {normalize_text(
-            b.desc_bloque): b for b in Bloque.objects.all()}
-        usuario_cache = {normalize_text(
-            u.usuario): u for u in Usuario.objects.all()}
-        grupo_resolutor_cache = {normalize_text(
-            g.desc_grupo_resol): g for g in GrupoResolutor.objects.all()}
-
-        default_impacto = Impacto.objects.get(desc_impacto__iexact='interno')
-        default_interfaz = Interfaz.objects.get(desc_interfaz__iexact='WEB')
-
-    except ObjectDoesNotExist as e:
-        messages.error(
-            request, f"Error de Configuración: No se encontró un valor por defecto. Error: {e}")
-        return redirect('gestion:carga_masiva_incidencia')
-
     if request.method == 'POST':
         file = request.FILES.get('csv_file')
         if not file or not (file.name.endswith('.csv') or file.name.endswith('.xlsx')):
@@ -418,191 +388,14 @@ def carga_masiva_incidencia_view(request):
                 request, 'Por favor, selecciona un archivo con formato .csv o .xlsx.')
             return redirect('gestion:carga_masiva_incidencia')
 
-        # <<<--- PASO 1: AJUSTAR CONTADORES ---<<<
-        failed_rows = []
-        new_incidents_count = 0
-        existing_skipped_count = 0  # <-- Nuevo contador
-        skipped_indra_d_count = 0
-
-        try:
-            # ... (código de lectura de archivo sin cambios) ...
-            if file.name.endswith('.csv'):
-                df = pd.read_csv(file, keep_default_na=False, dtype=str)
-            else:
-                df = pd.read_excel(file, keep_default_na=False, dtype=str)
-            df.fillna('', inplace=True)
-
-            with transaction.atomic():
-                for index, row in df.iterrows():
-                    line_number = index + 2
-                    try:
-                        incidencia_id = row['incidencia'].strip()
-                        if not incidencia_id or not incidencia_id.upper().startswith('INC'):
-                            continue
-
-                        # ... (Toda la lógica de asignación de objetos sin cambios) ...
-                        aplicacion_obj = None
-                        codigo_cierre_obj = None
-                        app_val = row['aplicacion_id'].strip()
-                        cc_val = row['codigo_cierre_id'].strip()
-
-                        if app_val and cc_val:
-                            temp_app = aplicacion_cache.get(
-                                normalize_text(app_val))
-                            if temp_app:
-                                try:
-                                    temp_cc = CodigoCierre.objects.get(
-                                        cod_cierre__iexact=cc_val, aplicacion=temp_app)
-                                    aplicacion_obj = temp_app
-                                    codigo_cierre_obj = temp_cc
-                                except CodigoCierre.DoesNotExist:
-                                    aplicacion_obj = None
-                                    codigo_cierre_obj = None
-                            else:
-                                aplicacion_obj = None
-                                codigo_cierre_obj = None
-                        elif app_val and not cc_val:
-                            aplicacion_obj = aplicacion_cache.get(
-                                normalize_text(app_val))
-                        elif not app_val and cc_val:
-                            try:
-                                temp_cc = CodigoCierre.objects.get(
-                                    cod_cierre__iexact=cc_val)
-                                codigo_cierre_obj = temp_cc
-                                aplicacion_obj = temp_cc.aplicacion
-                            except (CodigoCierre.DoesNotExist, CodigoCierre.MultipleObjectsReturned):
-                                aplicacion_obj = None
-                                codigo_cierre_obj = None
-
-                        estado_obj = estado_cache.get(
-                            normalize_text(row['estado_id']))
-                        severidad_obj = severidad_cache.get(
-                            normalize_text(row['severidad_id']))
-                        cluster_obj = cluster_cache.get(
-                            normalize_text(row['cluster_id']))
-
-                        bloque_val = normalize_text(row['bloque_id'])
-                        if bloque_val == 'indra_d':
-                            skipped_indra_d_count += 1
-                            logger.info(
-                                f"Omitiendo incidencia {incidencia_id} (fila {line_number}) por valor 'indra_d'.")
-                            continue
-
-                        bloque_obj = None
-                        if bloque_val == 'indra_b3':
-                            bloque_obj = bloque_cache.get(
-                                normalize_text('bloque 3'))
-                        elif bloque_val in ('indra', 'indra_a'):
-                            bloque_obj = bloque_cache.get(
-                                normalize_text('bloque 4'))
-
-                        grupo_resolutor_obj = None
-                        if bloque_val == 'indra_b3':
-                            grupo_resolutor_obj = grupo_resolutor_cache.get(
-                                normalize_text('SWF_INDRA_3B'))
-                        elif bloque_val in ('indra', 'indra_a'):
-                            grupo_resolutor_obj = grupo_resolutor_cache.get(
-                                normalize_text('SWF_INDRA_G3'))
-
-                        impacto_obj = default_impacto
-                        interfaz_obj = default_interfaz
-                        usuario_asignado_obj = usuario_cache.get(
-                            normalize_text(row['usuario_asignado_id']))
-                        workaround_val = 'Sí' if 'con wa' in row['workaround'].strip(
-                        ).lower() else 'No'
-
-                        # <<<--- PASO 2: CAMBIAR update_or_create POR get_or_create ---<<<
-                        obj, created = Incidencia.objects.get_or_create(
-                            incidencia=incidencia_id,
-                            defaults={
-                                # ... todos tus campos ...
-                                'descripcion_incidencia': row['descripcion_incidencia'].strip(),
-                                'fecha_apertura': timezone.make_aware(datetime.strptime(row['fecha_apertura'].strip(), '%d-%m-%Y %H:%M:%S')) if row['fecha_apertura'].strip() else None,
-                                'fecha_ultima_resolucion': timezone.make_aware(datetime.strptime(row['fecha_ultima_resolucion'].strip(), '%d-%m-%Y %H:%M:%S')) if row['fecha_ultima_resolucion'].strip() else None,
-                                'causa': row['causa'].strip(),
-                                'bitacora': row['bitacora'].strip(),
-                                'tec_analisis': row['tec_analisis'].strip(),
-                                'correccion': row['correccion'].strip(),
-                                'solucion_final': row['solucion_final'].strip(),
-                                'observaciones': row['observaciones'].strip(),
-                                'demandas': row['demanadas'].strip(),
-                                'workaround': workaround_val,
-                                'aplicacion': aplicacion_obj,
-                                'estado': estado_obj,
-                                'severidad': severidad_obj,
-                                'grupo_resolutor': grupo_resolutor_obj,
-                                'interfaz': interfaz_obj,
-                                'impacto': impacto_obj,
-                                'cluster': cluster_obj,
-                                'bloque': bloque_obj,
-                                'codigo_cierre': codigo_cierre_obj,
-                                'usuario_asignado': usuario_asignado_obj,
-                            }
-                        )
-
-                        # <<<--- PASO 3: AJUSTAR LÓGICA DE CONTADORES Y LOGGING ---<<<
-                        if created:
-                            new_incidents_count += 1
-                            logger.info(
-                                f"Incidencia {incidencia_id} CREADA con éxito.")
-                        else:
-                            existing_skipped_count += 1  # <-- Usar nuevo contador
-                            logger.info(
-                                f"Incidencia {incidencia_id} ya existe, se omite.")
-
-                    except Exception as e:
-                        logger.error(
-                            f"Error procesando fila {line_number} (Incidencia: {incidencia_id}): {e}", exc_info=True)
-                        failed_rows.append({'line': line_number, 'row_data': ', '.join(
-                            map(str, row.values)), 'error': str(e)})
-
-            # <<<--- PASO 4: AJUSTAR RESUMEN FINAL ---<<<
-            log_summary = f"""
-            \n--------------------------------------------------
-            \nRESUMEN DE CARGA MASIVA
-            \nUsuario: {request.user}
-            \nArchivo: {file.name}
-            \n--------------------------------------------------
-            \nTotal de filas leídas del archivo: {len(df)}
-            \nIncidencias nuevas creadas: {new_incidents_count}
-            \nIncidencias omitidas (por ya existir): {existing_skipped_count}
-            \nIncidencias omitidas (por 'indra_d'): {skipped_indra_d_count}
-            \nIncidencias con errores: {len(failed_rows)}
-            \n--------------------------------------------------
-            """
-            if failed_rows:
-                log_summary += "\nDETALLE DE ERRORES:\n"
-                for item in failed_rows:
-                    incidencia_id_error = item.get(
-                        'row_data', 'N/A').split(',')[0]
-                    log_summary += f"  - Fila {item['line']} (Incidencia: {incidencia_id_error}): {item['error']}\n"
-                log_summary += "--------------------------------------------------\n"
-
-            logger.info(log_summary)
-
-            if new_incidents_count > 0:
-                messages.success(
-                    request, f'¡Carga completada! Se crearon {new_incidents_count} incidencias nuevas.')
-            if existing_skipped_count > 0:
-                messages.info(
-                    request, f'Se omitieron {existing_skipped_count} incidencias que ya existían.')
-            if failed_rows:
-                messages.warning(
-                    request, f'Se encontraron {len(failed_rows)} errores. Por favor, revisa los detalles.')
-            if skipped_indra_d_count > 0:
-                messages.info(
-                    request, f'Se omitieron {skipped_indra_d_count} incidencias con valor "indra_d".')
-
-            return render(request, 'gestion/carga_masiva_incidencia.html', {'failed_rows': failed_rows})
-
-        except Exception as e:
-            logger.error(
-                f"Error crítico al leer o procesar el archivo '{file.name}': {e}", exc_info=True)
-            messages.error(
-                request, f'Ocurrió un error al leer o procesar el archivo: {e}')
-            return redirect('gestion:carga_masiva_incidencia')
+        trabajo = crear_trabajo_carga(TrabajoCarga.Tipo.INCIDENCIAS, file, request.user)
+        lanzar_trabajo_carga(trabajo)
+        logger.info(
+            f"Usuario '{request.user}' encoló la carga masiva de incidencias {trabajo.pk} ('{file.name}').")
+        return redirect(f"{reverse('gestion:carga_masiva_incidencia')}?trabajo={trabajo.pk}")
 
-    return render(request, 'gestion/carga_masiva_incidencia.html')
+    return render(request, 'gestion/carga_masiva_incidencia.html',
+                  {'trabajo': trabajo_carga_solicitado(request, TrabajoCarga.Tipo.INCIDENCIAS)})
 
 
 # VISTA NUEVA PARA EXPORTAR EL REPORTE EN FORMATO XLSX
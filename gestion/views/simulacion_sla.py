@@ -0,0 +1,127 @@
+# gestion/views/simulacion_sla.py
+
+import json
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from .utils import is_staff, logger, no_cache
+from ..models import Criticidad, HorarioLaboral, Incidencia, ReglaSLA, Severidad
+from ..services.motor_sla import _timedelta_to_hms
+from ..services.simulacion_sla import simular_sla
+
+
+@login_required
+@user_passes_test(is_staff)
+@no_cache
+def simulacion_sla_view(request):
+    """Página para simular el cumplimiento de SLA con reglas u horarios hipotéticos."""
+    logger.info(
+        f"El usuario staff '{request.user}' ha accedido al simulador de SLA.")
+    hoy = date.today()
+    reglas = list(ReglaSLA.objects.select_related('severidad', 'criticidad_aplicacion').order_by(
+        'severidad__desc_severidad', 'criticidad_aplicacion__desc_criticidad'))
+    for regla in reglas:
+        regla.horas = round(regla.tiempo_sla.total_seconds() / 3600, 4)
+    context = {
+        'reglas': reglas,
+        'horarios': HorarioLaboral.objects.all(),
+        'fecha_desde': (hoy - timedelta(days=365)).isoformat(),
+        'fecha_hasta': hoy.isoformat(),
+    }
+    return render(request, 'gestion/simulacion_sla.html', context)
+
+
+def _leer_fecha(valor, campo):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError(f"La fecha '{campo}' debe tener el formato AAAA-MM-DD.")
+
+
+def _leer_hora(valor):
+    if not valor:
+        return None
+    try:
+        return time.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"Hora inválida: '{valor}'.")
+
+
+def _leer_reglas(datos):
+    """[{severidad_id, criticidad_id, horas}] -> {(severidad_id, criticidad_id): timedelta}."""
+    reglas = {}
+    for regla in datos or []:
+        try:
+            horas = float(regla['horas'])
+            clave = (int(regla['severidad_id']), int(regla['criticidad_id']))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Cada regla debe indicar severidad_id, criticidad_id y horas.")
+        if horas <= 0:
+            raise ValueError("Las horas de una regla deben ser mayores que cero.")
+        reglas[clave] = timedelta(hours=horas)
+    return reglas
+
+
+def _leer_horarios(datos):
+    """[{dia_semana, hora_inicio, hora_fin}] -> {dia_semana: (inicio, fin)}; sin horas = día cerrado."""
+    horarios = {}
+    for horario in datos or []:
+        try:
+            dia = int(horario['dia_semana'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Cada horario debe indicar dia_semana.")
+        if not 0 <= dia <= 6:
+            raise ValueError(f"Día de la semana inválido: {dia}.")
+        hora_inicio, hora_fin = _leer_hora(horario.get('hora_inicio')), _leer_hora(horario.get('hora_fin'))
+        if hora_inicio and hora_fin and hora_fin < hora_inicio:
+            raise ValueError(f"El horario del día {dia} termina antes de comenzar.")
+        horarios[dia] = (hora_inicio, hora_fin) if hora_inicio and hora_fin else (None, None)
+    return horarios
+
+
+@login_required
+@user_passes_test(is_staff)
+@require_POST
+def simular_sla_view(request):
+    """
+    Simula el SLA de las incidencias resueltas en un rango de fechas con
+    reglas y/o horarios hipotéticos. No modifica ninguna incidencia.
+    """
+    try:
+        data = json.loads(request.body)
+        desde = _leer_fecha(data.get('fecha_desde'), 'fecha_desde')
+        hasta = _leer_fecha(data.get('fecha_hasta'), 'fecha_hasta')
+        reglas = _leer_reglas(data.get('reglas'))
+        horarios = _leer_horarios(data.get('horarios'))
+    except json.JSONDecodeError:
+        return JsonResponse({'status': 'error', 'message': 'Solicitud inválida.'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    try:
+        zona = timezone.get_default_timezone()
+        # Mismo criterio de fechas que el reporte de SLA: por fecha de última resolución.
+        incidencias_qs = Incidencia.objects.select_related('aplicacion__criticidad', 'severidad').filter(
+            fecha_ultima_resolucion__gte=timezone.make_aware(desde, zona),
+            fecha_ultima_resolucion__lt=timezone.make_aware(hasta + timedelta(days=1), zona))
+        resultado = simular_sla(incidencias_qs, reglas, horarios)
+
+        severidades = dict(Severidad.objects.values_list('id', 'desc_severidad'))
+        criticidades = dict(Criticidad.objects.values_list('id', 'desc_criticidad'))
+        for fila in resultado['filas']:
+            fila['severidad'] = severidades.get(fila['severidad_id'], 'N/A')
+            fila['criticidad'] = criticidades.get(fila['criticidad_id'], 'N/A')
+            fila['sla_actual'] = _timedelta_to_hms(fila['sla_actual']) if fila['sla_actual'] else 'N/A'
+            fila['sla_simulado'] = _timedelta_to_hms(fila['sla_simulado']) if fila['sla_simulado'] else 'N/A'
+
+        logger.info(
+            f"El usuario staff '{request.user}' simuló el SLA de {resultado['total']} incidencias.")
+        return JsonResponse({'status': 'success', **resultado}, json_dumps_params={'ensure_ascii': False})
+    except Exception as e:
+        logger.error(f"Error en la vista simular_sla_view: {e}", exc_info=True)
+        return JsonResponse({'status': 'error', 'message': 'Ocurrió un error inesperado.'}, status=500)